@@ -0,0 +1,69 @@
+"""Latest price per product and store
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Create latest_prices table
+    op.create_table(
+        'latest_prices',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('store_id', sa.Integer(), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('currency', sa.String(), nullable=True),
+        sa.Column('is_sale', sa.Boolean(), nullable=True),
+        sa.Column('sale_end_date', sa.DateTime(), nullable=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=True),
+        sa.Column('min_price', sa.Float(), nullable=True),
+        sa.Column('max_price', sa.Float(), nullable=True),
+        sa.Column('price_total', sa.Float(), nullable=True),
+        sa.Column('observation_count', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ),
+        sa.PrimaryKeyConstraint('product_id', 'store_id')
+    )
+
+    # Backfill from existing price history
+    op.execute("""
+        INSERT INTO latest_prices (
+            product_id, store_id, price, currency, is_sale, sale_end_date,
+            timestamp, min_price, max_price, price_total, observation_count
+        )
+        SELECT
+            l.product_id, l.store_id, l.price, l.currency, l.is_sale,
+            l.sale_end_date, l.timestamp, a.min_price, a.max_price,
+            a.price_total, a.observation_count
+        FROM (
+            SELECT DISTINCT ON (product_id, store_id)
+                product_id, store_id, price, currency, is_sale,
+                sale_end_date, timestamp
+            FROM prices
+            WHERE product_id IS NOT NULL AND store_id IS NOT NULL
+            ORDER BY product_id, store_id, timestamp DESC, id DESC
+        ) l
+        JOIN (
+            SELECT
+                product_id, store_id,
+                MIN(price) AS min_price,
+                MAX(price) AS max_price,
+                SUM(price) AS price_total,
+                COUNT(*) AS observation_count
+            FROM prices
+            WHERE product_id IS NOT NULL AND store_id IS NOT NULL
+            GROUP BY product_id, store_id
+        ) a ON a.product_id = l.product_id AND a.store_id = l.store_id
+    """)
+
+def downgrade():
+    op.drop_table('latest_prices')
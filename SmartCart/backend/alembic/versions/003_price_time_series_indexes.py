@@ -0,0 +1,47 @@
+"""Time-series indexes on prices
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Build concurrently so large price tables stay writable during the upgrade
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_prices_product_id_timestamp',
+            'prices',
+            ['product_id', sa.text('timestamp DESC')],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_prices_store_id_product_id_timestamp',
+            'prices',
+            ['store_id', 'product_id', sa.text('timestamp DESC')],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_prices_timestamp_brin',
+            'prices',
+            ['timestamp'],
+            unique=False,
+            postgresql_using='brin',
+            postgresql_concurrently=True
+        )
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_prices_timestamp_brin', table_name='prices', postgresql_concurrently=True)
+        op.drop_index('ix_prices_store_id_product_id_timestamp', table_name='prices', postgresql_concurrently=True)
+        op.drop_index('ix_prices_product_id_timestamp', table_name='prices', postgresql_concurrently=True)
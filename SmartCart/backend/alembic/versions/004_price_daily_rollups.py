@@ -0,0 +1,54 @@
+"""Daily price rollups
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Create price_daily_rollups table
+    op.create_table(
+        'price_daily_rollups',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('store_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('min_price', sa.Float(), nullable=True),
+        sa.Column('max_price', sa.Float(), nullable=True),
+        sa.Column('price_total', sa.Float(), nullable=True),
+        sa.Column('observation_count', sa.Integer(), nullable=True),
+        sa.Column('sale_count', sa.Integer(), nullable=True),
+        sa.Column('last_price', sa.Float(), nullable=True),
+        sa.Column('last_timestamp', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+        sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ),
+        sa.PrimaryKeyConstraint('product_id', 'store_id', 'day')
+    )
+
+    # Backfill from existing price history
+    op.execute("""
+        INSERT INTO price_daily_rollups (
+            product_id, store_id, day, min_price, max_price, price_total,
+            observation_count, sale_count, last_price, last_timestamp
+        )
+        SELECT
+            product_id, store_id, timestamp::date,
+            MIN(price), MAX(price), SUM(price), COUNT(*),
+            COUNT(*) FILTER (WHERE is_sale),
+            (ARRAY_AGG(price ORDER BY timestamp DESC, id DESC))[1],
+            MAX(timestamp)
+        FROM prices
+        WHERE product_id IS NOT NULL AND store_id IS NOT NULL AND timestamp IS NOT NULL
+        GROUP BY product_id, store_id, timestamp::date
+    """)
+
+def downgrade():
+    op.drop_table('price_daily_rollups')
@@ -0,0 +1,21 @@
+"""Index daily price rollups by day
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Supports the catalog-wide 7-day average used to rank deals
+    op.create_index(op.f('ix_price_daily_rollups_day'), 'price_daily_rollups', ['day'], unique=False)
+
+def downgrade():
+    op.drop_index(op.f('ix_price_daily_rollups_day'), table_name='price_daily_rollups')
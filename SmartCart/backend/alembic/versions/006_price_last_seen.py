@@ -0,0 +1,24 @@
+"""Store prices change-only with a last_seen column
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Nullable with no default, so adding it does not rewrite the table.
+    # Existing duplicate rows can be folded afterwards with
+    # scripts/compact_price_history.py.
+    op.add_column('prices', sa.Column('last_seen', sa.DateTime(), nullable=True))
+
+def downgrade():
+    op.drop_column('prices', 'last_seen')
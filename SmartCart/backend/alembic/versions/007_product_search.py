@@ -0,0 +1,56 @@
+"""Full-text and trigram indexes for local product search
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+PRODUCT_SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(brand, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(category, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'D')"
+)
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # A stored generated column keeps the document current on every product
+    # insert and update; adding it rewrites the products table once.
+    op.add_column(
+        'products',
+        sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(PRODUCT_SEARCH_DOCUMENT, persisted=True))
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_products_search_vector',
+            'products',
+            ['search_vector'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_products_name_trgm',
+            'products',
+            ['name'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'},
+            postgresql_concurrently=True
+        )
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_products_name_trgm', table_name='products', postgresql_concurrently=True)
+        op.drop_index('ix_products_search_vector', table_name='products', postgresql_concurrently=True)
+    op.drop_column('products', 'search_vector')
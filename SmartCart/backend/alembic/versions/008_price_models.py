@@ -0,0 +1,43 @@
+"""Metadata for trained per-product price models
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Create price_models table
+    op.create_table(
+        'price_models',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('artifact_path', sa.String(), nullable=False),
+        sa.Column('data_until', sa.DateTime(), nullable=True),
+        sa.Column('sample_count', sa.Integer(), nullable=True),
+        sa.Column('train_seconds', sa.Float(), nullable=True),
+        sa.Column('trained_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_price_models_id'), 'price_models', ['id'], unique=False)
+    op.create_index(
+        'ix_price_models_product_id_version',
+        'price_models',
+        ['product_id', sa.text('version DESC')],
+        unique=True
+    )
+
+def downgrade():
+    op.drop_index('ix_price_models_product_id_version', table_name='price_models')
+    op.drop_index(op.f('ix_price_models_id'), table_name='price_models')
+    op.drop_table('price_models')
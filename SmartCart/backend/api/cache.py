@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime, date
+from typing import Any, Dict, Optional, Tuple
+import redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class Cache:
+    """JSON cache shared through Redis (REDIS_URL), with an in-process fallback.
+
+    Cache failures are logged and treated as misses so a Redis outage never
+    fails a request.
+    """
+
+    def __init__(self, url: Optional[str] = None):
+        self.url = url if url is not None else os.getenv("REDIS_URL")
+        self._client: Optional[redis.Redis] = None
+        self._local: Dict[str, Tuple[float, str]] = {}
+
+    @property
+    def client(self) -> Optional[redis.Redis]:
+        if self._client is None and self.url:
+            self._client = redis.Redis.from_url(self.url, socket_timeout=0.5)
+        return self._client
+
+    def get_json(self, key: str) -> Optional[Any]:
+        """Return the cached value for `key`, or None on a miss."""
+        raw = None
+        if self.client is not None:
+            try:
+                raw = self.client.get(key)
+            except redis.RedisError as e:
+                logger.warning(f"Cache get failed for {key}: {str(e)}")
+        else:
+            entry = self._local.get(key)
+            if entry and entry[0] > time.monotonic():
+                raw = entry[1]
+            elif entry:
+                del self._local[key]
+
+        return json.loads(raw) if raw is not None else None
+
+    def set_json(self, key: str, value: Any, ttl: int) -> None:
+        """Store `value` under `key` for `ttl` seconds."""
+        raw = json.dumps(value, default=_json_default)
+        if self.client is not None:
+            try:
+                self.client.set(key, raw, ex=ttl)
+            except redis.RedisError as e:
+                logger.warning(f"Cache set failed for {key}: {str(e)}")
+        else:
+            self._local[key] = (time.monotonic() + ttl, raw)
+
+    def delete(self, *keys: str) -> None:
+        """Drop `keys` from the cache."""
+        if not keys:
+            return
+        if self.client is not None:
+            try:
+                self.client.delete(*keys)
+            except redis.RedisError as e:
+                logger.warning(f"Cache delete failed for {keys}: {str(e)}")
+        else:
+            for key in keys:
+                self._local.pop(key, None)
+
+class LRUCache:
+    """Small in-process cache with per-entry TTL and least-recently-used eviction.
+
+    Meant as an L1 in front of `cache` for hot keys; values are kept as-is,
+    so treat them as read-only.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value for `key`, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        """Store `value` for `ttl` seconds, evicting the least recently used entry if full."""
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+# Process-wide cache instance
+cache = Cache()
+
+def invalidate_on_commit(session: Session, *keys: str) -> None:
+    """Drop `keys` from the cache once `session` commits; discarded on rollback."""
+    session.info.setdefault("cache_invalidations", set()).update(keys)
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session: Session) -> None:
+    keys = session.info.pop("cache_invalidations", None)
+    if keys:
+        cache.delete(*keys)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session: Session) -> None:
+    session.info.pop("cache_invalidations", None)
+
+def set_on_commit(session: Session, key: str, value: Any, ttl: int, store: Optional[Cache] = None) -> None:
+    """Store `value` under `key` (in `store`, default `cache`) once `session` commits; discarded on rollback.
+
+    Savepoints releasing don't count as a commit. Register writes after
+    the work they describe, as a savepoint rolling back doesn't drop them.
+    """
+    session.info.setdefault("cache_writes", {})[key] = (store or cache, value, ttl)
+
+@event.listens_for(Session, "after_commit")
+def _apply_writes(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    writes = session.info.pop("cache_writes", None)
+    for key, (store, value, ttl) in (writes or {}).items():
+        store.set_json(key, value, ttl)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_writes(session: Session) -> None:
+    if not session.in_nested_transaction():
+        session.info.pop("cache_writes", None)
@@ -0,0 +1,98 @@
+import os
+import asyncio
+import logging
+from typing import Dict, Optional
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+class HTTPClient:
+    """Application-scoped aiohttp session shared by store API clients and scrapers.
+
+    Keeps TCP/TLS connections alive between requests, caps connections in
+    total and per host, and caches DNS lookups. Settings come from the
+    HTTP_* environment variables.
+    """
+
+    def __init__(self):
+        self.limit = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+        self.limit_per_host = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "10"))
+        self.dns_cache_ttl = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+        self.keepalive_timeout = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))
+        self.timeout = aiohttp.ClientTimeout(
+            total=float(os.getenv("HTTP_TIMEOUT", "30")),
+            connect=float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The pooled session, created lazily on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            self._discard_session()
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._loop = loop
+            self._limits = {}
+        return self._session
+
+    def _discard_session(self) -> None:
+        """Close a session left over from another event loop before it is replaced."""
+        session, loop = self._session, self._loop
+        if session is None or session.closed:
+            return
+        if loop is not None and loop.is_running():
+            # Still serving another thread: close it on its own loop
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+            return
+        # Its loop has finished, so the session cannot be awaited there;
+        # detach it and close the connector so nothing is left open
+        connector = session.connector
+        session.detach()
+        closing = connector.close()
+        if asyncio.iscoroutine(closing):
+            # Newer aiohttp versions made TCPConnector.close a coroutine
+            asyncio.ensure_future(closing)
+        logger.warning("Closed an HTTP session left over from a finished event loop")
+
+    def concurrency_limit(self, key: str, limit: int) -> asyncio.Semaphore:
+        """Process-wide semaphore capping in-flight requests for `key` (e.g. a store)."""
+        self.session
+        if key not in self._limits:
+            self._limits[key] = asyncio.Semaphore(limit)
+        return self._limits[key]
+
+    async def start(self) -> None:
+        """Open the session ahead of the first request."""
+        self.session
+
+    async def close(self) -> None:
+        """Close the session and its pooled connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            # Let the connector finish closing TLS transports
+            await asyncio.sleep(0.25)
+        self._session = None
+        self._loop = None
+        self._limits = {}
+
+# Create a singleton instance
+http_client = HTTPClient()
+
+# Function to start the HTTP client
+async def start_http_client():
+    """Start the shared HTTP client."""
+    await http_client.start()
+
+# Function to stop the HTTP client
+async def stop_http_client():
+    """Stop the shared HTTP client."""
+    await http_client.close()
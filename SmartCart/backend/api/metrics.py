@@ -0,0 +1,106 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# Price refresh pipeline (api/tasks/refresh_pool.py); `pool` is the refresh source
+PRICE_REFRESH_PRODUCTS = Counter(
+    "price_refresh_products_total",
+    "Products processed by a price refresh",
+    ["pool", "result"]
+)
+PRICE_REFRESH_OBSERVATIONS = Counter(
+    "price_refresh_observations_total",
+    "Price observations written by a price refresh",
+    ["pool"]
+)
+PRICE_REFRESH_BACKLOG = Gauge(
+    "price_refresh_backlog_products",
+    "Products still waiting to be refreshed in the current cycle",
+    ["pool"]
+)
+PRICE_REFRESH_THROUGHPUT = Gauge(
+    "price_refresh_products_per_second",
+    "Products refreshed per second over the last completed cycle",
+    ["pool"]
+)
+PRICE_REFRESH_CYCLE_SECONDS = Histogram(
+    "price_refresh_cycle_seconds",
+    "Wall-clock duration of a full refresh cycle",
+    ["pool"],
+    buckets=(60, 300, 600, 1200, 1800, 3600, 7200, 14400)
+)
+
+# Refresh scheduling (api/tasks/refresh_scheduler.py)
+PRICE_REFRESH_SCHEDULED = Gauge(
+    "price_refresh_scheduled_products",
+    "Products picked for the current refresh cycle"
+)
+PRICE_REFRESH_DEFERRED = Gauge(
+    "price_refresh_deferred_products",
+    "Products due for a refresh that did not fit in the cycle's request budget"
+)
+
+# Outbound retailer requests (api/rate_limit.py)
+RETAILER_REQUESTS_THROTTLED = Counter(
+    "retailer_requests_throttled_total",
+    "Requests delayed by our token bucket (local) or answered with 429 (remote)",
+    ["retailer", "source"]
+)
+RETAILER_REQUESTS_RETRIED = Counter(
+    "retailer_requests_retried_total",
+    "Retried retailer requests by reason (status code or exception)",
+    ["retailer", "reason"]
+)
+RETAILER_RETRY_BUDGET_EXHAUSTED = Counter(
+    "retailer_retry_budget_exhausted_total",
+    "Retries skipped because the retailer's retry budget was spent",
+    ["retailer"]
+)
+RETAILER_RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "retailer_rate_limit_wait_seconds",
+    "Time requests waited for a rate limit token",
+    ["retailer"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60)
+)
+RETAILER_RESPONSES_UNCHANGED = Counter(
+    "retailer_responses_unchanged_total",
+    "Polled retailer responses skipped as unchanged (304 or identical body)",
+    ["retailer", "reason"]
+)
+
+# Fan-out calls to store backends (api/resilience.py)
+STORE_CIRCUIT_STATE = Gauge(
+    "store_circuit_state",
+    "Circuit breaker state per store (0 closed, 1 half-open, 2 open)",
+    ["store"]
+)
+STORE_REQUESTS_HEDGED = Counter(
+    "store_requests_hedged_total",
+    "Calls that started a hedged second attempt",
+    ["store"]
+)
+STORE_CALLS_TIMED_OUT = Counter(
+    "store_calls_timed_out_total",
+    "Store calls abandoned at the fan-out deadline",
+    ["store"]
+)
+
+# Cross-store product search (api/services/store_search.py)
+STORE_SEARCH_REQUESTS = Counter(
+    "store_search_requests_total",
+    "Cross-store searches by how they were answered (cache, coalesced, upstream)",
+    ["source"]
+)
+
+# Loaded price models (api/ml/model_registry.py)
+PRICE_MODEL_CACHE_REQUESTS = Counter(
+    "price_model_cache_requests_total",
+    "Model lookups by outcome (hit, load, reload, none)",
+    ["result"]
+)
+PRICE_MODEL_CACHE_EVICTIONS = Counter(
+    "price_model_cache_evictions_total",
+    "Models evicted to stay within the model cache size"
+)
+PRICE_MODEL_CACHE_BYTES = Gauge(
+    "price_model_cache_bytes",
+    "Artifact bytes of the models currently cached"
+)
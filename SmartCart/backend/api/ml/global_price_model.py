@@ -0,0 +1,238 @@
+import os
+import re
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from api.price_ml import MODEL_DIR
+
+logger = logging.getLogger(__name__)
+
+FEATURE_COLUMNS = [
+    "horizon",
+    "day_of_week",
+    "month",
+    "is_sale",
+    "price_vs_mean_7",
+    "price_vs_mean_30",
+    "volatility_30",
+    "price_vs_stores",
+    "days_since_change",
+    "category_code",
+    "store_code"
+]
+CATEGORICAL_COLUMNS = ["category_code", "store_code"]
+# Days ahead sampled when building training rows
+HORIZONS = (1, 3, 7, 14, 30)
+# HistGradientBoosting caps categorical features at 255 bins (one kept for missing)
+MAX_CATEGORIES = 254
+# History needed to compute the rolling features for the current state
+STATE_DAYS = 45
+
+# One row per product, store and day, expanded from the change-only prices
+_DAILY_PRICES_SQL = """
+    SELECT DISTINCT ON (p.product_id, p.store_id, d.day)
+        p.product_id, p.store_id, d.day, p.price, p.is_sale, pr.category
+    FROM prices p
+    JOIN products pr ON pr.id = p.product_id
+    CROSS JOIN LATERAL generate_series(
+        date_trunc('day', GREATEST(p.timestamp, :start)),
+        date_trunc('day', COALESCE(p.last_seen, p.timestamp)),
+        interval '1 day'
+    ) AS d(day)
+    WHERE COALESCE(p.last_seen, p.timestamp) >= :start
+      AND p.store_id IS NOT NULL
+      {product_filter}
+    ORDER BY p.product_id, p.store_id, d.day, p.timestamp DESC
+"""
+
+def global_model_path(version: int) -> str:
+    return os.path.join(MODEL_DIR, "global_price_model", f"v{version}.joblib")
+
+def latest_global_model_version() -> Optional[int]:
+    """Highest published version of the global model, if any."""
+    directory = os.path.dirname(global_model_path(0))
+    if not os.path.isdir(directory):
+        return None
+    versions = [
+        int(match.group(1))
+        for match in (re.fullmatch(r"v(\d+)\.joblib", name) for name in os.listdir(directory))
+        if match
+    ]
+    return max(versions) if versions else None
+
+def load_daily_prices(db: Session, start: datetime, product_ids: Optional[Sequence[int]] = None) -> pd.DataFrame:
+    """Daily prices per product and store since `start`, read straight from SQL."""
+    product_filter = "AND p.product_id = ANY(:product_ids)" if product_ids is not None else ""
+    params = {"start": start}
+    if product_ids is not None:
+        params["product_ids"] = list(product_ids)
+    result = db.execute(text(_DAILY_PRICES_SQL.format(product_filter=product_filter)), params)
+    return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+def add_state_features(daily: pd.DataFrame) -> pd.DataFrame:
+    """Per-day features describing where each product/store price stands."""
+    df = daily.sort_values(["product_id", "store_id", "day"], kind="stable").reset_index(drop=True)
+    df["day"] = pd.to_datetime(df["day"])
+    df["price"] = df["price"].astype(float)
+    df["is_sale"] = df["is_sale"].fillna(False).astype(int)
+
+    # Groups come out in row order since the frame is sorted by its keys.
+    # Windows span calendar days, as days without a valid price have no row
+    grouped = df.groupby(["product_id", "store_id"], sort=False)
+    mean_7 = grouped.rolling("7D", on="day", min_periods=1)["price"].mean().to_numpy()
+    mean_30 = grouped.rolling("30D", on="day", min_periods=1)["price"].mean().to_numpy()
+    std_30 = grouped.rolling("30D", on="day", min_periods=2)["price"].std().to_numpy()
+
+    df["price_vs_mean_7"] = df["price"] / mean_7 - 1
+    df["price_vs_mean_30"] = df["price"] / mean_30 - 1
+    df["volatility_30"] = np.nan_to_num(std_30 / mean_30)
+    df["price_vs_stores"] = df["price"] / df.groupby(["product_id", "day"])["price"].transform("mean") - 1
+
+    # The first row of every group starts a run, so runs never span groups
+    run = grouped["price"].diff().fillna(1).ne(0).cumsum()
+    df["days_since_change"] = (df["day"] - df.groupby(run)["day"].transform("first")).dt.days
+    return df
+
+class GlobalPriceModel:
+    """One gradient-boosted model for every product, predicting relative price change.
+
+    Training rows pair a product/store's state on one day with its price
+    `horizon` days later; the target is the relative change, so a single
+    model serves cheap and expensive products alike. Category and store
+    are categorical features, which lets the model learn per-category and
+    per-store behaviour without a model per product.
+    """
+
+    def __init__(
+        self,
+        horizons: Sequence[int] = HORIZONS,
+        history_days: int = 180,
+        max_rows: int = 2_000_000,
+        random_state: int = 42
+    ):
+        self.horizons = tuple(horizons)
+        self.history_days = history_days
+        self.max_rows = max_rows
+        self.random_state = random_state
+        self.model: Optional[HistGradientBoostingRegressor] = None
+        self.category_codes: Dict[str, int] = {}
+        self.store_codes: Dict[int, int] = {}
+        self.trained_at: Optional[datetime] = None
+
+    def _encode(self, df: pd.DataFrame) -> pd.DataFrame:
+        df["category_code"] = df["category"].map(self.category_codes).astype(float)
+        df["store_code"] = df["store_id"].map(self.store_codes).astype(float)
+        return df
+
+    def _calendar(self, df: pd.DataFrame) -> pd.DataFrame:
+        target_day = df["day"] + pd.to_timedelta(df["horizon"], unit="D")
+        df["day_of_week"] = target_day.dt.dayofweek
+        df["month"] = target_day.dt.month
+        df["target_day"] = target_day
+        return df
+
+    def training_rows(self, state: pd.DataFrame) -> pd.DataFrame:
+        """Join each state row with the same product/store's price `horizon` days later."""
+        future = state[["product_id", "store_id", "day", "price"]].rename(columns={"price": "future_price"})
+        frames = []
+        for horizon in self.horizons:
+            shifted = future.assign(day=future["day"] - pd.Timedelta(days=horizon))
+            frames.append(state.merge(shifted, on=["product_id", "store_id", "day"]).assign(horizon=horizon))
+        rows = pd.concat(frames, ignore_index=True)
+        if len(rows) > self.max_rows:
+            rows = rows.sample(self.max_rows, random_state=self.random_state)
+        rows["target"] = rows["future_price"] / rows["price"] - 1
+        return self._calendar(rows)
+
+    def fit(self, db: Session) -> Dict:
+        """Train on the last `history_days` of prices; returns rows, products and train_seconds."""
+        started = time.perf_counter()
+        daily = load_daily_prices(db, datetime.utcnow() - timedelta(days=self.history_days))
+        if daily.empty:
+            return {"rows": 0, "products": 0, "train_seconds": 0.0}
+        state = add_state_features(daily)
+
+        categories = state["category"].dropna().value_counts().index[:MAX_CATEGORIES]
+        self.category_codes = {category: code for code, category in enumerate(categories)}
+        stores = state["store_id"].value_counts().index[:MAX_CATEGORIES]
+        self.store_codes = {int(store_id): code for code, store_id in enumerate(stores)}
+
+        rows = self._encode(self.training_rows(state))
+        self.model = HistGradientBoostingRegressor(
+            max_iter=200,
+            max_leaf_nodes=63,
+            learning_rate=0.1,
+            categorical_features=[FEATURE_COLUMNS.index(column) for column in CATEGORICAL_COLUMNS],
+            random_state=self.random_state
+        )
+        self.model.fit(rows[FEATURE_COLUMNS].to_numpy(dtype=float), rows["target"].to_numpy())
+        self.trained_at = datetime.utcnow()
+        return {
+            "rows": len(rows),
+            "products": int(state["product_id"].nunique()),
+            "train_seconds": time.perf_counter() - started
+        }
+
+    def predict_many(self, db: Session, product_ids: Sequence[int], days: int = 30) -> Dict[int, List[Dict]]:
+        """Predict the `days` daily prices after today for every store of every product in one pass.
+
+        Returns {product_id: [{"date", "store_id", "predicted_price"}, ...]};
+        products without recent prices are left out.
+        """
+        if self.model is None or not product_ids:
+            return {}
+        daily = load_daily_prices(db, datetime.utcnow() - timedelta(days=STATE_DAYS), product_ids)
+        if daily.empty:
+            return {}
+
+        state = add_state_features(daily).groupby(["product_id", "store_id"], sort=False).tail(1)
+        rows = state.loc[state.index.repeat(days)].reset_index(drop=True)
+        # Forecast from today, however long ago a store's price was last seen
+        today = pd.Timestamp(datetime.utcnow().date())
+        rows["horizon"] = (today - rows["day"]).dt.days + np.tile(np.arange(1, days + 1), len(state))
+        rows = self._encode(self._calendar(rows))
+        change = self.model.predict(rows[FEATURE_COLUMNS].to_numpy(dtype=float))
+        rows["predicted_price"] = rows["price"] * (1 + change)
+
+        predictions: Dict[int, List[Dict]] = {}
+        for row in rows[["product_id", "store_id", "target_day", "predicted_price"]].itertuples(index=False):
+            predictions.setdefault(int(row.product_id), []).append({
+                "date": row.target_day.date().isoformat(),
+                "store_id": int(row.store_id),
+                "predicted_price": float(row.predicted_price)
+            })
+        return predictions
+
+    def save(self, path: Optional[str] = None) -> str:
+        """Publish the model as the next version (or to `path`); returns where it was written."""
+        if path is None:
+            path = global_model_path((latest_global_model_version() or 0) + 1)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        joblib.dump(self.__dict__, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Optional[str] = None, mmap_mode: Optional[str] = None) -> Optional["GlobalPriceModel"]:
+        """Load the model at `path`, or the latest published version; None if there is none.
+
+        `mmap_mode` is passed to joblib.load, e.g. "r" to keep the tree
+        arrays memory-mapped.
+        """
+        if path is None:
+            version = latest_global_model_version()
+            if version is None:
+                return None
+            path = global_model_path(version)
+        model = cls()
+        model.__dict__.update(joblib.load(path, mmap_mode=mmap_mode))
+        return model
@@ -0,0 +1,181 @@
+import os
+import json
+import logging
+import threading
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# A rule gives the day(s) an event falls on in a given year
+Rule = Callable[[int], List[date]]
+
+MONDAY, TUESDAY, WEDNESDAY, THURSDAY, FRIDAY, SATURDAY, SUNDAY = range(7)
+
+def fixed(month: int, day: int) -> Rule:
+    """The same calendar day every year."""
+    return lambda year: [date(year, month, day)]
+
+def nth_weekday(month: int, weekday: int, n: int) -> Rule:
+    """The n-th `weekday` of `month` (n=-1 for the last one)."""
+    def rule(year: int) -> List[date]:
+        if n > 0:
+            first = date(year, month, 1)
+            return [first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))]
+        last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+        return [last - timedelta(days=(last.weekday() - weekday) % 7 + 7 * (-n - 1))]
+    return rule
+
+def easter(year: int) -> List[date]:
+    """Western Easter Sunday (anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return [date(year, month, day + 1)]
+
+def shifted(rule: Rule, days: int) -> Rule:
+    """Another rule's days moved by `days`."""
+    return lambda year: [day + timedelta(days=days) for day in rule(year)]
+
+def spanning(rule: Rule, days: int) -> Rule:
+    """Another rule's days, each extended to an event of `days` days."""
+    return lambda year: [day + timedelta(days=offset) for day in rule(year) for offset in range(days)]
+
+_thanksgiving = nth_weekday(11, THURSDAY, 4)
+
+# Days that move grocery and retail prices in the US
+US_RETAIL_HOLIDAYS: Dict[str, Rule] = {
+    "New Year's Day": fixed(1, 1),
+    "Martin Luther King Jr. Day": nth_weekday(1, MONDAY, 3),
+    "Valentine's Day": fixed(2, 14),
+    "Presidents' Day": nth_weekday(2, MONDAY, 3),
+    "Easter": easter,
+    "Mother's Day": nth_weekday(5, SUNDAY, 2),
+    "Memorial Day": nth_weekday(5, MONDAY, -1),
+    "Father's Day": nth_weekday(6, SUNDAY, 3),
+    "Independence Day": fixed(7, 4),
+    "Labor Day": nth_weekday(9, MONDAY, 1),
+    "Columbus Day": nth_weekday(10, MONDAY, 2),
+    "Halloween": fixed(10, 31),
+    "Veterans Day": fixed(11, 11),
+    "Thanksgiving Day": _thanksgiving,
+    "Black Friday": shifted(_thanksgiving, 1),
+    "Cyber Monday": shifted(_thanksgiving, 4),
+    "Christmas Eve": fixed(12, 24),
+    "Christmas Day": fixed(12, 25),
+    "New Year's Eve": fixed(12, 31),
+}
+
+def promo_event(spec: Dict) -> Rule:
+    """Build a rule from a promo event in the PROMO_EVENTS_CONFIG file.
+
+    An event is either a list of one-off "dates" ("YYYY-MM-DD"), a fixed
+    "month" and "day", or a "month", "weekday" (0 is Monday) and "week"
+    (-1 for the last one), optionally lasting "days" days.
+    """
+    name = spec.get("name", "?")
+    if "dates" in spec:
+        dates = [date.fromisoformat(day) for day in spec["dates"]]
+        rule = lambda year: [day for day in dates if day.year == year]
+    elif "month" in spec and "day" in spec:
+        rule = fixed(spec["month"], spec["day"])
+    elif "month" in spec and "weekday" in spec:
+        rule = nth_weekday(spec["month"], spec["weekday"], spec.get("week", 1))
+    else:
+        raise ValueError(f"Promo event {name}: needs dates, month and day, or month and weekday")
+    return spanning(rule, spec.get("days", 1))
+
+def load_promo_events(path: Optional[str] = None) -> Dict[str, Rule]:
+    """Promo events from `path` or PROMO_EVENTS_CONFIG; none if neither is set."""
+    path = path or os.getenv("PROMO_EVENTS_CONFIG")
+    if not path:
+        return {}
+    with open(path) as f:
+        specs = json.load(f)
+    events = {spec["name"]: promo_event(spec) for spec in specs}
+    logger.info(f"Loaded {len(events)} promo events from {path}")
+    return events
+
+class HolidayCalendar:
+    """US retail holidays plus promo events as day-indexed lookup tables.
+
+    For every day of the covered years the table holds whether it is a
+    holiday and how many days remain until the next one, so both lookups
+    are a subtraction and an array index. The covered years start from
+    the first dates looked up and grow whenever dates fall outside them.
+    """
+
+    def __init__(self, events: Optional[Dict[str, Rule]] = None, promo_events: Optional[Dict[str, Rule]] = None):
+        self._events = events
+        self._promo_events = promo_events
+        self._lock = threading.Lock()
+        # (first day, day after the last, is_holiday, days_until_holiday)
+        self._table: Optional[Tuple[np.datetime64, np.datetime64, np.ndarray, np.ndarray]] = None
+
+    @property
+    def events(self) -> Dict[str, Rule]:
+        if self._events is None:
+            self._events = dict(US_RETAIL_HOLIDAYS)
+        if self._promo_events is None:
+            self._promo_events = load_promo_events()
+        return {**self._events, **self._promo_events}
+
+    def holidays(self, start_year: int, end_year: int) -> np.ndarray:
+        """Sorted, distinct holiday days from `start_year` through `end_year`."""
+        days = {
+            day
+            for year in range(start_year, end_year + 1)
+            for rule in self.events.values()
+            for day in rule(year)
+        }
+        return np.array(sorted(days), dtype="datetime64[D]")
+
+    def _build(self, start_year: int, end_year: int) -> None:
+        start = np.datetime64(f"{start_year}-01-01", "D")
+        end = np.datetime64(f"{end_year + 1}-01-01", "D")
+        # Next year's holidays too, so late December still has a next one
+        holidays = self.holidays(start_year, end_year + 1)
+        days = np.arange(start, end)
+        next_holiday = holidays[np.searchsorted(holidays, days, side="right")]
+        self._table = (
+            start,
+            end,
+            np.isin(days, holidays),
+            (next_holiday - days).astype(np.int16)
+        )
+
+    def _lookup(self, dates) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Table rows for `dates`: (day index, is_holiday table, days_until table)."""
+        days = np.asarray(dates, dtype="datetime64[ns]").astype("datetime64[D]")
+        table = self._table
+        if days.size and (table is None or days.min() < table[0] or days.max() >= table[1]):
+            with self._lock:
+                years = days.astype("datetime64[Y]").astype(int) + 1970
+                start_year, end_year = int(years.min()), int(years.max())
+                if self._table is not None:
+                    start_year = min(start_year, self._table[0].astype("datetime64[Y]").astype(int) + 1970)
+                    end_year = max(end_year, self._table[1].astype("datetime64[Y]").astype(int) + 1969)
+                self._build(start_year, end_year)
+            table = self._table
+        if table is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool), np.zeros(0, dtype=np.int16)
+        return (days - table[0]).astype(np.int64), table[2], table[3]
+
+    def is_holiday(self, dates) -> np.ndarray:
+        """Whether each of `dates` (datetime-like array) is a holiday or promo day."""
+        index, is_holiday, _ = self._lookup(dates)
+        return is_holiday[index]
+
+    def days_until_holiday(self, dates) -> np.ndarray:
+        """Whole days from each of `dates` to the next holiday after it."""
+        index, _, days_until = self._lookup(dates)
+        return days_until[index]
+
+# Create a singleton instance
+holiday_calendar = HolidayCalendar()
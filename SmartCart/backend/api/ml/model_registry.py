@@ -0,0 +1,168 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+import joblib
+from sqlalchemy.orm import Session
+
+from api.models import PriceModel
+from api.metrics import PRICE_MODEL_CACHE_REQUESTS, PRICE_MODEL_CACHE_EVICTIONS, PRICE_MODEL_CACHE_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Memory budget for loaded models (see ModelRegistry for how each is measured)
+MODEL_CACHE_MAX_BYTES = int(float(os.getenv("MODEL_CACHE_MAX_MB", "512")) * 1024 * 1024)
+# How often a cached model checks whether a newer version was published
+MODEL_RELOAD_CHECK_SECONDS = float(os.getenv("MODEL_RELOAD_CHECK_SECONDS", "60"))
+
+GLOBAL_MODEL_KEY = "global"
+
+class LoadedModel(NamedTuple):
+    version: int
+    artifact_path: str
+    model: Any
+    nbytes: int
+
+def forest_nbytes(forest: Any) -> int:
+    """Bytes held by the node and value arrays of a fitted forest's trees."""
+    total = 0
+    for estimator in getattr(forest, "estimators_", []):
+        state = estimator.tree_.__getstate__()
+        total += state["nodes"].nbytes + state["values"].nbytes
+    return total
+
+class ModelRegistry:
+    """Process-wide LRU cache of the published price models.
+
+    Per-product models are keyed by product id, the global model by
+    GLOBAL_MODEL_KEY, and are loaded on first use. Only the global model
+    is loaded with joblib's mmap_mode: its numpy arrays stay file-backed
+    and are counted by artifact size. scikit-learn copies the node arrays
+    of forest trees on load, so mapping gains the per-product forests
+    nothing; they are loaded normally and counted by the size of their
+    trees in memory. Models are evicted least recently used first once
+    the total passes `max_bytes`.
+
+    At most every `check_interval` seconds, a cached model checks whether
+    the trainer has published a newer version. If so, that version is
+    loaded in its place. Artifacts are never rewritten in place and
+    pruned versions are only unlinked, so mapped files stay valid.
+    """
+
+    def __init__(self, max_bytes: int = MODEL_CACHE_MAX_BYTES, check_interval: float = MODEL_RELOAD_CHECK_SECONDS):
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self.nbytes = 0
+        self._entries: "OrderedDict[Hashable, LoadedModel]" = OrderedDict()
+        self._checked_at: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def _get(
+        self,
+        key: Hashable,
+        latest: Callable[[], Optional[Tuple[int, str]]],
+        load: Callable[[str], Any],
+        size: Callable[[str, Any], int]
+    ) -> Optional[LoadedModel]:
+        """Cached model for `key`, (re)loaded if `latest()` names a newer (version, path).
+
+        `size(path, model)` gives the bytes a loaded model counts against max_bytes.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if now - self._checked_at[key] < self.check_interval:
+                    PRICE_MODEL_CACHE_REQUESTS.labels(result="hit").inc()
+                    return entry
+
+        published = latest()
+        if entry is not None:
+            with self._lock:
+                if key in self._entries:
+                    self._checked_at[key] = now
+            if published is None or published[0] <= entry.version:
+                PRICE_MODEL_CACHE_REQUESTS.labels(result="hit").inc()
+                return entry
+        elif published is None:
+            PRICE_MODEL_CACHE_REQUESTS.labels(result="none").inc()
+            return None
+
+        version, path = published
+        try:
+            model = load(path)
+            loaded = LoadedModel(version, path, model, size(path, model))
+        except Exception as e:
+            # Keep serving the version we have rather than failing the request
+            logger.error(f"Error loading model {key} v{version} from {path}: {str(e)}")
+            return entry
+
+        with self._lock:
+            self._store(key, loaded)
+            self._checked_at[key] = now
+        PRICE_MODEL_CACHE_REQUESTS.labels(result="reload" if entry is not None else "load").inc()
+        if entry is not None:
+            logger.info(f"Reloaded model {key}: v{entry.version} -> v{version}")
+        return loaded
+
+    def _store(self, key: Hashable, loaded: LoadedModel) -> None:
+        """Insert or replace an entry, then evict down to max_bytes (keeping the new one)."""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.nbytes -= previous.nbytes
+        self._entries[key] = loaded
+        self.nbytes += loaded.nbytes
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self._checked_at.pop(evicted_key, None)
+            self.nbytes -= evicted.nbytes
+            PRICE_MODEL_CACHE_EVICTIONS.inc()
+        PRICE_MODEL_CACHE_BYTES.set(self.nbytes)
+
+    def get_price_model(self, db: Session, product_id: int) -> Optional[LoadedModel]:
+        """Latest published per-product model ({"model", "scaler"}), or None if there is none."""
+        def latest() -> Optional[Tuple[int, str]]:
+            row = db.query(PriceModel.version, PriceModel.artifact_path).filter(
+                PriceModel.product_id == product_id
+            ).order_by(PriceModel.version.desc()).first()
+            return (row.version, row.artifact_path) if row else None
+
+        return self._get(
+            product_id, latest, joblib.load,
+            lambda path, model: max(os.path.getsize(path), forest_nbytes(model["model"]))
+        )
+
+    def get_global_model(self) -> Optional[LoadedModel]:
+        """Latest published GlobalPriceModel, or None if there is none."""
+        # Imported here as the global model builds on api.price_ml, which uses the registry
+        from api.ml.global_price_model import GlobalPriceModel, global_model_path, latest_global_model_version
+
+        def latest() -> Optional[Tuple[int, str]]:
+            version = latest_global_model_version()
+            return (version, global_model_path(version)) if version is not None else None
+
+        return self._get(
+            GLOBAL_MODEL_KEY, latest,
+            lambda path: GlobalPriceModel.load(path, mmap_mode="r"),
+            lambda path, model: os.path.getsize(path)
+        )
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a cached model so the next use loads the latest version."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            self._checked_at.pop(key, None)
+            if entry is not None:
+                self.nbytes -= entry.nbytes
+                PRICE_MODEL_CACHE_BYTES.set(self.nbytes)
+
+    def versions(self) -> Dict[Hashable, int]:
+        """Cached model versions by key, least recently used first."""
+        with self._lock:
+            return {key: entry.version for key, entry in self._entries.items()}
+
+# Create a singleton instance
+model_registry = ModelRegistry()
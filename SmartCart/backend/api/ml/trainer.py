@@ -0,0 +1,161 @@
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from api.database import SessionLocal, engine
+from api.models import Product, Price, PriceModel
+from api.price_ml import PricePredictor, model_path
+
+logger = logging.getLogger(__name__)
+
+def _init_worker() -> None:
+    # Pooled connections inherited from the parent must not be reused here
+    engine.dispose(close=False)
+
+def _train_product(product_id: int, version: int) -> Optional[Dict]:
+    """Train and save one product's model in a worker process; returns its metadata."""
+    db = SessionLocal()
+    try:
+        product = db.query(Product).get(product_id)
+        if product is None:
+            return None
+        data_until = db.query(func.max(Price.timestamp)).filter(Price.product_id == product_id).scalar()
+
+        started = time.perf_counter()
+        predictor = PricePredictor(db)
+        sample_count = predictor.train(product)
+        if not predictor.model:
+            return None
+        path = model_path(product_id, version)
+        predictor.save_model(path)
+        return {
+            "product_id": product_id,
+            "version": version,
+            "artifact_path": path,
+            "data_until": data_until,
+            "sample_count": sample_count,
+            "train_seconds": time.perf_counter() - started,
+            "trained_at": datetime.utcnow()
+        }
+    finally:
+        db.close()
+
+class PriceModelTrainer:
+    """Offline trainer for the per-product price models served by PricePredictionService.
+
+    Each run picks the products that have no model yet, or whose prices
+    changed since their model was trained at least `retrain_after` ago,
+    trains them across a process pool and publishes every model as a new
+    version: the artifact under MODEL_DIR plus a price_models row. Only
+    the newest `keep_versions` versions of a product are kept.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        workers: Optional[int] = None,
+        retrain_after: timedelta = timedelta(hours=24),
+        min_prices: int = 2,
+        keep_versions: int = 3
+    ):
+        self.db = db
+        self.workers = workers or os.cpu_count()
+        self.retrain_after = retrain_after
+        self.min_prices = min_prices
+        self.keep_versions = keep_versions
+
+    def products_to_train(self, limit: Optional[int] = None) -> List[Tuple[int, int]]:
+        """(product_id, next version) for products due for (re)training, oldest model first."""
+        history = (
+            self.db.query(
+                Price.product_id.label("product_id"),
+                # The last price change; last_seen moves on every poll, so
+                # valid_until would make every polled product look changed
+                func.max(Price.timestamp).label("data_until")
+            )
+            .filter(Price.product_id.isnot(None))
+            .group_by(Price.product_id)
+            .having(func.count() >= self.min_prices)
+            .subquery()
+        )
+        models = (
+            self.db.query(
+                PriceModel.product_id.label("product_id"),
+                func.max(PriceModel.version).label("version"),
+                func.max(PriceModel.data_until).label("data_until"),
+                func.max(PriceModel.trained_at).label("trained_at")
+            )
+            .group_by(PriceModel.product_id)
+            .subquery()
+        )
+
+        retrain_before = datetime.utcnow() - self.retrain_after
+        query = (
+            self.db.query(history.c.product_id, func.coalesce(models.c.version, 0) + 1)
+            .outerjoin(models, models.c.product_id == history.c.product_id)
+            .filter(
+                (models.c.product_id.is_(None))
+                | ((history.c.data_until > models.c.data_until) & (models.c.trained_at < retrain_before))
+            )
+            .order_by(models.c.trained_at.asc().nullsfirst(), history.c.product_id)
+        )
+        if limit:
+            query = query.limit(limit)
+        return [(product_id, version) for product_id, version in query]
+
+    def run(self, limit: Optional[int] = None) -> Dict:
+        """Train every product that is due; returns trained, skipped, failed and elapsed_seconds."""
+        started = time.perf_counter()
+        due = self.products_to_train(limit)
+        stats = {"trained": 0, "skipped": 0, "failed": 0}
+        if not due:
+            return {**stats, "elapsed_seconds": 0.0}
+
+        logger.info(f"Training {len(due)} price models with {self.workers} workers")
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as executor:
+            futures = {
+                executor.submit(_train_product, product_id, version): product_id
+                for product_id, version in due
+            }
+            for future in as_completed(futures):
+                try:
+                    metadata = future.result()
+                except Exception as e:
+                    logger.error(f"Error training price model for product {futures[future]}: {str(e)}")
+                    stats["failed"] += 1
+                    continue
+                if metadata is None:
+                    stats["skipped"] += 1
+                    continue
+                self._publish(metadata)
+                stats["trained"] += 1
+
+        stats["elapsed_seconds"] = time.perf_counter() - started
+        logger.info(f"Trained {stats['trained']} price models in {stats['elapsed_seconds']:.1f}s")
+        return stats
+
+    def _publish(self, metadata: Dict) -> None:
+        """Record a newly trained version and drop versions older than `keep_versions`."""
+        self.db.add(PriceModel(**metadata))
+        stale = (
+            self.db.query(PriceModel)
+            .filter(
+                PriceModel.product_id == metadata["product_id"],
+                PriceModel.version <= metadata["version"] - self.keep_versions
+            )
+            .all()
+        )
+        for model in stale:
+            self.db.delete(model)
+        self.db.commit()
+
+        for model in stale:
+            try:
+                os.remove(model.artifact_path)
+            except FileNotFoundError:
+                pass
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Boolean, JSON, Index, Computed, DDL, event, func
+from sqlalchemy.orm import relationship, column_property, deferred
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -30,6 +31,15 @@ class Store(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     prices = relationship("Price", back_populates="store")
+    products = relationship("Product", back_populates="store")
+
+# Weighted full-text document for local product search (see alembic revision 007)
+PRODUCT_SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(brand, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(category, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'D')"
+)
 
 class Product(Base):
     __tablename__ = "products"
@@ -46,11 +56,19 @@ class Product(Base):
     last_price_check = Column(DateTime, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Maintained by Postgres on every insert and update; deferred so it is
+    # only loaded when searched on
+    search_vector = deferred(Column(TSVECTOR, Computed(PRODUCT_SEARCH_DOCUMENT, persisted=True)))
 
     store = relationship("Store", back_populates="products")
     prices = relationship("Price", back_populates="product")
     shopping_list_items = relationship("ShoppingListItem", back_populates="product")
 
+# Full-text and typo-tolerant product search (see alembic revision 007)
+Index("ix_products_search_vector", Product.search_vector, postgresql_using="gin")
+Index("ix_products_name_trgm", Product.name, postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"})
+event.listen(Product.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
 class Price(Base):
     __tablename__ = "prices"
 
@@ -62,10 +80,75 @@ class Price(Base):
     is_sale = Column(Boolean, default=False)
     sale_end_date = Column(DateTime, nullable=True)
     timestamp = Column(DateTime, default=datetime.utcnow)
+    # Prices are stored change-only: a row stands for every identical
+    # observation from `timestamp` until `last_seen` (NULL if seen once)
+    last_seen = Column(DateTime, nullable=True)
+    valid_until = column_property(func.coalesce(last_seen, timestamp))
 
     product = relationship("Product", back_populates="prices")
     store = relationship("Store", back_populates="prices")
 
+# Time-series access paths for price history (see alembic revision 003)
+Index("ix_prices_product_id_timestamp", Price.product_id, Price.timestamp.desc())
+Index("ix_prices_store_id_product_id_timestamp", Price.store_id, Price.product_id, Price.timestamp.desc())
+Index("ix_prices_timestamp_brin", Price.timestamp, postgresql_using="brin")
+
+class LatestPrice(Base):
+    """Current price per (product, store), maintained alongside ``prices``."""
+    __tablename__ = "latest_prices"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    store_id = Column(Integer, ForeignKey("stores.id"), primary_key=True)
+    price = Column(Float)
+    currency = Column(String, default="USD")
+    is_sale = Column(Boolean, default=False)
+    sale_end_date = Column(DateTime, nullable=True)
+    timestamp = Column(DateTime, default=datetime.utcnow)
+    # Running aggregates, counting each stored price once per day it was valid
+    min_price = Column(Float)
+    max_price = Column(Float)
+    price_total = Column(Float, default=0)
+    observation_count = Column(Integer, default=0)
+
+    product = relationship("Product")
+    store = relationship("Store")
+
+class PriceDailyRollup(Base):
+    """Per product, store and day aggregates of price observations."""
+    __tablename__ = "price_daily_rollups"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    store_id = Column(Integer, ForeignKey("stores.id"), primary_key=True)
+    day = Column(Date, primary_key=True, index=True)
+    min_price = Column(Float)
+    max_price = Column(Float)
+    price_total = Column(Float, default=0)
+    observation_count = Column(Integer, default=0)
+    sale_count = Column(Integer, default=0)
+    last_price = Column(Float)
+    last_timestamp = Column(DateTime)
+
+    product = relationship("Product")
+    store = relationship("Store")
+
+class PriceModel(Base):
+    """A trained per-product price model artifact and how it was trained."""
+    __tablename__ = "price_models"
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    version = Column(Integer, nullable=False)
+    artifact_path = Column(String, nullable=False)
+    # Last price change the model saw; a newer change makes it due for retraining
+    data_until = Column(DateTime)
+    sample_count = Column(Integer)
+    train_seconds = Column(Float)
+    trained_at = Column(DateTime, default=datetime.utcnow)
+
+    product = relationship("Product")
+
+Index("ix_price_models_product_id_version", PriceModel.product_id, PriceModel.version.desc(), unique=True)
+
 class ShoppingList(Base):
     __tablename__ = "shopping_lists"
 
@@ -1,3 +1,4 @@
+import os
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
@@ -6,14 +7,24 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 import joblib
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 
 from api.models import Product, Price, Store
+from api.ml.holidays import holiday_calendar
+from api.ml.model_registry import model_registry
+
+# Where the batch trainer publishes model artifacts
+MODEL_DIR = os.getenv("PRICE_MODEL_DIR", "models")
+
+def model_path(product_id: int, version: int) -> str:
+    """Artifact path for one version of a product's model."""
+    return os.path.join(MODEL_DIR, "price_predictor", str(product_id), f"v{version}.joblib")
 
 class PricePredictor:
     def __init__(self, db: Session):
         self.db = db
         self.model = None
+        self.version = None
         self.scaler = StandardScaler()
         self.feature_columns = [
             'day_of_week',
@@ -25,88 +36,103 @@ class PricePredictor:
             'store_price_diff'
         ]
 
-    def _prepare_features(self, product: Product, days: int = 30) -> pd.DataFrame:
-        """Prepare features for price prediction."""
-        # Get historical prices
-        prices = self.db.query(Price).filter(
-            Price.product_id == product.id
-        ).order_by(Price.timestamp).all()
+    def _load_price_history(self, product: Product) -> pd.DataFrame:
+        """Load a product's prices as one observation per store per day.
+
+        Price rows are change-only, so each row is expanded into one
+        observation per calendar day from its `timestamp` through
+        `valid_until`, as PriceProjectionService counts them: at its
+        timestamp on the first day, at midnight after that. Columns are
+        read straight into arrays, without hydrating Price objects.
+        """
+        result = self.db.connection().execute(
+            select(
+                Price.timestamp,
+                Price.valid_until.label('valid_until'),
+                Price.price,
+                Price.store_id,
+                Price.is_sale
+            )
+            .where(Price.product_id == product.id)
+            .order_by(Price.timestamp)
+        )
+        columns = list(result.keys())
+        rows = result.fetchall()
 
-        if not prices:
+        if not rows:
             return pd.DataFrame()
 
-        # Convert to DataFrame
-        df = pd.DataFrame([{
-            'timestamp': p.timestamp,
-            'price': p.price,
-            'store_id': p.store_id,
-            'is_sale': p.is_sale
-        } for p in prices])
+        df = pd.DataFrame(dict(zip(columns, zip(*rows))))
+
+        # Repeat each row once per calendar day it held, moving the
+        # repeats to midnight of their day
+        first_day = df['timestamp'].dt.normalize()
+        span_days = (df['valid_until'].dt.normalize() - first_day).dt.days.clip(lower=0).to_numpy() + 1
+        starts = np.cumsum(span_days) - span_days
+        offsets = np.arange(span_days.sum()) - np.repeat(starts, span_days)
+        rows = np.repeat(np.arange(len(df)), span_days)
+        df = df.iloc[rows]
+        df['timestamp'] = df['timestamp'].where(
+            offsets == 0,
+            first_day.iloc[rows] + pd.to_timedelta(offsets, unit='D')
+        )
+        return (
+            df.drop(columns='valid_until')
+            .sort_values('timestamp', kind='stable')
+            .reset_index(drop=True)
+        )
 
-        # Add time-based features
-        df['day_of_week'] = df['timestamp'].dt.dayofweek
-        df['month'] = df['timestamp'].dt.month
-        df['is_holiday'] = self._is_holiday(df['timestamp'])
-        df['days_until_holiday'] = self._days_until_holiday(df['timestamp'])
+    def _features(self, history: pd.DataFrame) -> pd.DataFrame:
+        """Feature rows for an expanded price history, aligned with its rows."""
+        df = pd.DataFrame(index=history.index)
 
-        # Add price-based features
-        df['price_trend'] = df['price'].rolling(window=7).mean()
-        df['price_volatility'] = df['price'].rolling(window=7).std()
+        # Add time-based features
+        df['day_of_week'] = history['timestamp'].dt.dayofweek
+        df['month'] = history['timestamp'].dt.month
+        df['is_holiday'] = self._is_holiday(history['timestamp'])
+        df['days_until_holiday'] = self._days_until_holiday(history['timestamp'])
+
+        # Add price-based features over each store's own series, in
+        # calendar-day windows like the global model's state features.
+        # Groups come out in row order once the rows are sorted by store
+        by_store = history.sort_values(['store_id', 'timestamp'], kind='stable')
+        windows = by_store.groupby('store_id', sort=False, dropna=False).rolling('7D', on='timestamp')['price']
+        df.loc[by_store.index, 'price_trend'] = windows.mean().to_numpy()
+        df.loc[by_store.index, 'price_volatility'] = np.nan_to_num(windows.std().to_numpy())
 
         # Add store price difference
-        store_prices = df.groupby('store_id')['price'].mean()
-        df['store_price_diff'] = df.apply(
-            lambda x: x['price'] - store_prices[x['store_id']],
-            axis=1
-        )
+        store_means = history.groupby('store_id', sort=False, dropna=False)['price'].transform('mean')
+        df['store_price_diff'] = history['price'] - store_means
 
         return df[self.feature_columns]
 
+    def _prepare_features(self, product: Product, days: int = 30) -> pd.DataFrame:
+        """Prepare features for price prediction."""
+        df = self._load_price_history(product)
+        if df.empty:
+            return df
+        return self._features(df)
+
     def _is_holiday(self, dates: pd.Series) -> pd.Series:
         """Check if dates are holidays."""
-        # Add major US holidays
-        holidays = [
-            '2024-01-01',  # New Year's Day
-            '2024-01-15',  # Martin Luther King Jr. Day
-            '2024-02-19',  # Presidents' Day
-            '2024-05-27',  # Memorial Day
-            '2024-07-04',  # Independence Day
-            '2024-09-02',  # Labor Day
-            '2024-10-14',  # Columbus Day
-            '2024-11-11',  # Veterans Day
-            '2024-11-28',  # Thanksgiving Day
-            '2024-12-25',  # Christmas Day
-        ]
-        return dates.dt.date.astype(str).isin(holidays)
+        return pd.Series(holiday_calendar.is_holiday(dates), index=dates.index)
 
     def _days_until_holiday(self, dates: pd.Series) -> pd.Series:
         """Calculate days until next holiday."""
-        holidays = pd.to_datetime([
-            '2024-01-01', '2024-01-15', '2024-02-19', '2024-05-27',
-            '2024-07-04', '2024-09-02', '2024-10-14', '2024-11-11',
-            '2024-11-28', '2024-12-25'
-        ])
-        
-        def days_to_next(date):
-            next_holiday = holidays[holidays > date].min()
-            if pd.isna(next_holiday):
-                return 365  # Default to 1 year if no next holiday
-            return (next_holiday - date).days
-
-        return dates.apply(days_to_next)
-
-    def train(self, product: Product) -> None:
-        """Train the price prediction model for a product."""
-        # Prepare features
-        df = self._prepare_features(product)
-        if df.empty:
-            return
+        return pd.Series(holiday_calendar.days_until_holiday(dates), index=dates.index)
 
-        # Get target prices
-        prices = self.db.query(Price).filter(
-            Price.product_id == product.id
-        ).order_by(Price.timestamp).all()
-        y = np.array([p.price for p in prices])
+    def train(self, product: Product) -> int:
+        """Train the price prediction model for a product.
+
+        Returns the number of training samples (0 if there is no history).
+        """
+        history = self._load_price_history(product)
+        if history.empty:
+            return 0
+
+        # Prepare features, row-aligned with the target prices
+        df = self._features(history)
+        y = history['price'].to_numpy()
 
         # Scale features
         X = self.scaler.fit_transform(df)
@@ -118,17 +144,15 @@ class PricePredictor:
             random_state=42
         )
         self.model.fit(X, y)
+        return len(y)
 
     def predict(self, product: Product, days: int = 30) -> List[Dict]:
-        """Predict prices for the next n days."""
-        if not self.model:
-            self.train(product)
-
+        """Predict prices for the next n days with the loaded model."""
         if not self.model:
             return []
 
         # Generate future dates
-        last_date = self.db.query(func.max(Price.timestamp)).filter(
+        last_date = self.db.query(func.max(Price.valid_until)).filter(
             Price.product_id == product.id
         ).scalar()
         if not last_date:
@@ -178,59 +202,78 @@ class PricePredictor:
 
         return results
 
-    def save_model(self, product_id: int) -> None:
-        """Save the trained model to disk."""
+    def save_model(self, path: str) -> None:
+        """Save the trained model to `path`, replacing it atomically."""
         if self.model:
-            model_path = f"models/price_predictor_{product_id}.joblib"
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
             joblib.dump({
                 'model': self.model,
                 'scaler': self.scaler
-            }, model_path)
+            }, tmp_path)
+            os.replace(tmp_path, path)
 
     def load_model(self, product_id: int) -> None:
-        """Load a trained model from disk."""
-        model_path = f"models/price_predictor_{product_id}.joblib"
-        try:
-            saved_model = joblib.load(model_path)
-            self.model = saved_model['model']
-            self.scaler = saved_model['scaler']
-        except:
+        """Load the latest model the batch trainer published for a product."""
+        loaded = model_registry.get_price_model(self.db, product_id)
+        if loaded is None:
             self.model = None
+            self.version = None
             self.scaler = StandardScaler()
+            return
+        self.model = loaded.model['model']
+        self.scaler = loaded.model['scaler']
+        self.version = loaded.version
 
 class PricePredictionService:
     def __init__(self, db: Session):
         self.db = db
-        self.predictors = {}
 
     def get_predictor(self, product_id: int) -> PricePredictor:
-        """Get or create a price predictor for a product."""
-        if product_id not in self.predictors:
-            product = self.db.query(Product).get(product_id)
-            if not product:
-                raise ValueError(f"Product {product_id} not found")
-            
-            predictor = PricePredictor(self.db)
-            predictor.load_model(product_id)
-            self.predictors[product_id] = predictor
-        
-        return self.predictors[product_id]
+        """Get a price predictor for a product, backed by the shared model registry."""
+        product = self.db.query(Product).get(product_id)
+        if not product:
+            raise ValueError(f"Product {product_id} not found")
+
+        predictor = PricePredictor(self.db)
+        predictor.load_model(product_id)
+        return predictor
 
     async def predict_prices(self, product_id: int, days: int = 30) -> List[Dict]:
-        """Predict prices for a product."""
+        """Predict prices for a product.
+
+        Only uses models published by the batch trainer
+        (scripts/train_price_models.py); products without one get no
+        predictions rather than being trained on the request path.
+        """
         predictor = self.get_predictor(product_id)
         product = self.db.query(Product).get(product_id)
-        
-        if not predictor.model:
-            predictor.train(product)
-            predictor.save_model(product_id)
-        
         return predictor.predict(product, days)
 
+    async def predict_many(self, product_ids: List[int], days: int = 30) -> Dict[int, List[Dict]]:
+        """Predict prices for many products at once, keyed by product id.
+
+        The latest global model covers every product with recent prices in
+        one pass, with per-store daily predictions. Products it leaves out
+        (or all of them, before a global model is published) fall back to
+        their per-product model. Products with neither are left out.
+        """
+        predictions: Dict[int, List[Dict]] = {}
+        loaded = model_registry.get_global_model()
+        if loaded is not None:
+            predictions = loaded.model.predict_many(self.db, product_ids, days)
+
+        missing = [product_id for product_id in product_ids if product_id not in predictions]
+        if missing:
+            for product in self.db.query(Product).filter(Product.id.in_(missing)).all():
+                predictor = PricePredictor(self.db)
+                predictor.load_model(product.id)
+                forecast = predictor.predict(product, days)
+                if forecast:
+                    predictions[product.id] = forecast
+        return predictions
+
     async def update_predictions(self, product_id: int) -> None:
-        """Update price predictions for a product."""
-        predictor = self.get_predictor(product_id)
-        product = self.db.query(Product).get(product_id)
-        
-        predictor.train(product)
- 
\ No newline at end of file
+        """Reload the latest published model for a product."""
+        model_registry.invalidate(product_id)
+        self.get_predictor(product_id)
@@ -0,0 +1,190 @@
+import time
+import random
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Dict, Optional
+import aiohttp
+
+from api.http_client import http_client
+from api.metrics import (
+    RETAILER_REQUESTS_THROTTLED,
+    RETAILER_REQUESTS_RETRIED,
+    RETAILER_RETRY_BUDGET_EXHAUSTED,
+    RETAILER_RATE_LIMIT_WAIT_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying; 429 and 503 usually carry Retry-After
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+DEFAULT_RATE_LIMIT = {
+    "requests_per_second": 10.0,
+    "burst": 10,
+    "max_retries": 3,
+    "backoff_base": 0.5,
+    # Also caps how long a Retry-After header can hold requests back
+    "backoff_max": 30.0,
+    # Retries earned per request sent, banked up to the reserve
+    "retry_budget_ratio": 0.2,
+    "retry_budget_reserve": 10
+}
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+class TokenBucket:
+    """Token bucket that hands out waits instead of blocking on a lock.
+
+    Each request takes a token, letting the balance go negative; the
+    deficit tells the caller how long to sleep, so waiters are served in
+    arrival order without any event-loop-bound primitives.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self) -> float:
+        """Take a token; returns how many seconds to wait before sending."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return max(-self.tokens / self.rate, self.blocked_until - now, 0.0)
+
+    def block(self, seconds: float) -> None:
+        """Hold every request back for `seconds`, e.g. after a 429 with Retry-After."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+class RetryBudget:
+    """Caps retries to a fraction of traffic so an outage can't multiply load."""
+
+    def __init__(self, ratio: float, reserve: int):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.balance = float(reserve)
+
+    def deposit(self) -> None:
+        self.balance = min(self.balance + self.ratio, float(self.reserve))
+
+    def withdraw(self) -> bool:
+        if self.balance < 1:
+            return False
+        self.balance -= 1
+        return True
+
+class RateLimiter:
+    """Per-retailer request gate: token bucket, retries with backoff, retry budget.
+
+    Settings are DEFAULT_RATE_LIMIT overridden by the retailer adapter's
+    "rate_limit" and then by the store's api_config["rate_limit"].
+    """
+
+    def __init__(self, name: str, config: Dict):
+        self.name = name
+        self.config = {**DEFAULT_RATE_LIMIT, **config}
+        self.bucket = TokenBucket(self.config["requests_per_second"], self.config["burst"])
+        self.budget = RetryBudget(self.config["retry_budget_ratio"], self.config["retry_budget_reserve"])
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        ceiling = min(self.config["backoff_max"], self.config["backoff_base"] * 2 ** attempt)
+        return random.uniform(0, ceiling)
+
+    def _may_retry(self, attempt: int) -> bool:
+        if attempt >= self.config["max_retries"]:
+            return False
+        if not self.budget.withdraw():
+            RETAILER_RETRY_BUDGET_EXHAUSTED.labels(self.name).inc()
+            return False
+        return True
+
+    async def _wait_for_token(self) -> None:
+        wait = self.bucket.reserve()
+        if wait > 0:
+            RETAILER_REQUESTS_THROTTLED.labels(self.name, "local").inc()
+            RETAILER_RATE_LIMIT_WAIT_SECONDS.labels(self.name).observe(wait)
+            await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, **kwargs) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Send a request through the shared session, retrying transient failures.
+
+        Yields the final response, which may still be an error status once
+        retries or the retry budget run out.
+        """
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            await self._wait_for_token()
+            try:
+                response = await http_client.session.request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if not self._may_retry(attempt):
+                    raise
+                delay = self._backoff(attempt)
+                reason = type(e).__name__
+            else:
+                if response.status not in RETRY_STATUSES or not self._may_retry(attempt):
+                    try:
+                        yield response
+                    finally:
+                        response.release()
+                    return
+
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                response.release()
+                if retry_after is not None and retry_after > self.config["backoff_max"]:
+                    # Don't let a far-off (or bogus) Retry-After stall the retailer
+                    logger.warning(
+                        f"{self.name} asked to retry after {retry_after:.0f}s; "
+                        f"capping at {self.config['backoff_max']:.0f}s"
+                    )
+                    retry_after = self.config["backoff_max"]
+                if response.status == 429:
+                    RETAILER_REQUESTS_THROTTLED.labels(self.name, "remote").inc()
+                if retry_after is not None:
+                    # The retailer told us when to come back; hold everyone off
+                    self.bucket.block(retry_after)
+                delay = retry_after if retry_after is not None else self._backoff(attempt)
+                reason = str(response.status)
+
+            RETAILER_REQUESTS_RETRIED.labels(self.name, reason).inc()
+            logger.info(f"Retrying {self.name} request in {delay:.1f}s after {reason}")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+class RateLimiterRegistry:
+    """Process-wide rate limiters keyed by retailer name."""
+
+    def __init__(self):
+        self._limiters: Dict[str, RateLimiter] = {}
+
+    def get(self, name: str, config: Optional[Dict] = None) -> RateLimiter:
+        """The retailer's limiter, rebuilt if its settings changed."""
+        config = config or {}
+        limiter = self._limiters.get(name)
+        if limiter is None or limiter.config != {**DEFAULT_RATE_LIMIT, **config}:
+            limiter = self._limiters[name] = RateLimiter(name, config)
+        return limiter
+
+# Create a singleton instance
+rate_limiters = RateLimiterRegistry()
@@ -0,0 +1,101 @@
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from api.metrics import STORE_CIRCUIT_STATE, STORE_REQUESTS_HEDGED
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_CIRCUIT_BREAKER = {
+    # Consecutive failures (errors or missed deadlines) that open the circuit
+    "failure_threshold": 5,
+    # Seconds an open circuit waits before letting a trial call through
+    "reset_timeout": 30.0
+}
+
+class CircuitBreaker:
+    """Stops calling a store that keeps failing until it has had time to recover.
+
+    Closed: calls go through and failures are counted. Open: calls are
+    refused for `reset_timeout` seconds. Half-open: a single trial call is
+    let through, and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, name: str, config: Dict):
+        self.name = name
+        self.config = {**DEFAULT_CIRCUIT_BREAKER, **config}
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._set_state(self.CLOSED)
+
+    def _set_state(self, state: int) -> None:
+        if state != self.state:
+            logger.info(f"Circuit for {self.name} is now {('closed', 'half-open', 'open')[state]}")
+        self.state = state
+        STORE_CIRCUIT_STATE.labels(self.name).set(state)
+
+    def allow(self) -> bool:
+        """Whether a call may be made now."""
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.config["reset_timeout"]:
+            self._set_state(self.HALF_OPEN)
+            return True
+        return self.state == self.CLOSED
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.config["failure_threshold"]:
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+class CircuitBreakerRegistry:
+    """Process-wide circuit breakers keyed by store name."""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str, config: Optional[Dict] = None) -> CircuitBreaker:
+        """The store's breaker, rebuilt if its settings changed."""
+        config = config or {}
+        breaker = self._breakers.get(name)
+        if breaker is None or breaker.config != {**DEFAULT_CIRCUIT_BREAKER, **config}:
+            breaker = self._breakers[name] = CircuitBreaker(name, config)
+        return breaker
+
+async def hedged(call: Callable[[], Awaitable[T]], hedge_after: Optional[float] = None, name: str = "") -> T:
+    """Await `call()`, starting a second attempt if the first is still running after `hedge_after` seconds.
+
+    The first attempt to succeed wins and the other is cancelled; only use
+    this for idempotent reads. Without `hedge_after` it is a plain await.
+    """
+    attempts = {asyncio.ensure_future(call())}
+    try:
+        if hedge_after:
+            done, _ = await asyncio.wait(attempts, timeout=hedge_after)
+            if not done:
+                STORE_REQUESTS_HEDGED.labels(name).inc()
+                attempts.add(asyncio.ensure_future(call()))
+
+        error: Optional[BaseException] = None
+        while attempts:
+            done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    return attempt.result()
+                error = attempt.exception()
+        raise error
+    finally:
+        for attempt in attempts:
+            attempt.cancel()
+
+# Create a singleton instance
+circuit_breakers = CircuitBreakerRegistry()
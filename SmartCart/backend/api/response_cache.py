@@ -0,0 +1,110 @@
+import json
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+from urllib.parse import urlencode
+from sqlalchemy.orm import Session
+
+from api.cache import Cache, cache, set_on_commit
+from api.metrics import RETAILER_RESPONSES_UNCHANGED
+from api.rate_limit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+class Validators(NamedTuple):
+    """What to remember about a response for the next conditional poll of its URL."""
+    key: str
+    entry: Dict
+    ttl: int
+
+class CachedResponse(NamedTuple):
+    """A fetched response; `unchanged` means it matches what the last poll saw.
+
+    `body` is None for a 304 Not Modified. `validators` are not stored
+    yet: pass them to ResponseCache.remember once the prices read from
+    the response are written.
+    """
+    status: int
+    body: Optional[bytes]
+    unchanged: bool
+    charset: Optional[str] = None
+    validators: Optional[Validators] = None
+
+    def text(self) -> str:
+        return self.body.decode(self.charset or "utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+class ResponseCache:
+    """Per-URL validators for conditional polling of retailers.
+
+    Remembers each URL's ETag, Last-Modified and a SHA-256 of its last
+    body in the shared cache (Redis in docker-compose), sends
+    If-None-Match / If-Modified-Since on the next request and flags the
+    response as unchanged on a 304 or an identical body, so callers can
+    skip parsing and ingesting it. Only the validators are stored, never
+    the body, and only once the caller's transaction commits: validators
+    saved for prices that never got written would make the next poll
+    look unchanged and the new price would be lost.
+    """
+
+    def __init__(self, store: Cache = cache, prefix: str = "http:"):
+        self.store = store
+        self.prefix = prefix
+
+    def _key(self, url: str, params: Optional[Dict] = None) -> str:
+        if params:
+            url = f"{url}?{urlencode(sorted(params.items()))}"
+        return self.prefix + hashlib.sha256(url.encode()).hexdigest()
+
+    async def fetch(
+        self,
+        limiter: RateLimiter,
+        url: str,
+        headers: Optional[Dict] = None,
+        params: Optional[Dict] = None,
+        ttl: int = 86400
+    ) -> CachedResponse:
+        """GET `url` through the retailer's limiter, conditionally if we've seen it before.
+
+        Validators are kept for `ttl` seconds after the last remembered
+        poll; a `ttl` of 0 sends a plain request and returns no validators.
+        """
+        key = self._key(url, params)
+        entry = self.store.get_json(key) if ttl > 0 else None
+        request_headers = dict(headers or {})
+        if entry:
+            if entry.get("etag"):
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        async with limiter.request("GET", url, headers=request_headers, params=params) as response:
+            if response.status == 304 and entry:
+                RETAILER_RESPONSES_UNCHANGED.labels(limiter.name, "not_modified").inc()
+                return CachedResponse(304, None, True, validators=Validators(key, entry, ttl))
+            body = await response.read()
+            result = CachedResponse(response.status, body, False, response.charset)
+            if response.status != 200 or ttl <= 0:
+                return result
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+        body_hash = hashlib.sha256(body).hexdigest()
+        result = result._replace(validators=Validators(
+            key, {"etag": etag, "last_modified": last_modified, "body_hash": body_hash}, ttl
+        ))
+        if entry and entry.get("body_hash") == body_hash:
+            RETAILER_RESPONSES_UNCHANGED.labels(limiter.name, "same_body").inc()
+            return result._replace(unchanged=True)
+        return result
+
+    def remember(self, session: Session, validators: Iterable[Optional[Validators]]) -> None:
+        """Store validators from fetch() once `session` commits the prices read from those responses."""
+        for item in validators:
+            if item is not None:
+                set_on_commit(session, item.key, item.entry, item.ttl, self.store)
+
+# Create a singleton instance
+response_cache = ResponseCache()
@@ -0,0 +1,139 @@
+import os
+import json
+import logging
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote, quote_plus
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "retailers.json")
+
+def get_path(data: Any, path: str, default: Any = None) -> Any:
+    """Look up a dotted path such as "price.amount" in nested dicts."""
+    for key in path.split("."):
+        if not isinstance(data, dict) or data.get(key) is None:
+            return default
+        data = data[key]
+    return data
+
+def map_fields(data: Dict, fields: Dict[str, Any]) -> Dict:
+    """Build a dict from `data` following a field mapping.
+
+    A mapping value is either a dotted path or a dict with "path" (plus an
+    optional "default", or "exists" to map to whether the path is set) or
+    a constant "value".
+    """
+    result = {}
+    for name, spec in fields.items():
+        if isinstance(spec, str):
+            result[name] = get_path(data, spec)
+        elif "value" in spec:
+            result[name] = spec["value"]
+        elif spec.get("exists"):
+            result[name] = get_path(data, spec["path"]) is not None
+        else:
+            result[name] = get_path(data, spec["path"], spec.get("default"))
+    return result
+
+class RetailerAdapter:
+    """One retailer as described in retailers.json.
+
+    "api" retailers are queried through their JSON endpoints (paths are
+    relative to the store's api_config base_url); "scrape" retailers have
+    their search pages fetched and parsed with CSS selectors. Both carry
+    their own concurrency, rate limit and cache settings.
+    """
+
+    REQUIRED = {
+        "api": ("endpoints", "product_fields", "price_fields"),
+        "scrape": ("url_template", "item_selector", "price_selector")
+    }
+
+    def __init__(self, name: str, config: Dict):
+        kind = config.get("kind")
+        if kind not in self.REQUIRED:
+            raise ValueError(f"Retailer {name}: unknown kind {kind!r}")
+        missing = [key for key in self.REQUIRED[kind] if key not in config]
+        if missing:
+            raise ValueError(f"Retailer {name}: missing {', '.join(missing)}")
+
+        self.name = name
+        self.kind = kind
+        self.config = config
+        self.concurrency = config.get("concurrency", 5)
+        self.rate_limit = config.get("rate_limit", {})
+        self.cache_ttl = config.get("cache", {}).get("ttl_seconds", 0)
+        # How long ETag/Last-Modified/body hashes are kept for conditional polling
+        self.validators_ttl = config.get("cache", {}).get("validators_ttl_seconds", 86400)
+
+    def endpoint(self, name: str) -> Optional[Dict]:
+        """Settings for one of the "search", "price" or "prices" endpoints, if offered."""
+        return self.config.get("endpoints", {}).get(name)
+
+    def parse_product(self, item: Dict) -> Dict:
+        """Map a catalog search result to our product fields, including its price."""
+        product = map_fields(item, self.config["product_fields"])
+        product.update(self.parse_price(item))
+        return product
+
+    def parse_price(self, data: Dict) -> Dict:
+        """Map a price payload to price, currency, is_sale and sale_end_date."""
+        return map_fields(data, self.config["price_fields"])
+
+    def search_urls(self, query: str) -> List[str]:
+        """Search result page URLs for `query`, one per page to fetch."""
+        encode = quote_plus if self.config.get("query_encoding") == "plus" else quote
+        pagination = self.config.get("pagination", {"start": 1, "pages": 1})
+        return [
+            self.config["url_template"].format(query=encode(query), page=page)
+            for page in range(pagination["start"], pagination["start"] + pagination["pages"])
+        ]
+
+    @property
+    def item_selector(self) -> str:
+        return self.config["item_selector"]
+
+    @property
+    def price_selector(self) -> str:
+        return self.config["price_selector"]
+
+    @property
+    def price_format(self) -> Dict:
+        return self.config.get("price_format", {})
+
+class RetailerRegistry:
+    """Retailer adapters keyed by store name, loaded once from RETAILERS_CONFIG."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._adapters: Optional[Dict[str, RetailerAdapter]] = None
+
+    def load(self, path: Optional[str] = None) -> Dict[str, RetailerAdapter]:
+        """(Re)load the adapters; raises ValueError on an invalid config."""
+        path = path or self.path or os.getenv("RETAILERS_CONFIG", DEFAULT_CONFIG_PATH)
+        with open(path) as f:
+            config = json.load(f)
+        self._adapters = {name: RetailerAdapter(name, spec) for name, spec in config.items()}
+        logger.info(f"Loaded {len(self._adapters)} retailer adapters from {path}")
+        return self._adapters
+
+    @property
+    def adapters(self) -> Dict[str, RetailerAdapter]:
+        if self._adapters is None:
+            self.load()
+        return self._adapters
+
+    def get(self, name: str) -> Optional[RetailerAdapter]:
+        return self.adapters.get(name)
+
+    def scraped(self) -> List[RetailerAdapter]:
+        """Adapters for retailers whose prices are scraped from search pages."""
+        return [adapter for adapter in self.adapters.values() if adapter.kind == "scrape"]
+
+# Create a singleton instance
+retailer_registry = RetailerRegistry()
+
+# Function to load the retailer adapters
+def load_retailers():
+    """Load the retailer adapters."""
+    retailer_registry.load()
@@ -6,6 +6,7 @@ from api.database import get_db
 from api.services.analytics import AnalyticsService
 from api.auth import get_current_user
 from api.models import User
+from api.schemas.price_comparison import PriceResolution
 
 router = APIRouter(
     prefix="/analytics",
@@ -26,12 +27,13 @@ async def get_savings(
 async def get_product_trends(
     product_id: int,
     days: int = 30,
+    resolution: PriceResolution = PriceResolution.raw,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ) -> Dict:
     """Get price trends for a specific product."""
     analytics_service = AnalyticsService(db)
-    return analytics_service.get_price_trends(product_id, days)
+    return analytics_service.get_price_trends(product_id, days, resolution.value)
 
 @router.get("/insights")
 async def get_user_insights(
@@ -1,22 +1,49 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 
 from ..database import get_db
 from ..services.price_comparison import PriceComparisonService
+from ..services.store_search import StoreSearchService
+from ..services.product_search import ProductSearchService
+from ..price_ml import PricePredictionService
 from ..models import Product, Price, Store
 from ..schemas.price_comparison import (
     PriceResponse,
     PriceHistoryResponse,
     PricePredictionResponse,
+    PriceForecastResponse,
     DealResponse,
     PriceComparisonResponse,
-    PriceAlertResponse
+    PriceAlertResponse,
+    PriceResolution,
+    StoreSearchResponse,
+    ProductSearchResponse
 )
 
 router = APIRouter(prefix="/products", tags=["price-comparison"])
 
+@router.get("/search", response_model=List[ProductSearchResponse])
+async def search_products(
+    q: str = Query(..., min_length=1),
+    category: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Search the local catalog with ranked, prefix and typo-tolerant matching."""
+    service = ProductSearchService(db)
+    return service.search(q, limit, category)
+
+@router.get("/search/stores", response_model=StoreSearchResponse)
+async def search_stores(
+    q: str = Query(..., min_length=1),
+    db: Session = Depends(get_db)
+):
+    """Search every store's catalog, serving repeat queries from cache."""
+    service = StoreSearchService(db)
+    return await service.search(q)
+
 @router.get("/{product_id}/prices", response_model=List[PriceResponse])
 async def get_product_prices(
     product_id: int,
@@ -30,11 +57,12 @@ async def get_product_prices(
 async def get_price_history(
     product_id: int,
     days: int = Query(30, ge=1, le=365),
+    resolution: PriceResolution = PriceResolution.raw,
     db: Session = Depends(get_db)
 ):
     """Get price history for a product."""
     service = PriceComparisonService(db)
-    return service.get_price_history(product_id, days)
+    return service.get_price_history(product_id, days, resolution.value)
 
 @router.get("/{product_id}/price-predictions", response_model=List[PricePredictionResponse])
 async def get_price_predictions(
@@ -46,6 +74,16 @@ async def get_price_predictions(
     service = PriceComparisonService(db)
     return service.predict_future_prices(product_id, days_ahead)
 
+@router.post("/price-predictions", response_model=Dict[int, List[PriceForecastResponse]])
+async def get_batch_price_predictions(
+    product_ids: List[int],
+    days_ahead: int = Query(7, ge=1, le=30),
+    db: Session = Depends(get_db)
+):
+    """Forecast daily prices for several products with the trained price models."""
+    service = PricePredictionService(db)
+    return await service.predict_many(product_ids, days_ahead)
+
 @router.get("/deals/best", response_model=List[DealResponse])
 async def get_best_deals(
     category: Optional[str] = None,
@@ -1,6 +1,13 @@
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 from datetime import datetime
+from enum import Enum
+
+class PriceResolution(str, Enum):
+    raw = "raw"
+    hour = "hour"
+    day = "day"
+    week = "week"
 
 class PriceResponse(BaseModel):
     store_name: str
@@ -15,12 +22,26 @@ class PriceHistoryResponse(BaseModel):
     price: float
     timestamp: datetime
     is_sale: bool = False
+    # Only set for raw resolution: the price held from timestamp until last_seen
+    last_seen: Optional[datetime] = None
+    # Only set for aggregated (non-raw) resolutions
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    observation_count: Optional[int] = None
 
 class PricePredictionResponse(BaseModel):
     days_ahead: int
     predicted_price: float
     confidence: float = Field(ge=0.0, le=1.0)
 
+class PriceForecastResponse(BaseModel):
+    date: str
+    predicted_price: float
+    # Set by the global model, which predicts every store separately
+    store_id: Optional[int] = None
+    # Set by per-product models
+    confidence: Optional[float] = None
+
 class DealResponse(BaseModel):
     product_id: int
     product_name: str
@@ -44,4 +65,38 @@ class PriceAlertResponse(BaseModel):
     store_name: str
     current_price: float
     target_price: float
-    savings: float 
\ No newline at end of file
+    savings: float
+
+class StoreProductResponse(BaseModel):
+    product_id: Optional[int] = None
+    store_id: int
+    store_name: str
+    store_product_id: Optional[str] = None
+    name: Optional[str] = None
+    brand: Optional[str] = None
+    category: Optional[str] = None
+    description: Optional[str] = None
+    image_url: Optional[str] = None
+    barcode: Optional[str] = None
+    price: Optional[float] = None
+    currency: Optional[str] = None
+    is_sale: bool = False
+    sale_end_date: Optional[datetime] = None
+
+class StoreSearchResponse(BaseModel):
+    products: List[StoreProductResponse]
+    # Stores missing from the results, and why
+    failed: List[str] = []
+    timed_out: List[str] = []
+    unavailable: List[str] = []
+    cached: bool = False
+
+class ProductSearchResponse(BaseModel):
+    id: int
+    name: Optional[str] = None
+    brand: Optional[str] = None
+    category: Optional[str] = None
+    image_url: Optional[str] = None
+    score: float
+    # "full_text" for ranked term matches, "fuzzy" for typo-tolerant name matches
+    match: str
@@ -1,9 +1,41 @@
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
-from sqlalchemy import func, and_
-from sqlalchemy.orm import Session
-
-from api.models import User, Product, Price, ShoppingList, ShoppingListItem, PriceAlert
+from sqlalchemy import event, func, select, and_
+from sqlalchemy.orm import Session, object_session
+
+from api.cache import cache, invalidate_on_commit
+from api.models import User, Product, Price, Store, LatestPrice, PriceDailyRollup, ShoppingList, ShoppingListItem, PriceAlert
+from api.services.price_projections import PriceProjectionService
+
+# Insights are cached per user until one of their lists, items or alerts changes
+INSIGHTS_CACHE_TTL = 3600
+
+def insights_cache_key(user_id: int) -> str:
+    return f"insights:{user_id}"
+
+@event.listens_for(ShoppingList, "after_insert")
+@event.listens_for(ShoppingList, "after_update")
+@event.listens_for(ShoppingList, "after_delete")
+@event.listens_for(PriceAlert, "after_insert")
+@event.listens_for(PriceAlert, "after_update")
+@event.listens_for(PriceAlert, "after_delete")
+def _invalidate_owner_insights(mapper, connection, target) -> None:
+    session = object_session(target)
+    if session is not None and target.user_id is not None:
+        invalidate_on_commit(session, insights_cache_key(target.user_id))
+
+@event.listens_for(ShoppingListItem, "after_insert")
+@event.listens_for(ShoppingListItem, "after_update")
+@event.listens_for(ShoppingListItem, "after_delete")
+def _invalidate_item_owner_insights(mapper, connection, target) -> None:
+    session = object_session(target)
+    if session is None or target.shopping_list_id is None:
+        return
+    user_id = connection.execute(
+        select(ShoppingList.user_id).where(ShoppingList.id == target.shopping_list_id)
+    ).scalar()
+    if user_id is not None:
+        invalidate_on_commit(session, insights_cache_key(user_id))
 
 class AnalyticsService:
     def __init__(self, db: Session):
@@ -11,12 +43,38 @@ class AnalyticsService:
 
     def get_user_savings(self, user_id: int, days: int = 30) -> Dict:
         """Calculate user's savings over time."""
-        # Get user's shopping lists
-        shopping_lists = self.db.query(ShoppingList).filter(
-            ShoppingList.user_id == user_id
-        ).all()
-
-        if not shopping_lists:
+        since = (datetime.utcnow() - timedelta(days=days)).date()
+
+        # Savings per list item: the spread between the highest and lowest
+        # price seen in the window across all stores, times the quantity
+        item_savings = self.db.query(
+            ShoppingListItem.id.label('item_id'),
+            ShoppingListItem.quantity.label('quantity'),
+            Product.name.label('product_name'),
+            Product.category.label('category'),
+            (
+                (func.max(PriceDailyRollup.max_price) - func.min(PriceDailyRollup.min_price))
+                * ShoppingListItem.quantity
+            ).label('savings')
+        ).join(
+            ShoppingList, ShoppingList.id == ShoppingListItem.shopping_list_id
+        ).join(
+            Product, Product.id == ShoppingListItem.product_id
+        ).join(
+            PriceDailyRollup, PriceDailyRollup.product_id == ShoppingListItem.product_id
+        ).filter(
+            ShoppingList.user_id == user_id,
+            PriceDailyRollup.day >= since
+        ).group_by(
+            ShoppingListItem.id, Product.name, Product.category
+        ).subquery()
+
+        category_rows = self.db.query(
+            item_savings.c.category,
+            func.sum(item_savings.c.savings)
+        ).group_by(item_savings.c.category).all()
+
+        if not category_rows:
             return {
                 'total_savings': 0,
                 'savings_by_day': [],
@@ -24,56 +82,54 @@ class AnalyticsService:
                 'best_deals': []
             }
 
-        # Calculate savings for each shopping list
-        total_savings = 0
-        savings_by_day = []
-        savings_by_category = {}
-        best_deals = []
-
-        for shopping_list in shopping_lists:
-            items = self.db.query(ShoppingListItem).filter(
-                ShoppingListItem.shopping_list_id == shopping_list.id
-            ).all()
-
-            for item in items:
-                # Get product prices
-                prices = self.db.query(Price).filter(
-                    Price.product_id == item.product_id
-                ).order_by(Price.timestamp.desc()).all()
-
-                if not prices:
-                    continue
-
-                # Calculate savings
-                lowest_price = min(p.price for p in prices)
-                highest_price = max(p.price for p in prices)
-                savings = (highest_price - lowest_price) * item.quantity
-                total_savings += savings
-
-                # Add to savings by day
-                for price in prices:
-                    savings_by_day.append({
-                        'date': price.timestamp.date().isoformat(),
-                        'savings': savings
-                    })
-
-                # Add to savings by category
-                product = self.db.query(Product).get(item.product_id)
-                if product and product.category:
-                    if product.category not in savings_by_category:
-                        savings_by_category[product.category] = 0
-                    savings_by_category[product.category] += savings
-
-                # Add to best deals
-                best_deals.append({
-                    'product_name': product.name if product else 'Unknown',
-                    'savings': savings,
-                    'quantity': item.quantity
-                })
-
-        # Sort and limit best deals
-        best_deals.sort(key=lambda x: x['savings'], reverse=True)
-        best_deals = best_deals[:5]
+        total_savings = sum(savings for _, savings in category_rows)
+        savings_by_category = {
+            category: savings
+            for category, savings in category_rows
+            if category
+        }
+
+        best_deals = [
+            {
+                'product_name': product_name or 'Unknown',
+                'savings': savings,
+                'quantity': quantity
+            }
+            for product_name, savings, quantity in self.db.query(
+                item_savings.c.product_name,
+                item_savings.c.savings,
+                item_savings.c.quantity
+            ).order_by(item_savings.c.savings.desc()).limit(5)
+        ]
+
+        # Same spread, computed per item and day
+        daily_item_savings = self.db.query(
+            PriceDailyRollup.day.label('day'),
+            (
+                (func.max(PriceDailyRollup.max_price) - func.min(PriceDailyRollup.min_price))
+                * ShoppingListItem.quantity
+            ).label('savings')
+        ).join(
+            ShoppingListItem, ShoppingListItem.product_id == PriceDailyRollup.product_id
+        ).join(
+            ShoppingList, ShoppingList.id == ShoppingListItem.shopping_list_id
+        ).filter(
+            ShoppingList.user_id == user_id,
+            PriceDailyRollup.day >= since
+        ).group_by(
+            ShoppingListItem.id, PriceDailyRollup.day
+        ).subquery()
+
+        savings_by_day = [
+            {
+                'date': day.isoformat(),
+                'savings': savings
+            }
+            for day, savings in self.db.query(
+                daily_item_savings.c.day,
+                func.sum(daily_item_savings.c.savings)
+            ).group_by(daily_item_savings.c.day).order_by(daily_item_savings.c.day)
+        ]
 
         return {
             'total_savings': total_savings,
@@ -82,12 +138,18 @@ class AnalyticsService:
             'best_deals': best_deals
         }
 
-    def get_price_trends(self, product_id: int, days: int = 30) -> Dict:
+    def get_price_trends(self, product_id: int, days: int = 30, resolution: str = 'raw') -> Dict:
         """Analyze price trends for a product."""
-        # Get price history
+        if resolution != 'raw':
+            return self._get_bucketed_price_trends(product_id, days, resolution)
+
+        # Get price history; rows are change-only, each one holding from
+        # `timestamp` until `valid_until`
+        now = datetime.utcnow()
+        window_start = now - timedelta(days=days)
         prices = self.db.query(Price).filter(
             Price.product_id == product_id,
-            Price.timestamp >= datetime.utcnow() - timedelta(days=days)
+            Price.valid_until >= window_start
         ).order_by(Price.timestamp).all()
 
         if not prices:
@@ -98,15 +160,22 @@ class AnalyticsService:
                 'best_time_to_buy': None
             }
 
+        # Weight each price by how long it held inside the window, so a
+        # price seen for a week counts more than one seen once
+        weights = [
+            max((min(p.valid_until, now) - max(p.timestamp, window_start)).total_seconds(), 1.0)
+            for p in prices
+        ]
+        total_weight = sum(weights)
+
         # Calculate price statistics
         price_values = [p.price for p in prices]
-        avg_price = sum(price_values) / len(price_values)
+        avg_price = sum(price * weight for price, weight in zip(price_values, weights)) / total_weight
         min_price = min(price_values)
         max_price = max(price_values)
 
-        # Calculate sale frequency
-        sale_count = sum(1 for p in prices if p.is_sale)
-        sale_frequency = sale_count / len(prices)
+        # Calculate sale frequency as the share of time on sale
+        sale_frequency = sum(weight for p, weight in zip(prices, weights) if p.is_sale) / total_weight
 
         # Find best time to buy
         best_time = None
@@ -120,6 +189,7 @@ class AnalyticsService:
             'price_history': [
                 {
                     'date': p.timestamp.date().isoformat(),
+                    'last_seen': p.valid_until.date().isoformat(),
                     'price': p.price,
                     'is_sale': p.is_sale
                 }
@@ -135,14 +205,73 @@ class AnalyticsService:
             'best_time_to_buy': best_time.date().isoformat() if best_time else None
         }
 
+    def _get_bucketed_price_trends(self, product_id: int, days: int, resolution: str) -> Dict:
+        """Analyze price trends from hour/day/week aggregates instead of raw rows."""
+        buckets = PriceProjectionService(self.db).get_price_buckets(
+            product_id,
+            datetime.utcnow() - timedelta(days=days),
+            resolution
+        )
+
+        if not buckets:
+            return {
+                'price_history': [],
+                'price_stats': {},
+                'sale_frequency': 0,
+                'best_time_to_buy': None
+            }
+
+        # Statistics are exact: the buckets carry totals and counts
+        observation_count = sum(b['observation_count'] for b in buckets)
+        avg_price = sum(b['price_total'] for b in buckets) / observation_count
+        min_price = min(b['min_price'] for b in buckets)
+        max_price = max(b['max_price'] for b in buckets)
+        sale_frequency = sum(b['sale_count'] for b in buckets) / observation_count
+        best_bucket = min(buckets, key=lambda b: b['min_price'])
+
+        return {
+            'price_history': [
+                {
+                    'date': b['timestamp'].date().isoformat(),
+                    'timestamp': b['timestamp'].isoformat(),
+                    'store_name': b['store_name'],
+                    'price': b['price_total'] / b['observation_count'],
+                    'min_price': b['min_price'],
+                    'max_price': b['max_price'],
+                    'is_sale': b['sale_count'] > 0
+                }
+                for b in buckets
+            ],
+            'price_stats': {
+                'average_price': avg_price,
+                'minimum_price': min_price,
+                'maximum_price': max_price,
+                'price_range': max_price - min_price
+            },
+            'sale_frequency': sale_frequency,
+            'best_time_to_buy': best_bucket['timestamp'].date().isoformat()
+        }
+
     def get_user_insights(self, user_id: int) -> Dict:
         """Generate insights for a user's shopping behavior."""
-        # Get user's shopping lists
-        shopping_lists = self.db.query(ShoppingList).filter(
+        cache_key = insights_cache_key(user_id)
+        insights = cache.get_json(cache_key)
+        if insights is None:
+            insights = self._compute_user_insights(user_id)
+            cache.set_json(cache_key, insights, INSIGHTS_CACHE_TTL)
+        return insights
+
+    def _compute_user_insights(self, user_id: int) -> Dict:
+        """Build the insights payload with a fixed number of grouped queries."""
+        list_count, first_list, last_list = self.db.query(
+            func.count(ShoppingList.id),
+            func.min(ShoppingList.created_at),
+            func.max(ShoppingList.created_at)
+        ).filter(
             ShoppingList.user_id == user_id
-        ).all()
+        ).one()
 
-        if not shopping_lists:
+        if not list_count:
             return {
                 'shopping_frequency': 0,
                 'average_list_size': 0,
@@ -151,57 +280,55 @@ class AnalyticsService:
             }
 
         # Calculate shopping frequency
-        list_dates = [sl.created_at for sl in shopping_lists]
-        list_dates.sort()
-        if len(list_dates) > 1:
-            time_diff = (list_dates[-1] - list_dates[0]).days
-            shopping_frequency = len(list_dates) / (time_diff / 7)  # Lists per week
+        time_diff = (last_list - first_list).days if list_count > 1 else 0
+        if time_diff > 0:
+            shopping_frequency = list_count / (time_diff / 7)  # Lists per week
         else:
             shopping_frequency = 1
 
+        # Item counts per category; items without a product land in None
+        category_counts = self.db.query(
+            Product.category,
+            func.count(ShoppingListItem.id)
+        ).select_from(ShoppingListItem).join(
+            ShoppingList, ShoppingList.id == ShoppingListItem.shopping_list_id
+        ).outerjoin(
+            Product, Product.id == ShoppingListItem.product_id
+        ).filter(
+            ShoppingList.user_id == user_id
+        ).group_by(Product.category).all()
+
         # Calculate average list size
-        total_items = 0
-        for sl in shopping_lists:
-            items = self.db.query(ShoppingListItem).filter(
-                ShoppingListItem.shopping_list_id == sl.id
-            ).count()
-            total_items += items
-        average_list_size = total_items / len(shopping_lists)
+        total_items = sum(count for _, count in category_counts)
+        average_list_size = total_items / list_count
 
         # Get favorite categories
-        category_counts = {}
-        for sl in shopping_lists:
-            items = self.db.query(ShoppingListItem).filter(
-                ShoppingListItem.shopping_list_id == sl.id
-            ).all()
-            for item in items:
-                product = self.db.query(Product).get(item.product_id)
-                if product and product.category:
-                    if product.category not in category_counts:
-                        category_counts[product.category] = 0
-                    category_counts[product.category] += 1
-
         favorite_categories = sorted(
-            category_counts.items(),
+            ((category, count) for category, count in category_counts if category),
             key=lambda x: x[1],
             reverse=True
         )[:5]
 
         # Get active price alerts
-        alerts = self.db.query(PriceAlert).filter(
+        alerts = self.db.query(
+            Product.name,
+            PriceAlert.target_price,
+            PriceAlert.created_at
+        ).join(
+            Product, Product.id == PriceAlert.product_id
+        ).filter(
             PriceAlert.user_id == user_id,
             PriceAlert.is_active == True
         ).all()
 
-        price_alerts = []
-        for alert in alerts:
-            product = self.db.query(Product).get(alert.product_id)
-            if product:
-                price_alerts.append({
-                    'product_name': product.name,
-                    'target_price': alert.target_price,
-                    'created_at': alert.created_at.date().isoformat()
-                })
+        price_alerts = [
+            {
+                'product_name': product_name,
+                'target_price': target_price,
+                'created_at': created_at.date().isoformat()
+            }
+            for product_name, target_price, created_at in alerts
+        ]
 
         return {
             'shopping_frequency': shopping_frequency,
@@ -215,33 +342,32 @@ class AnalyticsService:
 
     def get_store_comparison(self, product_id: int) -> Dict:
         """Compare prices across different stores."""
-        # Get all prices for the product
-        prices = self.db.query(Price).filter(
-            Price.product_id == product_id
-        ).order_by(Price.timestamp.desc()).all()
+        # Per-store aggregates are maintained in latest_prices at ingest time
+        store_rows = self.db.query(LatestPrice, Store).join(
+            Store, LatestPrice.store_id == Store.id
+        ).filter(
+            LatestPrice.product_id == product_id,
+            LatestPrice.observation_count > 0
+        ).all()
 
-        if not prices:
+        if not store_rows:
             return {
                 'store_prices': [],
                 'price_differences': {},
                 'best_store': None
             }
 
-        # Group prices by store
-        store_prices = {}
-        for price in prices:
-            store = self.db.query(Store).get(price.store_id)
-            if not store:
-                continue
-
-            if store.name not in store_prices:
-                store_prices[store.name] = []
-            store_prices[store.name].append(price.price)
-
         # Calculate average prices by store
         store_avg_prices = {
-            store: sum(prices) / len(prices)
-            for store, prices in store_prices.items()
+            store.name: latest.price_total / latest.observation_count
+            for latest, store in store_rows
+        }
+        store_ranges = {
+            store.name: {
+                'min': latest.min_price,
+                'max': latest.max_price
+            }
+            for latest, store in store_rows
         }
 
         # Find best store
@@ -263,13 +389,10 @@ class AnalyticsService:
                 {
                     'store': store,
                     'average_price': price,
-                    'price_range': {
-                        'min': min(store_prices[store]),
-                        'max': max(store_prices[store])
-                    }
+                    'price_range': store_ranges[store]
                 }
                 for store, price in store_avg_prices.items()
             ],
             'price_differences': price_differences,
             'best_store': best_store
-        } 
\ No newline at end of file
+        }
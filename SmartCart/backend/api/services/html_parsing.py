@@ -0,0 +1,144 @@
+import os
+import re
+import asyncio
+import logging
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+try:
+    import lxml.html
+    from lxml.cssselect import CSSSelector
+except ImportError:
+    CSSSelector = None
+
+logger = logging.getLogger(__name__)
+
+def parse_price(text: str, price_format: Optional[Dict] = None) -> Optional[float]:
+    """Turn a displayed price such as "$1,299.99" into a float.
+
+    `price_format` may set "thousands_separator" and "decimal_separator"
+    (default "," and "."); currency symbols and other text are ignored.
+    """
+    price_format = price_format or {}
+    thousands = price_format.get("thousands_separator", ",")
+    decimal = price_format.get("decimal_separator", ".")
+    digits = re.sub(f"[^0-9{re.escape(thousands + decimal)}]", "", text)
+    if not digits:
+        return None
+    try:
+        return float(digits.replace(thousands, "").replace(decimal, "."))
+    except ValueError:
+        return None
+
+def _extract_selectolax(html: str, item_selector: str, price_selector: str) -> List[str]:
+    tree = SelectolaxParser(html)
+    texts = []
+    for item in tree.css(item_selector):
+        price_elem = item.css_first(price_selector)
+        if price_elem is not None:
+            texts.append(price_elem.text())
+    return texts
+
+@lru_cache(maxsize=64)
+def _css(selector: str):
+    return CSSSelector(selector)
+
+def _extract_lxml(html: str, item_selector: str, price_selector: str) -> List[str]:
+    tree = lxml.html.fromstring(html)
+    find_price = _css(price_selector)
+    texts = []
+    for item in _css(item_selector)(tree):
+        price_elems = find_price(item)
+        if price_elems:
+            texts.append(price_elems[0].text_content())
+    return texts
+
+def _extract_bs4(html: str, item_selector: str, price_selector: str) -> List[str]:
+    soup = BeautifulSoup(html, 'html.parser')
+    texts = []
+    for item in soup.select(item_selector):
+        price_elem = item.select_one(price_selector)
+        if price_elem is not None:
+            texts.append(price_elem.text)
+    return texts
+
+# Fastest first; BeautifulSoup is always available as the fallback
+# Each backend returns the text of the first price match in every item
+BACKENDS: Dict[str, Callable[[str, str, str], List[str]]] = {}
+if SelectolaxParser is not None:
+    BACKENDS["selectolax"] = _extract_selectolax
+if CSSSelector is not None:
+    BACKENDS["lxml"] = _extract_lxml
+BACKENDS["bs4"] = _extract_bs4
+
+def get_backend(name: Optional[str] = None) -> str:
+    """Resolve a backend name ("auto" or None picks the fastest installed one)."""
+    name = name or os.getenv("SCRAPER_HTML_PARSER", "auto")
+    if name == "auto":
+        return next(iter(BACKENDS))
+    if name not in BACKENDS:
+        logger.warning(f"HTML parser backend {name} is not installed, falling back to bs4")
+        return "bs4"
+    return name
+
+def extract_prices(
+    html: str,
+    item_selector: str,
+    price_selector: str,
+    backend: Optional[str] = None,
+    price_format: Optional[Dict] = None
+) -> List[float]:
+    """Prices from the first `price_selector` match inside each `item_selector` match."""
+    prices = []
+    for text in BACKENDS[get_backend(backend)](html, item_selector, price_selector):
+        price = parse_price(text, price_format)
+        if price is not None:
+            prices.append(price)
+    return prices
+
+class HTMLParserPool:
+    """Runs extract_prices in a process pool so parsing never blocks the event loop.
+
+    Settings come from SCRAPER_HTML_PARSER (backend) and
+    SCRAPER_PARSE_WORKERS (pool size, defaults to the CPU count).
+    """
+
+    def __init__(self, workers: Optional[int] = None, backend: Optional[str] = None):
+        self.workers = workers or int(os.getenv("SCRAPER_PARSE_WORKERS", "0")) or os.cpu_count()
+        self.backend = get_backend(backend)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def extract_prices(
+        self,
+        html: str,
+        item_selector: str,
+        price_selector: str,
+        price_format: Optional[Dict] = None
+    ) -> List[float]:
+        """Parse a page in the pool and return the prices found on it."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, extract_prices, html, item_selector, price_selector, self.backend, price_format
+        )
+
+    def close(self) -> None:
+        """Shut the worker processes down."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+# Create a singleton instance
+html_parser_pool = HTMLParserPool()
@@ -5,11 +5,16 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 import numpy as np
 from sklearn.linear_model import LinearRegression
-from ..models import Product, Price, Store
+from ..cache import cache
+from ..models import Product, Price, Store, LatestPrice, PriceDailyRollup
 from ..ml.price_predictor import PricePredictor
+from .price_projections import PriceProjectionService, deals_cache_key, DEALS_CACHE_TTL
 
 logger = logging.getLogger(__name__)
 
+# Enough for the largest page /products/deals/best serves
+MAX_CACHED_DEALS = 50
+
 class PriceComparisonService:
     def __init__(self, db: Session):
         self.db = db
@@ -18,39 +23,50 @@ class PriceComparisonService:
     def get_product_prices(self, product_id: int) -> List[Dict]:
         """Get current prices for a product across all stores."""
         prices = (
-            self.db.query(Price, Store)
-            .join(Product)
-            .join(Store)
-            .filter(Price.product_id == product_id)
-            .order_by(Price.timestamp.desc())
+            self.db.query(LatestPrice, Store)
+            .join(Store, LatestPrice.store_id == Store.id)
+            .filter(LatestPrice.product_id == product_id)
             .all()
         )
 
-        # Group prices by store and get the latest price for each store
-        store_prices = {}
-        for price, store in prices:
-            if store.id not in store_prices:
-                store_prices[store.id] = {
-                    "store_name": store.name,
-                    "price": price.price,
-                    "currency": price.currency,
-                    "is_sale": price.is_sale,
-                    "sale_end_date": price.sale_end_date,
-                    "timestamp": price.timestamp
-                }
-
-        return list(store_prices.values())
+        return [
+            {
+                "store_name": store.name,
+                "price": price.price,
+                "currency": price.currency,
+                "is_sale": price.is_sale,
+                "sale_end_date": price.sale_end_date,
+                "timestamp": price.timestamp
+            }
+            for price, store in prices
+        ]
 
-    def get_price_history(self, product_id: int, days: int = 30) -> List[Dict]:
-        """Get price history for a product."""
+    def get_price_history(self, product_id: int, days: int = 30, resolution: str = "raw") -> List[Dict]:
+        """Get price history for a product at the requested resolution."""
         start_date = datetime.utcnow() - timedelta(days=days)
+
+        if resolution != "raw":
+            buckets = PriceProjectionService(self.db).get_price_buckets(product_id, start_date, resolution)
+            return [
+                {
+                    "store_name": bucket["store_name"],
+                    "price": bucket["price_total"] / bucket["observation_count"],
+                    "timestamp": bucket["timestamp"],
+                    "is_sale": bucket["sale_count"] > 0,
+                    "min_price": bucket["min_price"],
+                    "max_price": bucket["max_price"],
+                    "observation_count": bucket["observation_count"]
+                }
+                for bucket in buckets
+            ]
         
+        # Rows are change-only: each one holds from `timestamp` until
+        # `valid_until`, so include rows that started before the window
         prices = (
             self.db.query(Price, Store)
-            .join(Product)
-            .join(Store)
+            .join(Store, Price.store_id == Store.id)
             .filter(Price.product_id == product_id)
-            .filter(Price.timestamp >= start_date)
+            .filter(Price.valid_until >= start_date)
             .order_by(Price.timestamp.asc())
             .all()
         )
@@ -60,6 +76,7 @@ class PriceComparisonService:
                 "store_name": store.name,
                 "price": price.price,
                 "timestamp": price.timestamp,
+                "last_seen": price.valid_until,
                 "is_sale": price.is_sale
             }
             for price, store in prices
@@ -67,8 +84,8 @@ class PriceComparisonService:
 
     def predict_future_prices(self, product_id: int, days_ahead: int = 7) -> Dict:
         """Predict future prices for a product."""
-        # Get historical prices
-        price_history = self.get_price_history(product_id)
+        # Daily points; raw rows are change-only and too sparse to regress on
+        price_history = self.get_price_history(product_id, resolution="day")
         
         if not price_history:
             return {"error": "No price history available for prediction"}
@@ -98,51 +115,108 @@ class PriceComparisonService:
 
     def find_best_deals(self, category: Optional[str] = None, limit: int = 10) -> List[Dict]:
         """Find the best deals across all products."""
+        cache_key = deals_cache_key(category)
+        deals = cache.get_json(cache_key)
+        if deals is None:
+            deals = self._query_best_deals(category, MAX_CACHED_DEALS)
+            cache.set_json(cache_key, deals, DEALS_CACHE_TTL)
+        return deals[:limit]
+
+    def _query_best_deals(self, category: Optional[str], limit: int) -> List[Dict]:
+        """Rank current prices against the product's 7-day average in SQL."""
+        since = datetime.utcnow() - timedelta(days=7)
+
+        average_query = (
+            self.db.query(
+                PriceDailyRollup.product_id.label("product_id"),
+                (
+                    func.sum(PriceDailyRollup.price_total)
+                    / func.sum(PriceDailyRollup.observation_count)
+                ).label("avg_price")
+            )
+            .filter(PriceDailyRollup.day >= since.date())
+        )
+        if category:
+            average_query = average_query.join(
+                Product, PriceDailyRollup.product_id == Product.id
+            ).filter(Product.category == category)
+        averages = average_query.group_by(PriceDailyRollup.product_id).subquery()
+
+        discount = ((averages.c.avg_price - LatestPrice.price) / averages.c.avg_price) * 100
         query = (
             self.db.query(
-                Product,
-                Store,
-                Price,
-                func.avg(Price.price).over(partition_by=Product.id).label('avg_price')
+                Product.id,
+                Product.name,
+                Store.name,
+                LatestPrice.price,
+                averages.c.avg_price,
+                discount.label("discount_percentage"),
+                LatestPrice.is_sale,
+                LatestPrice.sale_end_date
             )
-            .join(Price)
-            .join(Store)
-            .filter(Price.timestamp >= datetime.utcnow() - timedelta(days=7))
+            .select_from(LatestPrice)
+            .join(averages, averages.c.product_id == LatestPrice.product_id)
+            .join(Product, Product.id == LatestPrice.product_id)
+            .join(Store, Store.id == LatestPrice.store_id)
+            .filter(LatestPrice.timestamp >= since)
+            .filter(averages.c.avg_price > 0)
         )
 
         if category:
             query = query.filter(Product.category == category)
 
-        results = query.all()
+        results = query.order_by(discount.desc()).limit(limit).all()
 
-        deals = []
-        for product, store, price, avg_price in results:
-            discount = ((avg_price - price.price) / avg_price) * 100
-            deals.append({
-                "product_id": product.id,
-                "product_name": product.name,
-                "store_name": store.name,
-                "current_price": price.price,
+        return [
+            {
+                "product_id": product_id,
+                "product_name": product_name,
+                "store_name": store_name,
+                "current_price": current_price,
                 "average_price": avg_price,
-                "discount_percentage": discount,
-                "is_sale": price.is_sale,
-                "sale_end_date": price.sale_end_date
-            })
-
-        # Sort by discount percentage and return top deals
-        return sorted(deals, key=lambda x: x["discount_percentage"], reverse=True)[:limit]
+                "discount_percentage": discount_percentage,
+                "is_sale": is_sale,
+                "sale_end_date": sale_end_date
+            }
+            for (
+                product_id, product_name, store_name, current_price,
+                avg_price, discount_percentage, is_sale, sale_end_date
+            ) in results
+        ]
 
     def compare_prices(self, product_ids: List[int]) -> List[Dict]:
         """Compare prices for multiple products across stores."""
+        if not product_ids:
+            return []
+
+        # Resolve the whole basket in two queries regardless of its size
+        products = {
+            product.id: product
+            for product in self.db.query(Product).filter(Product.id.in_(product_ids)).all()
+        }
+        rows = (
+            self.db.query(LatestPrice, Store)
+            .join(Store, LatestPrice.store_id == Store.id)
+            .filter(LatestPrice.product_id.in_(list(products)))
+            .all()
+        )
+
+        prices_by_product = {}
+        for price, store in rows:
+            prices_by_product.setdefault(price.product_id, []).append({
+                "store_name": store.name,
+                "price": price.price,
+                "currency": price.currency,
+                "is_sale": price.is_sale,
+                "sale_end_date": price.sale_end_date,
+                "timestamp": price.timestamp
+            })
+
         results = []
-        
         for product_id in product_ids:
-            product = self.db.query(Product).filter(Product.id == product_id).first()
-            if not product:
-                continue
-
-            prices = self.get_product_prices(product_id)
-            if not prices:
+            product = products.get(product_id)
+            prices = prices_by_product.get(product_id)
+            if not product or not prices:
                 continue
 
             # Find the lowest price
@@ -0,0 +1,287 @@
+import io
+import csv
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timezone
+from sqlalchemy import bindparam, func, insert, select, text, tuple_, update
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from api.models import Store, Price, LatestPrice
+from api.services.price_projections import PriceProjectionService
+
+logger = logging.getLogger(__name__)
+
+# Columns written per observation, in COPY order
+PRICE_COLUMNS = ("product_id", "store_id", "price", "currency", "is_sale", "sale_end_date", "timestamp")
+
+def _parse_sale_end_date(value) -> Optional[datetime]:
+    """Retailers send sale end dates as ISO strings; store them as naive UTC."""
+    if value is None or isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed is not None and parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _copy_value(value):
+    """Format a value for COPY ... WITH (FORMAT csv), where an empty field is NULL."""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+class PriceIngestionService:
+    """Single write path for price observations from store APIs and scrapers.
+
+    Observations are dicts with product_id, store_id (or store_name),
+    price, currency, is_sale, sale_end_date and timestamp. They are
+    written in batches: store names are resolved from a per-service
+    cache, observations whose price, sale flag, sale end date and
+    currency match the product/store's current price only extend that
+    row's ``last_seen``, and the rest are bulk inserted (COPY on psycopg2
+    for large batches). Inserted rows feed the projections, and rows
+    whose ``last_seen`` is extended count again for every new day they
+    cover. Observations flagged ``unchanged`` (the retailer answered 304
+    or with an identical body) carry no price; they only extend
+    ``last_seen`` and bypass the comparison. Nothing is committed here.
+    """
+
+    def __init__(self, db: Session, batch_size: int = 5000, copy_threshold: int = 500):
+        self.db = db
+        self.batch_size = batch_size
+        self.copy_threshold = copy_threshold
+        self.projections = PriceProjectionService(db)
+        self._store_ids: Optional[Dict[str, int]] = None
+
+    def ingest(self, observations: Iterable[Dict]) -> Dict[str, int]:
+        """Write a stream of observations; returns inserted and skipped counts."""
+        result = {"inserted": 0, "skipped": 0}
+        batch: List[Dict] = []
+        for observation in observations:
+            batch.append(observation)
+            if len(batch) >= self.batch_size:
+                self._ingest_batch(batch, result)
+                batch = []
+        if batch:
+            self._ingest_batch(batch, result)
+        return result
+
+    def _ingest_batch(self, batch: List[Dict], result: Dict[str, int]) -> None:
+        try:
+            observations, confirmed = self._normalize(batch)
+            changed, unchanged = self._split_changed(observations) if observations else ([], [])
+            if changed:
+                self._write(changed)
+                self.projections.record(changed)
+            if unchanged or confirmed:
+                self.projections.record_seen(self._touch(unchanged + confirmed))
+        except Exception:
+            # The caller rolls the batch back, including any stores it
+            # created, so their ids must not stay cached
+            self._store_ids = None
+            raise
+        result["inserted"] += len(changed)
+        result["skipped"] += len(unchanged) + len(confirmed)
+
+    def _normalize(self, batch: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Resolve store ids and coerce fields to what the tables store.
+
+        Returns priced observations and those confirmed ``unchanged``.
+        """
+        store_ids = self._resolve_store_ids({
+            obs["store_name"] for obs in batch if obs.get("store_id") is None
+        })
+        observations, confirmed = [], []
+        for obs in batch:
+            store_id = obs["store_id"] if obs.get("store_id") is not None else store_ids[obs["store_name"]]
+            timestamp = obs.get("timestamp") or datetime.utcnow()
+            if obs.get("unchanged"):
+                confirmed.append({"product_id": obs["product_id"], "store_id": store_id, "timestamp": timestamp})
+                continue
+            if obs.get("price") is None:
+                continue
+            observations.append({
+                "product_id": obs["product_id"],
+                "store_id": store_id,
+                "price": obs["price"],
+                "currency": obs.get("currency") or "USD",
+                "is_sale": bool(obs.get("is_sale")),
+                "sale_end_date": _parse_sale_end_date(obs.get("sale_end_date")),
+                "timestamp": timestamp
+            })
+        observations.sort(key=lambda obs: obs["timestamp"])
+        return observations, confirmed
+
+    def _resolve_store_ids(self, names: Iterable[str]) -> Dict[str, int]:
+        """Map store names to ids, creating stores that don't exist yet."""
+        if self._store_ids is None:
+            self._store_ids = dict(self.db.query(Store.name, Store.id).all())
+
+        missing = [name for name in names if name not in self._store_ids]
+        if missing:
+            now = datetime.utcnow()
+            self.db.execute(
+                pg_insert(Store)
+                .values([
+                    {"name": name, "api_config": {}, "is_active": True, "created_at": now, "updated_at": now}
+                    for name in missing
+                ])
+                .on_conflict_do_nothing(index_elements=[Store.name])
+            )
+            self._store_ids.update(
+                self.db.query(Store.name, Store.id).filter(Store.name.in_(missing)).all()
+            )
+        return self._store_ids
+
+    def _split_changed(self, observations: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Split observations into those that change their product/store's current price and the rest."""
+        keys = {(obs["product_id"], obs["store_id"]) for obs in observations}
+        current: Dict[Tuple[int, int], Tuple] = {
+            (row.product_id, row.store_id): (row.price, row.currency, row.is_sale, row.sale_end_date)
+            for row in self.db.query(
+                LatestPrice.product_id, LatestPrice.store_id, LatestPrice.price,
+                LatestPrice.currency, LatestPrice.is_sale, LatestPrice.sale_end_date
+            ).filter(tuple_(LatestPrice.product_id, LatestPrice.store_id).in_(list(keys)))
+        }
+
+        changed, unchanged = [], []
+        for obs in observations:
+            key = (obs["product_id"], obs["store_id"])
+            state = (obs["price"], obs["currency"], obs["is_sale"], obs["sale_end_date"])
+            if current.get(key) == state:
+                unchanged.append(obs)
+                continue
+            current[key] = state
+            changed.append(obs)
+        return changed, unchanged
+
+    def _touch(self, observations: List[Dict]) -> List[Dict]:
+        """Extend ``last_seen`` on the current row of each product/store observed unchanged.
+
+        Returns the extended rows as spans for PriceProjectionService.record_seen.
+        """
+        seen: Dict[Tuple[int, int], datetime] = {}
+        for obs in observations:
+            key = (obs["product_id"], obs["store_id"])
+            seen[key] = max(seen.get(key, obs["timestamp"]), obs["timestamp"])
+
+        prices = Price.__table__
+        valid_until = func.coalesce(prices.c.last_seen, prices.c.timestamp)
+        current_rows = self.db.connection().execute(
+            select(
+                prices.c.id, prices.c.product_id, prices.c.store_id, prices.c.price,
+                prices.c.currency, prices.c.is_sale, prices.c.sale_end_date,
+                prices.c.timestamp, valid_until.label("valid_until")
+            )
+            .where(tuple_(prices.c.product_id, prices.c.store_id).in_(list(seen)))
+            .distinct(prices.c.product_id, prices.c.store_id)
+            .order_by(prices.c.product_id, prices.c.store_id, prices.c.timestamp.desc(), prices.c.id.desc())
+        )
+        spans = [
+            {
+                "row": row,
+                "product_id": row.product_id,
+                "store_id": row.store_id,
+                "price": row.price,
+                "currency": row.currency,
+                "is_sale": row.is_sale,
+                "sale_end_date": row.sale_end_date,
+                "seen_from": row.valid_until,
+                "seen_until": seen[(row.product_id, row.store_id)]
+            }
+            for row in current_rows
+            if seen[(row.product_id, row.store_id)] > row.valid_until
+        ]
+        if spans:
+            self.db.connection().execute(
+                update(prices)
+                .where(prices.c.id == bindparam("row_id"))
+                .where(prices.c.timestamp == bindparam("row_timestamp"))
+                .values(last_seen=bindparam("seen")),
+                [
+                    {"row_id": span["row"].id, "row_timestamp": span["row"].timestamp, "seen": span["seen_until"]}
+                    for span in spans
+                ]
+            )
+        for span in spans:
+            del span["row"]
+        return spans
+
+    def _write(self, observations: List[Dict]) -> None:
+        """Bulk insert observations, with COPY for large batches where the driver supports it."""
+        if len(observations) >= self.copy_threshold and self.db.get_bind().dialect.driver == "psycopg2":
+            self.db.flush()
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for obs in observations:
+                writer.writerow([_copy_value(obs[column]) for column in PRICE_COLUMNS])
+            buffer.seek(0)
+            cursor = self.db.connection().connection.cursor()
+            try:
+                cursor.copy_expert(
+                    f"COPY prices ({', '.join(PRICE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+            finally:
+                cursor.close()
+            return
+
+        self.db.execute(insert(Price), observations)
+
+    def compact_history(self) -> int:
+        """Fold runs of identical consecutive prices into single rows with ``last_seen``.
+
+        Converts history written before change-only ingestion. Returns the
+        number of rows deleted. The projections are left untouched; rebuild
+        them afterwards (scripts/rebuild_price_projections.py) so they count
+        the compacted rows.
+        """
+        self.db.execute(text("""
+            CREATE TEMPORARY TABLE price_runs ON COMMIT DROP AS
+            SELECT
+                id, product_id, store_id, starts_run, seen_until,
+                SUM(starts_run::int) OVER (
+                    PARTITION BY product_id, store_id ORDER BY timestamp, id
+                ) AS run
+            FROM (
+                SELECT
+                    id, product_id, store_id, timestamp,
+                    COALESCE(last_seen, timestamp) AS seen_until,
+                    LAG(id) OVER w IS NULL
+                        OR price IS DISTINCT FROM LAG(price) OVER w
+                        OR currency IS DISTINCT FROM LAG(currency) OVER w
+                        OR is_sale IS DISTINCT FROM LAG(is_sale) OVER w
+                        OR sale_end_date IS DISTINCT FROM LAG(sale_end_date) OVER w
+                        AS starts_run
+                FROM prices
+                WHERE product_id IS NOT NULL AND store_id IS NOT NULL
+                WINDOW w AS (PARTITION BY product_id, store_id ORDER BY timestamp, id)
+            ) marked
+        """))
+        self.db.execute(text("""
+            UPDATE prices p
+            SET last_seen = spans.seen_until
+            FROM (
+                SELECT
+                    MIN(id) FILTER (WHERE starts_run) AS id,
+                    MAX(seen_until) AS seen_until,
+                    COUNT(*) AS run_length
+                FROM price_runs
+                GROUP BY product_id, store_id, run
+            ) spans
+            WHERE p.id = spans.id AND spans.run_length > 1
+        """))
+        result = self.db.execute(text("""
+            DELETE FROM prices p
+            USING price_runs r
+            WHERE p.id = r.id AND NOT r.starts_run
+        """))
+        self.db.commit()
+        logger.info(f"Compacted price history, removed {result.rowcount} duplicate rows")
+        return result.rowcount
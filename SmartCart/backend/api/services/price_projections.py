@@ -0,0 +1,370 @@
+from typing import List, Dict, Optional, Tuple
+from datetime import datetime, time, timedelta
+import logging
+from sqlalchemy import func, case, cast, text, Date, Integer
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+
+from api.cache import invalidate_on_commit
+from api.models import Product, Price, Store, LatestPrice, PriceDailyRollup
+
+logger = logging.getLogger(__name__)
+
+# Granularities accepted by the history/trend readers
+RESOLUTIONS = ("raw", "hour", "day", "week")
+
+# Top deals are cached per category and dropped whenever a category's prices change
+DEALS_CACHE_TTL = 900
+
+# One row per stored price and day it was valid, with when it took effect
+# that day (its timestamp on its first day, midnight after that)
+_PRICE_DAYS_SQL = """
+    SELECT
+        p.id, p.product_id, p.store_id, p.price, p.is_sale, p.timestamp,
+        d.day::date AS day,
+        GREATEST(p.timestamp, d.day) AS seen_at
+    FROM prices p
+    CROSS JOIN LATERAL generate_series(
+        date_trunc('day', p.timestamp),
+        date_trunc('day', COALESCE(p.last_seen, p.timestamp)),
+        interval '1 day'
+    ) AS d(day)
+    WHERE p.product_id IS NOT NULL AND p.store_id IS NOT NULL AND p.timestamp IS NOT NULL
+"""
+
+def deals_cache_key(category: Optional[str]) -> str:
+    return f"deals:top:{category if category is not None else '*'}"
+
+class PriceProjectionService:
+    """Keeps the read-optimized price projections in sync with ``prices``."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record(self, observations: List[Dict]) -> None:
+        """Fold newly written price rows into the projections.
+
+        Each inserted row counts as one observation on the day it starts;
+        rows that are merely seen again go through record_seen. Must be
+        called in the same transaction that inserts the ``Price`` rows.
+        """
+        if not observations:
+            return
+        self._upsert_latest_prices(observations)
+        self._upsert_daily_rollups(observations)
+        self._mark_deals_stale(observations)
+
+    def _mark_deals_stale(self, observations: List[Dict]) -> None:
+        """Queue the cached deal lists for these products' categories for invalidation on commit."""
+        product_ids = {obs["product_id"] for obs in observations}
+        categories = {
+            category
+            for (category,) in self.db.query(Product.category)
+            .filter(Product.id.in_(product_ids))
+            .distinct()
+        }
+        invalidate_on_commit(
+            self.db,
+            deals_cache_key(None),
+            *[deals_cache_key(category) for category in categories]
+        )
+
+    def record_seen(self, spans: List[Dict]) -> None:
+        """Fold current price rows that were seen again into the projections.
+
+        Each span is a product/store's current row (price, currency,
+        is_sale, sale_end_date) whose validity was extended from
+        `seen_from` to `seen_until`. Every day it newly covers counts as
+        one observation of that row, and latest_prices.timestamp moves to
+        `seen_until`. This matches the rebuild_* methods.
+        """
+        if not spans:
+            return
+        days = []
+        for span in spans:
+            day = span["seen_from"].date() + timedelta(days=1)
+            while day <= span["seen_until"].date():
+                days.append({**span, "timestamp": datetime.combine(day, time.min)})
+                day += timedelta(days=1)
+        if days:
+            self._upsert_daily_rollups(days)
+
+        rows = self._latest_rows(days)
+        for span in spans:
+            row = rows.setdefault((span["product_id"], span["store_id"]), {
+                "product_id": span["product_id"],
+                "store_id": span["store_id"],
+                "price": span["price"],
+                "currency": span.get("currency") or "USD",
+                "is_sale": bool(span.get("is_sale")),
+                "sale_end_date": span.get("sale_end_date"),
+                "min_price": span["price"],
+                "max_price": span["price"],
+                "price_total": 0,
+                "observation_count": 0
+            })
+            row["timestamp"] = max(row.get("timestamp", span["seen_until"]), span["seen_until"])
+        self._upsert_latest_rows(rows)
+
+    def _upsert_latest_prices(self, observations: List[Dict]) -> None:
+        """Upsert the current price and running aggregates per product/store."""
+        self._upsert_latest_rows(self._latest_rows(observations))
+
+    def _latest_rows(self, observations: List[Dict]) -> Dict[Tuple[int, int], Dict]:
+        """Collapse observations to one latest_prices row per product/store."""
+        # Postgres refuses to touch the same row twice in one upsert, so
+        # collapse the batch to one row per product/store first.
+        rows: Dict[Tuple[int, int], Dict] = {}
+        for obs in observations:
+            key = (obs["product_id"], obs["store_id"])
+            row = rows.get(key)
+            if row is None:
+                rows[key] = {
+                    "product_id": obs["product_id"],
+                    "store_id": obs["store_id"],
+                    "price": obs["price"],
+                    "currency": obs.get("currency") or "USD",
+                    "is_sale": bool(obs.get("is_sale")),
+                    "sale_end_date": obs.get("sale_end_date"),
+                    "timestamp": obs["timestamp"],
+                    "min_price": obs["price"],
+                    "max_price": obs["price"],
+                    "price_total": obs["price"],
+                    "observation_count": 1
+                }
+                continue
+
+            row["min_price"] = min(row["min_price"], obs["price"])
+            row["max_price"] = max(row["max_price"], obs["price"])
+            row["price_total"] += obs["price"]
+            row["observation_count"] += 1
+            if obs["timestamp"] >= row["timestamp"]:
+                row.update({
+                    "price": obs["price"],
+                    "currency": obs.get("currency") or "USD",
+                    "is_sale": bool(obs.get("is_sale")),
+                    "sale_end_date": obs.get("sale_end_date"),
+                    "timestamp": obs["timestamp"]
+                })
+        return rows
+
+    def _upsert_latest_rows(self, rows: Dict[Tuple[int, int], Dict]) -> None:
+        if not rows:
+            return
+        stmt = insert(LatestPrice).values(list(rows.values()))
+        excluded = stmt.excluded
+        is_newer = excluded.timestamp >= LatestPrice.timestamp
+
+        def newest(column):
+            return case((is_newer, getattr(excluded, column)), else_=getattr(LatestPrice, column))
+
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LatestPrice.product_id, LatestPrice.store_id],
+            set_={
+                "price": newest("price"),
+                "currency": newest("currency"),
+                "is_sale": newest("is_sale"),
+                "sale_end_date": newest("sale_end_date"),
+                "timestamp": func.greatest(LatestPrice.timestamp, excluded.timestamp),
+                "min_price": func.least(LatestPrice.min_price, excluded.min_price),
+                "max_price": func.greatest(LatestPrice.max_price, excluded.max_price),
+                "price_total": LatestPrice.price_total + excluded.price_total,
+                "observation_count": LatestPrice.observation_count + excluded.observation_count
+            }
+        )
+        self.db.execute(stmt)
+
+    def _upsert_daily_rollups(self, observations: List[Dict]) -> None:
+        """Fold observations into the per-day rollups."""
+        rows: Dict[Tuple[int, int, object], Dict] = {}
+        for obs in observations:
+            key = (obs["product_id"], obs["store_id"], obs["timestamp"].date())
+            row = rows.get(key)
+            if row is None:
+                rows[key] = {
+                    "product_id": obs["product_id"],
+                    "store_id": obs["store_id"],
+                    "day": key[2],
+                    "min_price": obs["price"],
+                    "max_price": obs["price"],
+                    "price_total": obs["price"],
+                    "observation_count": 1,
+                    "sale_count": 1 if obs.get("is_sale") else 0,
+                    "last_price": obs["price"],
+                    "last_timestamp": obs["timestamp"]
+                }
+                continue
+
+            row["min_price"] = min(row["min_price"], obs["price"])
+            row["max_price"] = max(row["max_price"], obs["price"])
+            row["price_total"] += obs["price"]
+            row["observation_count"] += 1
+            row["sale_count"] += 1 if obs.get("is_sale") else 0
+            if obs["timestamp"] >= row["last_timestamp"]:
+                row["last_price"] = obs["price"]
+                row["last_timestamp"] = obs["timestamp"]
+
+        stmt = insert(PriceDailyRollup).values(list(rows.values()))
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PriceDailyRollup.product_id, PriceDailyRollup.store_id, PriceDailyRollup.day],
+            set_={
+                "min_price": func.least(PriceDailyRollup.min_price, excluded.min_price),
+                "max_price": func.greatest(PriceDailyRollup.max_price, excluded.max_price),
+                "price_total": PriceDailyRollup.price_total + excluded.price_total,
+                "observation_count": PriceDailyRollup.observation_count + excluded.observation_count,
+                "sale_count": PriceDailyRollup.sale_count + excluded.sale_count,
+                "last_price": case(
+                    (excluded.last_timestamp >= PriceDailyRollup.last_timestamp, excluded.last_price),
+                    else_=PriceDailyRollup.last_price
+                ),
+                "last_timestamp": func.greatest(PriceDailyRollup.last_timestamp, excluded.last_timestamp)
+            }
+        )
+        self.db.execute(stmt)
+
+    def get_price_buckets(self, product_id: int, start: datetime, resolution: str) -> List[Dict]:
+        """Aggregate a product's prices per store into hour/day/week buckets.
+
+        Hourly buckets are computed from ``prices``, spreading each
+        change-only row over every hour between its ``timestamp`` and
+        ``valid_until``, so there an observation is one distinct price
+        held during the hour. Daily and weekly buckets are read from
+        ``price_daily_rollups``, where an observation is likewise one
+        stored price held during the day.
+        """
+        if resolution == "hour":
+            spans = (
+                self.db.query(
+                    Price.store_id,
+                    Price.price,
+                    Price.is_sale,
+                    func.generate_series(
+                        func.date_trunc("hour", func.greatest(Price.timestamp, start)),
+                        func.date_trunc("hour", Price.valid_until),
+                        timedelta(hours=1)
+                    ).label("bucket")
+                )
+                .filter(Price.product_id == product_id)
+                .filter(Price.valid_until >= start)
+                .subquery()
+            )
+            store_id = spans.c.store_id
+            bucket = spans.c.bucket
+            query = self.db.query(
+                spans.c.store_id,
+                spans.c.bucket,
+                func.min(spans.c.price).label("min_price"),
+                func.max(spans.c.price).label("max_price"),
+                func.sum(spans.c.price).label("price_total"),
+                func.count().label("observation_count"),
+                func.sum(cast(spans.c.is_sale, Integer)).label("sale_count")
+            )
+        elif resolution in ("day", "week"):
+            store_id = PriceDailyRollup.store_id
+            bucket = PriceDailyRollup.day.label("bucket")
+            if resolution == "week":
+                bucket = cast(func.date_trunc("week", PriceDailyRollup.day), Date).label("bucket")
+            query = (
+                self.db.query(
+                    PriceDailyRollup.store_id,
+                    bucket,
+                    func.min(PriceDailyRollup.min_price).label("min_price"),
+                    func.max(PriceDailyRollup.max_price).label("max_price"),
+                    func.sum(PriceDailyRollup.price_total).label("price_total"),
+                    func.sum(PriceDailyRollup.observation_count).label("observation_count"),
+                    func.sum(PriceDailyRollup.sale_count).label("sale_count")
+                )
+                .filter(PriceDailyRollup.product_id == product_id)
+                .filter(PriceDailyRollup.day >= start.date())
+            )
+        else:
+            raise ValueError(f"Unsupported resolution: {resolution}")
+
+        subquery = query.group_by(store_id, bucket).subquery()
+        rows = (
+            self.db.query(subquery, Store.name)
+            .join(Store, subquery.c.store_id == Store.id)
+            .order_by(subquery.c.bucket, Store.name)
+            .all()
+        )
+
+        buckets = []
+        for row in rows:
+            timestamp = row.bucket
+            if not isinstance(timestamp, datetime):
+                timestamp = datetime.combine(timestamp, time.min)
+            buckets.append({
+                "store_name": row.name,
+                "timestamp": timestamp,
+                "min_price": row.min_price,
+                "max_price": row.max_price,
+                "price_total": row.price_total,
+                "observation_count": row.observation_count,
+                "sale_count": row.sale_count
+            })
+        return buckets
+
+    def rebuild_latest_prices(self) -> int:
+        """Rebuild ``latest_prices`` from the full ``prices`` table.
+
+        Aggregates count one observation per stored row per day it was
+        valid, the same as record/record_seen.
+        """
+        self.db.execute(text("DELETE FROM latest_prices"))
+        result = self.db.execute(text(f"""
+            INSERT INTO latest_prices (
+                product_id, store_id, price, currency, is_sale, sale_end_date,
+                timestamp, min_price, max_price, price_total, observation_count
+            )
+            SELECT
+                l.product_id, l.store_id, l.price, l.currency, l.is_sale,
+                l.sale_end_date, l.timestamp, a.min_price, a.max_price,
+                a.price_total, a.observation_count
+            FROM (
+                SELECT DISTINCT ON (product_id, store_id)
+                    product_id, store_id, price, currency, is_sale,
+                    sale_end_date, COALESCE(last_seen, timestamp) AS timestamp
+                FROM prices
+                WHERE product_id IS NOT NULL AND store_id IS NOT NULL
+                ORDER BY product_id, store_id, timestamp DESC, id DESC
+            ) l
+            JOIN (
+                SELECT
+                    product_id, store_id,
+                    MIN(price) AS min_price,
+                    MAX(price) AS max_price,
+                    SUM(price) AS price_total,
+                    COUNT(*) AS observation_count
+                FROM ({_PRICE_DAYS_SQL}) price_days
+                GROUP BY product_id, store_id
+            ) a ON a.product_id = l.product_id AND a.store_id = l.store_id
+        """))
+        self.db.commit()
+        logger.info(f"Rebuilt latest_prices with {result.rowcount} rows")
+        return result.rowcount
+
+    def rebuild_daily_rollups(self) -> int:
+        """Rebuild ``price_daily_rollups`` from the full ``prices`` table.
+
+        Each stored row counts once on every day from its ``timestamp``
+        through ``valid_until``, the same as record/record_seen.
+        """
+        self.db.execute(text("DELETE FROM price_daily_rollups"))
+        result = self.db.execute(text(f"""
+            INSERT INTO price_daily_rollups (
+                product_id, store_id, day, min_price, max_price, price_total,
+                observation_count, sale_count, last_price, last_timestamp
+            )
+            SELECT
+                product_id, store_id, day,
+                MIN(price), MAX(price), SUM(price), COUNT(*),
+                COUNT(*) FILTER (WHERE is_sale),
+                (ARRAY_AGG(price ORDER BY seen_at DESC, timestamp DESC, id DESC))[1],
+                MAX(seen_at)
+            FROM ({_PRICE_DAYS_SQL}) price_days
+            GROUP BY product_id, store_id, day
+        """))
+        self.db.commit()
+        logger.info(f"Rebuilt price_daily_rollups with {result.rowcount} rows")
+        return result.rowcount
@@ -0,0 +1,93 @@
+import re
+import logging
+from typing import Dict, List, Optional
+from sqlalchemy import func, literal
+from sqlalchemy.orm import Session
+
+from ..models import Product
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = "english"
+# Upper bound on full-text matches ranked per query
+RANK_CANDIDATES = 2000
+# Minimum word_similarity for a fuzzy name match (pg_trgm's default is 0.6)
+FUZZY_THRESHOLD = 0.4
+
+_TERM = re.compile(r"\w+")
+
+class ProductSearchService:
+    """Ranked search over the local catalog.
+
+    Every query term is matched as a prefix against the weighted
+    name/brand/category/description document (products.search_vector),
+    ranked with ts_rank. When that finds fewer than `limit` products the
+    rest are filled with trigram matches on the name, which tolerate typos.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def search(self, query: str, limit: int = 20, category: Optional[str] = None) -> List[Dict]:
+        """Search products by name, brand, category and description."""
+        terms = _TERM.findall(query.lower())
+        if not terms:
+            return []
+
+        results = self._full_text(terms, limit, category)
+        if len(results) < limit:
+            found = {result["id"] for result in results}
+            results.extend(
+                result for result in self._fuzzy(" ".join(terms), limit + len(found), category)
+                if result["id"] not in found
+            )
+        return results[:limit]
+
+    def _full_text(self, terms: List[str], limit: int, category: Optional[str]) -> List[Dict]:
+        tsquery = func.to_tsquery(SEARCH_CONFIG, " & ".join(f"{term}:*" for term in terms))
+        candidates = self.db.query(
+            Product.id, Product.name, Product.brand, Product.category, Product.image_url, Product.search_vector
+        ).filter(Product.search_vector.op("@@")(tsquery))
+        if category:
+            candidates = candidates.filter(Product.category == category)
+        # Ranking reads every matching document, so broad queries only rank
+        # the first RANK_CANDIDATES matches the index returns
+        candidates = candidates.limit(RANK_CANDIDATES).subquery()
+
+        score = func.ts_rank(candidates.c.search_vector, tsquery)
+        rows = (
+            self.db.query(
+                candidates.c.id, candidates.c.name, candidates.c.brand,
+                candidates.c.category, candidates.c.image_url, score.label("score")
+            )
+            .order_by(score.desc(), candidates.c.id)
+            .limit(limit)
+            .all()
+        )
+        return [self._result(row, "full_text") for row in rows]
+
+    def _fuzzy(self, text: str, limit: int, category: Optional[str]) -> List[Dict]:
+        # Scoped to the transaction; lets the trigram index apply the threshold
+        self.db.execute(
+            func.set_config("pg_trgm.word_similarity_threshold", str(FUZZY_THRESHOLD), True).select()
+        )
+        score = func.word_similarity(text, Product.name)
+        query = self.db.query(
+            Product.id, Product.name, Product.brand, Product.category, Product.image_url, score.label("score")
+        ).filter(literal(text).op("<%")(Product.name))
+        if category:
+            query = query.filter(Product.category == category)
+        rows = query.order_by(score.desc(), Product.id).limit(limit).all()
+        return [self._result(row, "fuzzy") for row in rows]
+
+    @staticmethod
+    def _result(row, match: str) -> Dict:
+        return {
+            "id": row.id,
+            "name": row.name,
+            "brand": row.brand,
+            "category": row.category,
+            "image_url": row.image_url,
+            "score": float(row.score),
+            "match": match
+        }
@@ -1,12 +1,17 @@
 import asyncio
-import aiohttp
-from bs4 import BeautifulSoup
 from typing import List, Dict, Optional
 from datetime import datetime
 import logging
 from sqlalchemy.orm import Session
 
-from api.models import Product, Price, Store
+from api.http_client import http_client, stop_http_client
+from api.models import Product, Store
+from api.retailers import RetailerAdapter, retailer_registry
+from api.rate_limit import RateLimiter, rate_limiters
+from api.response_cache import CachedResponse, response_cache
+from api.services.price_ingestion import PriceIngestionService
+from api.services.html_parsing import html_parser_pool
+from api.tasks.refresh_pool import RefreshPool, iter_product_chunks, count_products
 
 logger = logging.getLogger(__name__)
 
@@ -16,18 +21,16 @@ class WebScraper:
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        self.retailers = retailer_registry.scraped()
+        self._store_rate_limits: Optional[Dict[str, Dict]] = None
 
     async def scrape_product_prices(self, product: Product) -> List[Dict]:
-        """Scrape prices for a product from various sources."""
-        tasks = []
-        
-        # Add scraping tasks for different sources
-        tasks.append(self._scrape_amazon(product))
-        tasks.append(self._scrape_instacart(product))
-        tasks.append(self._scrape_peapod(product))
-        
+        """Scrape prices for a product from every scraped retailer."""
         # Run all scraping tasks concurrently
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = await asyncio.gather(
+            *(self._scrape(retailer, product) for retailer in self.retailers),
+            return_exceptions=True
+        )
         
         # Process results
         prices = []
@@ -40,171 +43,141 @@ class WebScraper:
         
         return prices
 
-    async def _scrape_amazon(self, product: Product) -> List[Dict]:
-        """Scrape prices from Amazon."""
+    async def _scrape(self, retailer: RetailerAdapter, product: Product) -> List[Dict]:
+        """Scrape a retailer's search result pages for a product."""
         try:
-            search_url = f"https://www.amazon.com/s?k={product.name.replace(' ', '+')}"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(search_url, headers=self.headers) as response:
-                    if response.status != 200:
-                        return []
-                    
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    prices = []
-                    for item in soup.select('.s-result-item'):
-                        price_elem = item.select_one('.a-price .a-offscreen')
-                        if not price_elem:
-                            continue
-                        
-                        price_text = price_elem.text.strip()
-                        if not price_text:
-                            continue
-                        
-                        try:
-                            price = float(price_text.replace('$', '').replace(',', ''))
-                            prices.append({
-                                'store_name': 'Amazon',
-                                'price': price,
-                                'currency': 'USD',
-                                'is_sale': False,
-                                'timestamp': datetime.utcnow()
-                            })
-                        except ValueError:
-                            continue
-                    
-                    return prices
-        except Exception as e:
-            logger.error(f"Amazon scraping error: {str(e)}")
-            return []
+            prices = []
+            validators = None
+            for page, url in enumerate(retailer.search_urls(product.name)):
+                # Only the first page is polled conditionally; if it hasn't
+                # changed since the last poll the listing is taken as unchanged
+                response = await self._fetch(retailer, url, conditional=page == 0)
+                if response is None:
+                    break
+                if page == 0:
+                    validators = response.validators
+                if response.unchanged:
+                    return [{
+                        'store_name': retailer.name,
+                        'unchanged': True,
+                        'timestamp': datetime.utcnow(),
+                        'validators': validators
+                    }]
+                page_prices = await html_parser_pool.extract_prices(
+                    response.text(), retailer.item_selector, retailer.price_selector, retailer.price_format
+                )
+                if not page_prices:
+                    break
+                prices.extend(page_prices)
 
-    async def _scrape_instacart(self, product: Product) -> List[Dict]:
-        """Scrape prices from Instacart."""
-        try:
-            search_url = f"https://www.instacart.com/search/{product.name.replace(' ', '%20')}"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(search_url, headers=self.headers) as response:
-                    if response.status != 200:
-                        return []
-                    
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    prices = []
-                    for item in soup.select('.product-card'):
-                        price_elem = item.select_one('.price')
-                        if not price_elem:
-                            continue
-                        
-                        price_text = price_elem.text.strip()
-                        if not price_text:
-                            continue
-                        
-                        try:
-                            price = float(price_text.replace('$', '').replace(',', ''))
-                            prices.append({
-                                'store_name': 'Instacart',
-                                'price': price,
-                                'currency': 'USD',
-                                'is_sale': False,
-                                'timestamp': datetime.utcnow()
-                            })
-                        except ValueError:
-                            continue
-                    
-                    return prices
+            return [
+                {
+                    'store_name': retailer.name,
+                    'price': price,
+                    'currency': retailer.price_format.get('currency', 'USD'),
+                    'is_sale': False,
+                    'timestamp': datetime.utcnow(),
+                    'validators': validators
+                }
+                for price in prices
+            ]
         except Exception as e:
-            logger.error(f"Instacart scraping error: {str(e)}")
+            logger.error(f"{retailer.name} scraping error: {str(e)}")
             return []
 
-    async def _scrape_peapod(self, product: Product) -> List[Dict]:
-        """Scrape prices from Peapod."""
-        try:
-            search_url = f"https://www.peapod.com/search/{product.name.replace(' ', '%20')}"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(search_url, headers=self.headers) as response:
-                    if response.status != 200:
-                        return []
-                    
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    prices = []
-                    for item in soup.select('.product-item'):
-                        price_elem = item.select_one('.price')
-                        if not price_elem:
-                            continue
-                        
-                        price_text = price_elem.text.strip()
-                        if not price_text:
-                            continue
-                        
-                        try:
-                            price = float(price_text.replace('$', '').replace(',', ''))
-                            prices.append({
-                                'store_name': 'Peapod',
-                                'price': price,
-                                'currency': 'USD',
-                                'is_sale': False,
-                                'timestamp': datetime.utcnow()
-                            })
-                        except ValueError:
-                            continue
-                    
-                    return prices
-        except Exception as e:
-            logger.error(f"Peapod scraping error: {str(e)}")
-            return []
+    async def _fetch(self, retailer: RetailerAdapter, url: str, conditional: bool = False) -> Optional[CachedResponse]:
+        """Download a page, at most `concurrency` at a time per retailer.
+
+        Returns None unless the page came back 200 or, for a conditional
+        fetch, unchanged since the last poll.
+        """
+        async with http_client.concurrency_limit(f"retailer:{retailer.name}", retailer.concurrency):
+            response = await response_cache.fetch(
+                self._rate_limiter(retailer), url, self.headers,
+                ttl=retailer.validators_ttl if conditional else 0
+            )
+        if response.unchanged or response.status == 200:
+            return response
+        return None
+
+    def _rate_limiter(self, retailer: RetailerAdapter) -> RateLimiter:
+        """The retailer's shared limiter; a store's api_config["rate_limit"] overrides the adapter."""
+        if self._store_rate_limits is None:
+            self._store_rate_limits = {}
+            if self.db is not None:
+                self._store_rate_limits = {
+                    name: (api_config or {}).get("rate_limit", {})
+                    for name, api_config in self.db.query(Store.name, Store.api_config)
+                }
+        return rate_limiters.get(retailer.name, {
+            **retailer.rate_limit,
+            **self._store_rate_limits.get(retailer.name, {})
+        })
 
 class ScrapingService:
     def __init__(self, db: Session):
         self.db = db
         self.scraper = WebScraper(db)
+        self.ingestion = PriceIngestionService(db)
 
     async def update_product_prices(self, product: Product) -> None:
         """Update product prices from web scraping."""
-        # Get scraped prices
-        scraped_prices = await self.scraper.scrape_product_prices(product)
-        
-        # Create store records for new stores if needed
-        for price_data in scraped_prices:
-            store = self.db.query(Store).filter(
-                Store.name == price_data['store_name']
-            ).first()
-            
-            if not store:
-                store = Store(
-                    name=price_data['store_name'],
-                    api_config={},
-                    is_active=True,
-                    created_at=datetime.utcnow(),
-                    updated_at=datetime.utcnow()
-                )
-                self.db.add(store)
-                self.db.commit()
-            
-            # Create price record
-            price = Price(
-                product_id=product.id,
-                store_id=store.id,
-                price=price_data['price'],
-                currency=price_data['currency'],
-                is_sale=price_data['is_sale'],
-                timestamp=price_data['timestamp']
-            )
-            self.db.add(price)
-        
-        # Update product's last price check
-        product.last_price_check = datetime.utcnow()
+        scraped = await self.fetch_prices([product])
+        self.write_prices([product], scraped)
         self.db.commit()
 
-    async def update_all_products(self) -> None:
-        """Update prices for all products."""
-        products = self.db.query(Product).all()
-        for product in products:
-            try:
-                await self.update_product_prices(product)
-            except Exception as e:
-                logger.error(f"Error updating prices for product {product.id}: {str(e)}")
-                continue 
\ No newline at end of file
+    async def fetch_prices(self, products: List[Product]) -> Dict[int, List[Dict]]:
+        """Scrape prices for several products concurrently, keyed by product id."""
+        results = await asyncio.gather(
+            *(self.scraper.scrape_product_prices(product) for product in products)
+        )
+        return {product.id: prices for product, prices in zip(products, results)}
+
+    def write_prices(self, products: List[Product], scraped: Dict[int, List[Dict]]) -> int:
+        """Ingest scraped prices and mark the products as checked, without committing.
+
+        The first pages' validators are remembered once the session commits.
+        Returns the number of price rows inserted; unchanged prices are skipped.
+        """
+        result = self.ingestion.ingest(
+            {'product_id': product_id, **price_data}
+            for product_id, scraped_prices in scraped.items()
+            for price_data in scraped_prices
+        )
+
+        # Update the products' last price check
+        self.db.query(Product).filter(
+            Product.id.in_([product.id for product in products])
+        ).update({Product.last_price_check: datetime.utcnow()}, synchronize_session=False)
+        response_cache.remember(
+            self.db,
+            (price_data.get('validators') for scraped_prices in scraped.values() for price_data in scraped_prices)
+        )
+        return result['inserted']
+
+    async def update_all_products(self, workers: int = 4, chunk_size: int = 25) -> Dict:
+        """Update prices for all products.
+
+        Streams the catalogue in keyset-paginated chunks through a
+        RefreshPool, so `workers` chunks are scraped at once while a single
+        writer commits the results in batches.
+        """
+        pool = RefreshPool(
+            "scraper",
+            self.db,
+            fetch=self.fetch_prices,
+            write=self.write_prices,
+            workers=workers
+        )
+        return await pool.run(
+            iter_product_chunks(self.db, chunk_size),
+            backlog=count_products(self.db)
+        )
+
+async def scrape_all_products(db: Session) -> None:
+    """Run one full scraping pass and release pooled connections and parser processes afterwards."""
+    try:
+        await ScrapingService(db).update_all_products()
+    finally:
+        await stop_http_client()
+        html_parser_pool.close()
@@ -0,0 +1,149 @@
+import os
+import asyncio
+import unicodedata
+import logging
+from typing import Dict, List, Optional
+from datetime import datetime
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from ..cache import LRUCache, cache
+from ..metrics import STORE_SEARCH_REQUESTS
+from ..models import Product
+from ..retailers import retailer_registry
+from ..store_apis import StoreAPIService
+
+logger = logging.getLogger(__name__)
+
+STORE_SEARCH_CACHE_PREFIX = "store-search:"
+# Used when no searched retailer sets cache.ttl_seconds
+STORE_SEARCH_CACHE_TTL = 900
+# The in-process L1 only smooths bursts; Redis holds results for the full TTL
+STORE_SEARCH_L1_TTL = 60
+
+_l1 = LRUCache(int(os.getenv("STORE_SEARCH_L1_SIZE", "1024")))
+# Upstream searches in flight, keyed like the cache, so identical searches share one
+_in_flight: Dict[str, asyncio.Future] = {}
+
+def normalize_query(query: str) -> str:
+    """Case-fold and collapse whitespace so equivalent queries share a cache entry."""
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+class StoreSearchService:
+    """Cross-store product search in front of StoreAPIService.search_all_stores.
+
+    Results are cached per normalized query in an in-process LRU and in
+    Redis, concurrent identical searches wait on a single upstream call,
+    and every product found is added to the local catalog. Partial results
+    (some store failed or timed out) are returned but not cached.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.store_api = StoreAPIService(db)
+
+    async def search(self, query: str, deadline: Optional[float] = None) -> Dict:
+        """Search all stores, returning products plus failed, timed_out and unavailable stores."""
+        normalized = normalize_query(query)
+        key = STORE_SEARCH_CACHE_PREFIX + normalized
+
+        result = _l1.get(key)
+        if result is None:
+            result = cache.get_json(key)
+            if result is not None:
+                _l1.set(key, result, STORE_SEARCH_L1_TTL)
+        if result is not None:
+            STORE_SEARCH_REQUESTS.labels("cache").inc()
+            return {**result, "cached": True}
+
+        task = _in_flight.get(key)
+        if task is None:
+            STORE_SEARCH_REQUESTS.labels("upstream").inc()
+            task = _in_flight[key] = asyncio.ensure_future(self._search_upstream(key, normalized, deadline))
+            task.add_done_callback(lambda done: _in_flight.pop(key, None) if _in_flight.get(key) is done else None)
+        else:
+            STORE_SEARCH_REQUESTS.labels("coalesced").inc()
+        # Shielded so a caller going away doesn't cancel the search for the others
+        return {**await asyncio.shield(task), "cached": False}
+
+    async def _search_upstream(self, key: str, query: str, deadline: Optional[float]) -> Dict:
+        result = await self.store_api.search_all_stores(query, deadline)
+        result["products"] = self._persist(result["products"])
+
+        if not (result["failed"] or result["timed_out"] or result["unavailable"]):
+            ttl = self._cache_ttl()
+            cache.set_json(key, result, ttl)
+            _l1.set(key, result, min(ttl, STORE_SEARCH_L1_TTL))
+        return result
+
+    def _cache_ttl(self) -> int:
+        """The shortest cache.ttl_seconds among the searched (API-kind) retailers."""
+        ttls = [
+            adapter.cache_ttl
+            for adapter in (retailer_registry.get(store.name) for store in self.store_api.stores)
+            if adapter is not None and adapter.kind == "api" and adapter.cache_ttl > 0
+        ]
+        return min(ttls) if ttls else STORE_SEARCH_CACHE_TTL
+
+    def _persist(self, products: List[Dict]) -> List[Dict]:
+        """Add newly discovered products to the catalog and tag every result with its product_id.
+
+        Products are matched on (store_id, store_product_id), then on
+        barcode; results without a store_product_id are not stored.
+        """
+        keyed = [product for product in products if product.get("store_product_id")]
+        if not keyed:
+            return products
+
+        store_keys = {(product["store_id"], str(product["store_product_id"])) for product in keyed}
+        barcodes = {product["barcode"] for product in keyed if product.get("barcode")}
+
+        def lookup() -> Dict:
+            ids = {
+                (row.store_id, row.store_product_id): row.id
+                for row in self.db.query(Product.id, Product.store_id, Product.store_product_id)
+                .filter(tuple_(Product.store_id, Product.store_product_id).in_(list(store_keys)))
+            }
+            if barcodes:
+                ids.update(
+                    self.db.query(Product.barcode, Product.id).filter(Product.barcode.in_(barcodes)).all()
+                )
+            return ids
+
+        ids = lookup()
+        now = datetime.utcnow()
+        missing = {}
+        for product in keyed:
+            store_key = (product["store_id"], str(product["store_product_id"]))
+            if store_key not in ids and product.get("barcode") not in ids:
+                missing.setdefault(store_key, {
+                    "name": product.get("name"),
+                    "brand": product.get("brand"),
+                    "category": product.get("category"),
+                    "description": product.get("description"),
+                    "image_url": product.get("image_url"),
+                    "barcode": product.get("barcode"),
+                    "store_product_id": store_key[1],
+                    "store_id": product["store_id"],
+                    "last_price_check": now,
+                    "created_at": now,
+                    "updated_at": now
+                })
+
+        if missing:
+            # Another search may have added the same barcode meanwhile
+            self.db.execute(
+                pg_insert(Product)
+                .values(list(missing.values()))
+                .on_conflict_do_nothing(index_elements=[Product.barcode])
+            )
+            self.db.commit()
+            ids = lookup()
+            logger.info(f"Added {len(missing)} products to the catalog from store search")
+
+        for product in keyed:
+            product["product_id"] = ids.get(
+                (product["store_id"], str(product["store_product_id"])), ids.get(product.get("barcode"))
+            )
+        return products
@@ -1,274 +1,379 @@
 import os
 import json
-import aiohttp
+import math
 import asyncio
-from typing import List, Dict, Optional
+from typing import Any, Awaitable, Callable, List, Dict, Optional, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
 
-from api.models import Store, Product, Price
+from api.models import Store, Product
 from api.database import get_db
+from api.http_client import http_client
+from api.retailers import retailer_registry
+from api.rate_limit import rate_limiters
+from api.response_cache import Validators, response_cache
+from api.resilience import circuit_breakers, hedged
+from api.metrics import STORE_CALLS_TIMED_OUT
+from api.services.price_ingestion import PriceIngestionService
+
+# Seconds a cross-store search or price lookup waits before returning what it has
+STORE_API_DEADLINE = float(os.getenv("STORE_API_DEADLINE", "3"))
+# Seconds before a slow store call is hedged with a second attempt (0 disables)
+STORE_API_HEDGE_AFTER = float(os.getenv("STORE_API_HEDGE_AFTER", "0"))
 
 class StoreAPIError(Exception):
     pass
 
 class StoreAPIClient:
+    """Talks to one store's API as described by its retailer adapter."""
+
     def __init__(self, store: Store):
         self.store = store
+        self.adapter = retailer_registry.get(store.name)
         self.api_config = store.api_config
         self.base_url = self.api_config.get("base_url")
         self.api_key = self.api_config.get("api_key")
+        prices_endpoint = self.adapter.endpoint("prices") if self.adapter else None
+        self.batch_size = self.api_config.get(
+            "batch_size", prices_endpoint.get("batch_size", 20) if prices_endpoint else 20
+        )
+        self.max_concurrency = self.api_config.get(
+            "max_concurrency", self.adapter.concurrency if self.adapter else 5
+        )
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self.rate_limiter = rate_limiters.get(store.name, {
+            **(self.adapter.rate_limit if self.adapter else {}),
+            **self.api_config.get("rate_limit", {})
+        })
+
+    @property
+    def has_api(self) -> bool:
+        """Whether the store is queried through an API (scrape-kind stores are not)."""
+        return self.adapter is not None and self.adapter.kind == "api"
+
+    def _require_api(self) -> None:
+        if not self.has_api:
+            raise StoreAPIError(f"Unsupported store: {self.store.name}")
+
+    def _endpoint(self, name: str) -> Dict:
+        self._require_api()
+        endpoint = self.adapter.endpoint(name)
+        if endpoint is None:
+            raise StoreAPIError(f"{self.store.name} has no {name} endpoint")
+        return endpoint
+
+    async def _get(self, path: str, params: Optional[Dict] = None) -> Dict:
+        url = f"{self.base_url}{path}"
+        async with self.rate_limiter.request("GET", url, headers=self.headers, params=params) as response:
+            if response.status != 200:
+                raise StoreAPIError(f"{self.store.name} API error: {response.status}")
+            return await response.json()
+
+    async def _get_if_changed(
+        self,
+        path: str,
+        params: Optional[Dict] = None
+    ) -> Tuple[Optional[Dict], Optional[Validators]]:
+        """Like _get, but conditional: returns (data, validators), data None if unchanged since the last poll.
+
+        The validators are for write_prices to remember once the prices are committed.
+        """
+        response = await response_cache.fetch(
+            self.rate_limiter, f"{self.base_url}{path}", self.headers, params, self.adapter.validators_ttl
+        )
+        if response.unchanged:
+            return None, response.validators
+        if response.status != 200:
+            raise StoreAPIError(f"{self.store.name} API error: {response.status}")
+        return response.json(), response.validators
 
     async def search_products(self, query: str) -> List[Dict]:
         """Search for products in the store's catalog."""
-        if self.store.name == "Walmart":
-            return await self._walmart_search(query)
-        elif self.store.name == "Kroger":
-            return await self._kroger_search(query)
-        elif self.store.name == "Target":
-            return await self._target_search(query)
-        else:
-            raise StoreAPIError(f"Unsupported store: {self.store.name}")
+        endpoint = self._endpoint("search")
+        params = dict(endpoint.get("params", {}))
+        params[endpoint["query_param"]] = query
+        data = await self._get(endpoint["path"], params)
+        return [self.adapter.parse_product(item) for item in data.get(endpoint["items"], [])]
 
     async def get_product_price(self, product_id: str) -> Dict:
         """Get current price for a specific product."""
-        if self.store.name == "Walmart":
-            return await self._walmart_get_price(product_id)
-        elif self.store.name == "Kroger":
-            return await self._kroger_get_price(product_id)
-        elif self.store.name == "Target":
-            return await self._target_get_price(product_id)
-        else:
-            raise StoreAPIError(f"Unsupported store: {self.store.name}")
+        endpoint = self._endpoint("price")
+        data = await self._get(endpoint["path"].format(product_id=product_id))
+        return self.adapter.parse_price(data)
 
-    async def _walmart_search(self, query: str) -> List[Dict]:
-        """Search Walmart's product catalog."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/items/search"
-            params = {
-                "query": query,
-                "limit": 20
-            }
-            async with session.get(url, headers=self.headers, params=params) as response:
-                if response.status != 200:
-                    raise StoreAPIError(f"Walmart API error: {response.status}")
-                data = await response.json()
-                return self._parse_walmart_products(data)
-
-    async def _kroger_search(self, query: str) -> List[Dict]:
-        """Search Kroger's product catalog."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/products/search"
-            params = {
-                "term": query,
-                "limit": 20
-            }
-            async with session.get(url, headers=self.headers, params=params) as response:
-                if response.status != 200:
-                    raise StoreAPIError(f"Kroger API error: {response.status}")
-                data = await response.json()
-                return self._parse_kroger_products(data)
-
-    async def _target_search(self, query: str) -> List[Dict]:
-        """Search Target's product catalog."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/products/search"
-            params = {
-                "searchTerm": query,
-                "limit": 20
-            }
-            async with session.get(url, headers=self.headers, params=params) as response:
-                if response.status != 200:
-                    raise StoreAPIError(f"Target API error: {response.status}")
-                data = await response.json()
-                return self._parse_target_products(data)
-
-    async def _walmart_get_price(self, product_id: str) -> Dict:
-        """Get price from Walmart."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/items/{product_id}/price"
-            async with session.get(url, headers=self.headers) as response:
-                if response.status != 200:
-                    raise StoreAPIError(f"Walmart API error: {response.status}")
-                data = await response.json()
-                return self._parse_walmart_price(data)
-
-    async def _kroger_get_price(self, product_id: str) -> Dict:
-        """Get price from Kroger."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/products/{product_id}/price"
-            async with session.get(url, headers=self.headers) as response:
-                if response.status != 200:
-                    raise StoreAPIError(f"Kroger API error: {response.status}")
-                data = await response.json()
-                return self._parse_kroger_price(data)
-
-    async def _target_get_price(self, product_id: str) -> Dict:
-        """Get price from Target."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/products/{product_id}/price"
-            async with session.get(url, headers=self.headers) as response:
-                if response.status != 200:
-                    raise StoreAPIError(f"Target API error: {response.status}")
-                data = await response.json()
-                return self._parse_target_price(data)
-
-    def _parse_walmart_products(self, data: Dict) -> List[Dict]:
-        """Parse Walmart product search results."""
-        products = []
-        for item in data.get("items", []):
-            products.append({
-                "name": item.get("name"),
-                "brand": item.get("brand"),
-                "category": item.get("category"),
-                "description": item.get("description"),
-                "image_url": item.get("imageUrl"),
-                "barcode": item.get("upc"),
-                "store_product_id": item.get("itemId"),
-                "price": item.get("price", {}).get("amount"),
-                "currency": item.get("price", {}).get("currency"),
-                "is_sale": item.get("price", {}).get("isSale", False),
-                "sale_end_date": item.get("price", {}).get("saleEndDate")
-            })
-        return products
-
-    def _parse_kroger_products(self, data: Dict) -> List[Dict]:
-        """Parse Kroger product search results."""
-        products = []
-        for item in data.get("products", []):
-            products.append({
-                "name": item.get("description"),
-                "brand": item.get("brand"),
-                "category": item.get("category"),
-                "description": item.get("longDescription"),
-                "image_url": item.get("imageUrl"),
-                "barcode": item.get("upc"),
-                "store_product_id": item.get("productId"),
-                "price": item.get("price", {}).get("regular"),
-                "currency": "USD",
-                "is_sale": item.get("price", {}).get("sale") is not None,
-                "sale_end_date": item.get("price", {}).get("saleEndDate")
-            })
-        return products
-
-    def _parse_target_products(self, data: Dict) -> List[Dict]:
-        """Parse Target product search results."""
-        products = []
-        for item in data.get("products", []):
-            products.append({
-                "name": item.get("title"),
-                "brand": item.get("brand"),
-                "category": item.get("category"),
-                "description": item.get("description"),
-                "image_url": item.get("imageUrl"),
-                "barcode": item.get("tcin"),
-                "store_product_id": item.get("productId"),
-                "price": item.get("price", {}).get("current"),
-                "currency": "USD",
-                "is_sale": item.get("price", {}).get("isOnSale", False),
-                "sale_end_date": item.get("price", {}).get("saleEndDate")
-            })
-        return products
-
-    def _parse_walmart_price(self, data: Dict) -> Dict:
-        """Parse Walmart price data."""
-        return {
-            "price": data.get("price", {}).get("amount"),
-            "currency": data.get("price", {}).get("currency"),
-            "is_sale": data.get("price", {}).get("isSale", False),
-            "sale_end_date": data.get("price", {}).get("saleEndDate")
-        }
+    async def get_product_prices(self, product_ids: List[str]) -> Dict[str, Dict]:
+        """Get current prices for many products, keyed by store product id.
 
-    def _parse_kroger_price(self, data: Dict) -> Dict:
-        """Parse Kroger price data."""
-        return {
-            "price": data.get("price", {}).get("regular"),
-            "currency": "USD",
-            "is_sale": data.get("price", {}).get("sale") is not None,
-            "sale_end_date": data.get("price", {}).get("saleEndDate")
-        }
+        Uses the retailer's multi-id endpoint where there is one, otherwise
+        fans out single lookups with bounded concurrency. Lookups are
+        conditional: products whose response hasn't changed since the last
+        poll map to {"unchanged": True} instead of a parsed price. Every
+        entry carries its response's "validators". Products whose lookup
+        fails are left out of the result.
+        """
+        product_ids = list(dict.fromkeys(pid for pid in product_ids if pid))
+        self._require_api()
+        if self.adapter.endpoint("prices") is None:
+            return await self._fan_out_prices(product_ids)
+
+        semaphore = self._concurrency_limit()
+
+        async def fetch(batch: List[str]) -> Dict[str, Dict]:
+            async with semaphore:
+                return await self._get_prices_batch(batch)
+
+        batches = [product_ids[i:i + self.batch_size] for i in range(0, len(product_ids), self.batch_size)]
+        results = await asyncio.gather(*(fetch(batch) for batch in batches), return_exceptions=True)
+
+        prices = {}
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                print(f"Error getting {len(batch)} prices from {self.store.name}: {str(result)}")
+                continue
+            prices.update(result)
+        return prices
+
+    def estimate_requests(self, product_count: int) -> int:
+        """Number of requests get_product_prices makes for `product_count` products."""
+        if not self.has_api:
+            return 0
+        if self.adapter is not None and self.adapter.endpoint("prices") is not None:
+            return math.ceil(product_count / self.batch_size)
+        return product_count
 
-    def _parse_target_price(self, data: Dict) -> Dict:
-        """Parse Target price data."""
+    async def _get_prices_batch(self, product_ids: List[str]) -> Dict[str, Dict]:
+        """Get prices for up to `batch_size` products in one request."""
+        endpoint = self._endpoint("prices")
+        data, validators = await self._get_if_changed(
+            endpoint["path"], {endpoint["ids_param"]: ",".join(product_ids)}
+        )
+        if data is None:
+            return {product_id: {"unchanged": True, "validators": validators} for product_id in product_ids}
         return {
-            "price": data.get("price", {}).get("current"),
-            "currency": "USD",
-            "is_sale": data.get("price", {}).get("isOnSale", False),
-            "sale_end_date": data.get("price", {}).get("saleEndDate")
+            str(item.get(endpoint["id_field"])): {**self.adapter.parse_price(item), "validators": validators}
+            for item in data.get(endpoint["items"], [])
         }
 
+    async def _fan_out_prices(self, product_ids: List[str]) -> Dict[str, Dict]:
+        """Look prices up one by one, at most `max_concurrency` at a time."""
+        semaphore = self._concurrency_limit()
+
+        async def fetch(product_id: str) -> Dict:
+            async with semaphore:
+                return await self._get_price_if_changed(product_id)
+
+        results = await asyncio.gather(*(fetch(pid) for pid in product_ids), return_exceptions=True)
+
+        prices = {}
+        for product_id, result in zip(product_ids, results):
+            if isinstance(result, Exception):
+                print(f"Error getting price for {product_id} from {self.store.name}: {str(result)}")
+                continue
+            prices[product_id] = result
+        return prices
+
+    async def _get_price_if_changed(self, product_id: str) -> Dict:
+        endpoint = self._endpoint("price")
+        data, validators = await self._get_if_changed(endpoint["path"].format(product_id=product_id))
+        if data is None:
+            return {"unchanged": True, "validators": validators}
+        return {**self.adapter.parse_price(data), "validators": validators}
+
+    def _concurrency_limit(self) -> asyncio.Semaphore:
+        """Per-store cap on in-flight requests, shared by every client of the store."""
+        return http_client.concurrency_limit(f"retailer:{self.store.name}", self.max_concurrency)
+
 class StoreAPIService:
     def __init__(self, db: Session):
         self.db = db
         self.stores = self._load_stores()
+        self.ingestion = PriceIngestionService(db)
 
     def _load_stores(self) -> List[Store]:
         """Load all active stores from the database."""
         return self.db.query(Store).filter(Store.is_active == True).all()
 
-    async def search_all_stores(self, query: str) -> List[Dict]:
-        """Search for products across all stores."""
-        tasks = []
+    async def _call_stores(
+        self,
+        call: Callable[[StoreAPIClient], Awaitable[Any]],
+        deadline: Optional[float] = None,
+        hedge_after: Optional[float] = None
+    ) -> Tuple[List[Tuple[Store, Any]], Dict[str, List[str]]]:
+        """Run `call` against every store at once and stop waiting at the deadline.
+
+        Stores without an API (scrape-kind retailers) are left out, and
+        stores whose circuit breaker is open are skipped; errors and missed
+        deadlines count against their breaker. Returns (store, result) pairs
+        for the stores that answered in time, and the names of stores that
+        "failed", "timed_out" or were "unavailable".
+        """
+        deadline = STORE_API_DEADLINE if deadline is None else deadline
+        hedge_after = STORE_API_HEDGE_AFTER if hedge_after is None else hedge_after
+        status: Dict[str, List[str]] = {"failed": [], "timed_out": [], "unavailable": []}
+
+        tasks = {}
         for store in self.stores:
             client = StoreAPIClient(store)
-            tasks.append(client.search_products(query))
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        products = []
-        for store, result in zip(self.stores, results):
-            if isinstance(result, Exception):
-                print(f"Error searching {store.name}: {str(result)}")
+            if not client.has_api:
                 continue
-            
+            breaker = circuit_breakers.get(store.name, store.api_config.get("circuit_breaker", {}))
+            if not breaker.allow():
+                status["unavailable"].append(store.name)
+                continue
+            task = asyncio.ensure_future(hedged(lambda client=client: call(client), hedge_after, store.name))
+            tasks[task] = (store, breaker)
+        if not tasks:
+            return [], status
+
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+
+        results = []
+        for task, (store, breaker) in tasks.items():
+            if task in pending:
+                task.cancel()
+                breaker.record_failure()
+                STORE_CALLS_TIMED_OUT.labels(store.name).inc()
+                status["timed_out"].append(store.name)
+            elif task.exception() is not None:
+                breaker.record_failure()
+                print(f"Error calling {store.name}: {str(task.exception())}")
+                status["failed"].append(store.name)
+            else:
+                breaker.record_success()
+                results.append((store, task.result()))
+        return results, status
+
+    async def search_all_stores(
+        self,
+        query: str,
+        deadline: Optional[float] = None,
+        hedge_after: Optional[float] = None
+    ) -> Dict:
+        """Search for products across all stores.
+
+        Returns within `deadline` seconds with the products found so far,
+        plus the stores that failed, timed out or were skipped.
+        """
+        results, status = await self._call_stores(
+            lambda client: client.search_products(query), deadline, hedge_after
+        )
+
+        products = []
+        for store, result in results:
             for product in result:
                 product["store_name"] = store.name
                 product["store_id"] = store.id
                 products.append(product)
-        
-        return products
 
-    async def get_all_prices(self, product_id: str) -> List[Dict]:
-        """Get current prices for a product from all stores."""
-        tasks = []
-        for store in self.stores:
-            client = StoreAPIClient(store)
-            tasks.append(client.get_product_price(product_id))
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
+        return {"products": products, **status}
+
+    async def get_all_prices(
+        self,
+        product_id: str,
+        deadline: Optional[float] = None,
+        hedge_after: Optional[float] = None
+    ) -> Dict:
+        """Get current prices for a product from all stores.
+
+        Returns within `deadline` seconds with the prices received so far,
+        plus the stores that failed, timed out or were skipped.
+        """
+        results, status = await self._call_stores(
+            lambda client: client.get_product_price(product_id), deadline, hedge_after
+        )
+
         prices = []
-        for store, result in zip(self.stores, results):
-            if isinstance(result, Exception):
-                print(f"Error getting price from {store.name}: {str(result)}")
-                continue
-            
-            price = result
+        for store, price in results:
             price["store_name"] = store.name
             price["store_id"] = store.id
             prices.append(price)
-        
-        return prices
+
+        return {"prices": prices, **status}
 
     async def update_product_prices(self, product: Product) -> None:
         """Update prices for a product from all stores."""
-        prices = await self.get_all_prices(product.store_product_id)
-        
-        for price_data in prices:
-            price = Price(
-                product_id=product.id,
-                store_id=price_data["store_id"],
-                price=price_data["price"],
-                currency=price_data["currency"],
-                is_sale=price_data["is_sale"],
-                sale_end_date=price_data["sale_end_date"],
-                timestamp=datetime.utcnow()
-            )
-            self.db.add(price)
-        
-        product.last_price_check = datetime.utcnow()
-        self.db.commit() 
\ No newline at end of file
+        await self.update_prices_bulk([product])
+
+    async def update_prices_bulk(self, products: List[Product]) -> int:
+        """Refresh prices for many products from every store at once.
+
+        Each store is queried with batched lookups concurrently with the
+        others, and all results go through the ingestion pipeline. Returns
+        the number of price rows inserted.
+        """
+        observations = await self.fetch_prices_bulk(products)
+        written = self.write_prices(products, observations)
+        self.db.commit()
+        return written
+
+    async def fetch_prices_bulk(self, products: List[Product]) -> List[Dict]:
+        """Fetch current prices for many products from every store.
+
+        Only reads `id` and `store_product_id` from each product and never
+        touches the session, so it is safe to run from concurrent workers.
+        Returns price observations ready for write_prices.
+        """
+        products_by_store_id: Dict[str, List[Product]] = {}
+        for product in products:
+            if product.store_product_id:
+                products_by_store_id.setdefault(product.store_product_id, []).append(product)
+
+        clients = [client for client in (StoreAPIClient(store) for store in self.stores) if client.has_api]
+        results = await asyncio.gather(
+            *(client.get_product_prices(list(products_by_store_id)) for client in clients),
+            return_exceptions=True
+        )
+
+        timestamp = datetime.utcnow()
+        observations = []
+        for store, result in zip((client.store for client in clients), results):
+            if isinstance(result, Exception):
+                print(f"Error getting prices from {store.name}: {str(result)}")
+                continue
+
+            for store_product_id, price_data in result.items():
+                if price_data.get("unchanged"):
+                    # Nothing new since the last poll; ingestion just confirms the current price
+                    observations.extend(
+                        {
+                            "product_id": product.id,
+                            "store_id": store.id,
+                            "unchanged": True,
+                            "timestamp": timestamp,
+                            "validators": price_data["validators"]
+                        }
+                        for product in products_by_store_id.get(store_product_id, [])
+                    )
+                    continue
+                if price_data.get("price") is None:
+                    continue
+                for product in products_by_store_id.get(store_product_id, []):
+                    observations.append({
+                        "product_id": product.id,
+                        "store_id": store.id,
+                        "price": price_data["price"],
+                        "currency": price_data["currency"],
+                        "is_sale": price_data["is_sale"],
+                        "sale_end_date": price_data["sale_end_date"],
+                        "timestamp": timestamp,
+                        "validators": price_data["validators"]
+                    })
+        return observations
+
+    def write_prices(self, products: List[Product], observations: List[Dict]) -> int:
+        """Ingest fetched prices and mark the products as checked, without committing.
+
+        The responses' validators are remembered once the session commits.
+        Returns the number of price rows inserted; unchanged prices are skipped.
+        """
+        result = self.ingestion.ingest(observations)
+
+        if products:
+            self.db.query(Product).filter(
+                Product.id.in_([product.id for product in products])
+            ).update({Product.last_price_check: datetime.utcnow()}, synchronize_session=False)
+        response_cache.remember(self.db, (obs.get("validators") for obs in observations))
+        return result["inserted"]
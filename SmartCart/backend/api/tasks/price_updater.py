@@ -1,16 +1,28 @@
+import os
 import asyncio
 import logging
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from typing import Dict, Optional
 from ..database import SessionLocal
-from ..services.store_integration import StoreIntegrationService
-from ..models import Product, Price
+from ..store_apis import StoreAPIService, StoreAPIClient
+from .refresh_pool import RefreshPool, iter_chunks
+from .refresh_scheduler import RefreshScheduler
 
 logger = logging.getLogger(__name__)
 
 class PriceUpdater:
-    def __init__(self, update_interval: int = 3600):  # Default: 1 hour
+    def __init__(
+        self,
+        update_interval: int = 3600,  # Default: 1 hour
+        chunk_size: int = 500,
+        workers: int = 4,
+        commit_every: int = 2000,
+        request_budget: Optional[int] = None
+    ):
         self.update_interval = update_interval
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.commit_every = commit_every
+        self.request_budget = request_budget
         self.is_running = False
 
     async def start(self):
@@ -27,41 +39,44 @@ class PriceUpdater:
         """Stop the price update task."""
         self.is_running = False
 
-    async def update_prices(self):
-        """Update prices for all products."""
+    async def update_prices(self) -> Dict:
+        """Refresh the most urgent products within this cycle's request budget.
+
+        RefreshScheduler ranks products by volatility, sale activity,
+        demand and staleness and picks as many as `request_budget` store
+        requests can cover. They are fed in priority order, in chunks, to
+        `workers` concurrent fetchers (each chunk is one batched lookup per
+        store, capped per store by its `max_concurrency`), and a single
+        writer bulk-inserts the results, committing every `commit_every`
+        products.
+        """
         db = SessionLocal()
         try:
-            async with StoreIntegrationService(db) as store_service:
-                # Get products that need price updates
-                products = self._get_products_to_update(db)
-                
-                # Update prices for each product
-                for product in products:
-                    try:
-                        await store_service.update_prices()
-                        self._update_last_checked(db, product)
-                    except Exception as e:
-                        logger.error(f"Error updating prices for product {product.id}: {str(e)}")
+            store_service = StoreAPIService(db)
+            # Scrape-kind stores make no API requests, so they don't spend the budget
+            clients = [
+                client for client in (StoreAPIClient(store) for store in store_service.stores)
+                if client.has_api
+            ]
+            products = RefreshScheduler(db).next_products(
+                clients, self.request_budget, self.chunk_size
+            )
+            pool = RefreshPool(
+                "store_api",
+                db,
+                fetch=store_service.fetch_prices_bulk,
+                write=store_service.write_prices,
+                workers=self.workers,
+                commit_every=self.commit_every
+            )
+            return await pool.run(iter_chunks(products, self.chunk_size), backlog=len(products))
         finally:
             db.close()
 
-    def _get_products_to_update(self, db: Session) -> List[Product]:
-        """Get products that need price updates."""
-        # Get products that haven't been checked in the last hour
-        one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-        return (
-            db.query(Product)
-            .filter(Product.last_price_check < one_hour_ago)
-            .all()
-        )
-
-    def _update_last_checked(self, db: Session, product: Product):
-        """Update the last price check timestamp for a product."""
-        product.last_price_check = datetime.utcnow()
-        db.commit()
-
 # Create a singleton instance
-price_updater = PriceUpdater()
+price_updater = PriceUpdater(
+    request_budget=int(os.getenv("PRICE_REFRESH_REQUEST_BUDGET", "10000")) or None
+)
 
 # Function to start the price updater
 async def start_price_updater():
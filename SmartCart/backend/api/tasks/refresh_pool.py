@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from ..models import Product
+from ..metrics import (
+    PRICE_REFRESH_PRODUCTS,
+    PRICE_REFRESH_OBSERVATIONS,
+    PRICE_REFRESH_BACKLOG,
+    PRICE_REFRESH_THROUGHPUT,
+    PRICE_REFRESH_CYCLE_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+def _stale_products(db: Session, stale_before: Optional[datetime]):
+    query = db.query(Product.id, Product.name, Product.store_product_id)
+    if stale_before is not None:
+        query = query.filter(or_(
+            Product.last_price_check < stale_before,
+            Product.last_price_check.is_(None)
+        ))
+    return query
+
+def count_products(db: Session, stale_before: Optional[datetime] = None) -> int:
+    """Count the products iter_product_chunks would yield."""
+    return _stale_products(db, stale_before).count()
+
+async def iter_product_chunks(
+    db: Session,
+    chunk_size: int,
+    stale_before: Optional[datetime] = None
+) -> AsyncIterator[List]:
+    """Stream products in id order using keyset pagination.
+
+    Yields lightweight rows (id, name, store_product_id) rather than ORM
+    objects, so batched commits elsewhere never expire or reload them.
+    """
+    last_id = 0
+    while True:
+        chunk = (
+            _stale_products(db, stale_before)
+            .filter(Product.id > last_id)
+            .order_by(Product.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not chunk:
+            return
+        last_id = chunk[-1].id
+        yield chunk
+
+async def iter_chunks(items: List, chunk_size: int) -> AsyncIterator[List]:
+    """Feed an already-selected list of products to a RefreshPool in chunks."""
+    for i in range(0, len(items), chunk_size):
+        yield items[i:i + chunk_size]
+
+class RefreshPool:
+    """Producer, N fetch workers and one batched writer for price refreshes.
+
+    `fetch(chunk)` does the network work and must not touch the session;
+    `write(chunk, result)` persists one chunk without committing and
+    returns the number of observations written. Each chunk is written in
+    its own savepoint so a bad chunk never discards its neighbours, and
+    the writer commits every `commit_every` products.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        db: Session,
+        fetch: Callable[[List], Awaitable[Any]],
+        write: Callable[[List, Any], int],
+        workers: int = 8,
+        commit_every: int = 1000
+    ):
+        self.name = name
+        self.db = db
+        self.fetch = fetch
+        self.write = write
+        self.workers = workers
+        self.commit_every = commit_every
+
+    async def run(self, chunks: AsyncIterator[List], backlog: int = 0) -> Dict:
+        """Refresh every chunk produced by `chunks` and return cycle statistics."""
+        stats = {"products": 0, "failed": 0, "observations": 0}
+        PRICE_REFRESH_BACKLOG.labels(self.name).set(backlog)
+        fetch_queue: asyncio.Queue = asyncio.Queue(maxsize=self.workers * 2)
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=self.workers * 2)
+        start = time.monotonic()
+
+        workers = [
+            asyncio.create_task(self._fetch_worker(fetch_queue, write_queue, stats))
+            for _ in range(self.workers)
+        ]
+        writer = asyncio.create_task(self._writer(write_queue, stats))
+        try:
+            async for chunk in chunks:
+                await fetch_queue.put(chunk)
+            for _ in workers:
+                await fetch_queue.put(None)
+            await asyncio.gather(*workers)
+            await write_queue.put(None)
+            await writer
+        finally:
+            for task in workers + [writer]:
+                task.cancel()
+
+        elapsed = time.monotonic() - start
+        stats["elapsed_seconds"] = elapsed
+        stats["products_per_second"] = stats["products"] / elapsed if elapsed else 0.0
+        PRICE_REFRESH_THROUGHPUT.labels(self.name).set(stats["products_per_second"])
+        PRICE_REFRESH_CYCLE_SECONDS.labels(self.name).observe(elapsed)
+        PRICE_REFRESH_BACKLOG.labels(self.name).set(0)
+        logger.info(
+            f"{self.name} refresh: {stats['products']} products, {stats['failed']} failed, "
+            f"{stats['observations']} prices in {elapsed:.1f}s "
+            f"({stats['products_per_second']:.1f} products/s)"
+        )
+        return stats
+
+    async def _fetch_worker(self, fetch_queue: asyncio.Queue, write_queue: asyncio.Queue, stats: Dict) -> None:
+        while True:
+            chunk = await fetch_queue.get()
+            if chunk is None:
+                return
+            try:
+                result = await self.fetch(chunk)
+            except Exception as e:
+                logger.error(f"Error fetching prices for {len(chunk)} products: {str(e)}")
+                self._record(stats, chunk, "failed")
+                continue
+            await write_queue.put((chunk, result))
+
+    async def _writer(self, write_queue: asyncio.Queue, stats: Dict) -> None:
+        pending = 0
+        while True:
+            item = await write_queue.get()
+            if item is None:
+                break
+            chunk, result = item
+            try:
+                with self.db.begin_nested():
+                    written = self.write(chunk, result)
+            except Exception as e:
+                logger.error(f"Error writing prices for {len(chunk)} products: {str(e)}")
+                self._record(stats, chunk, "failed")
+                continue
+
+            stats["observations"] += written
+            PRICE_REFRESH_OBSERVATIONS.labels(self.name).inc(written)
+            self._record(stats, chunk, "updated")
+            pending += len(chunk)
+            if pending >= self.commit_every:
+                self.db.commit()
+                pending = 0
+        self.db.commit()
+
+    def _record(self, stats: Dict, chunk: List, result: str) -> None:
+        stats["products" if result == "updated" else "failed"] += len(chunk)
+        PRICE_REFRESH_PRODUCTS.labels(self.name, result).inc(len(chunk))
+        PRICE_REFRESH_BACKLOG.labels(self.name).dec(len(chunk))
@@ -0,0 +1,147 @@
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import Float, cast, extract, func, or_, select
+from sqlalchemy.orm import Session
+from ..models import Product, PriceDailyRollup, ShoppingListItem, PriceAlert
+from ..store_apis import StoreAPIClient
+from ..metrics import PRICE_REFRESH_SCHEDULED, PRICE_REFRESH_DEFERRED
+
+logger = logging.getLogger(__name__)
+
+class RefreshScheduler:
+    """Ranks products by how urgently their prices need refreshing.
+
+    priority = hours since last check (capped at `max_staleness_hours`)
+               * (1 + volatility_weight * relative price range
+                    + sale_weight * share of sale observations
+                    + demand_weight * ln(1 + list items + active alerts))
+
+    Volatility and sale activity come from the daily rollups over the last
+    `window_days`. Staleness is a factor rather than a term, so stable,
+    unpopular products still climb the queue the longer they wait.
+    Products checked within `min_interval` are never scheduled.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        window_days: int = 14,
+        min_interval: timedelta = timedelta(minutes=15),
+        max_staleness_hours: float = 168.0,
+        volatility_weight: float = 5.0,
+        sale_weight: float = 2.0,
+        demand_weight: float = 1.0
+    ):
+        self.db = db
+        self.window_days = window_days
+        self.min_interval = min_interval
+        self.max_staleness_hours = max_staleness_hours
+        self.volatility_weight = volatility_weight
+        self.sale_weight = sale_weight
+        self.demand_weight = demand_weight
+
+    def next_products(
+        self,
+        clients: List[StoreAPIClient],
+        request_budget: Optional[int] = None,
+        chunk_size: int = 500
+    ) -> List:
+        """Highest-priority products that fit in `request_budget` store requests.
+
+        Returns lightweight rows (id, name, store_product_id, priority) in
+        descending priority order. Without a budget every eligible product
+        is returned.
+        """
+        now = datetime.utcnow()
+        eligible = self._eligible(now)
+        query = self._ranked(now, eligible)
+        if request_budget is not None:
+            query = query.limit(self.products_for_budget(clients, request_budget, chunk_size))
+        products = query.all()
+
+        deferred = self.db.query(func.count()).select_from(eligible.subquery()).scalar() - len(products)
+        PRICE_REFRESH_SCHEDULED.set(len(products))
+        PRICE_REFRESH_DEFERRED.set(deferred)
+        logger.info(f"Scheduled {len(products)} products for price refresh, {deferred} deferred")
+        return products
+
+    @staticmethod
+    def products_for_budget(clients: List[StoreAPIClient], request_budget: int, chunk_size: int) -> int:
+        """Largest product count whose refresh, in `chunk_size` chunks, costs at most `request_budget` requests."""
+        if not clients or request_budget <= 0:
+            return 0
+
+        def chunk_cost(count: int) -> int:
+            return sum(client.estimate_requests(count) for client in clients)
+
+        def cost(count: int) -> int:
+            full_chunks, remainder = divmod(count, chunk_size)
+            return full_chunks * chunk_cost(chunk_size) + chunk_cost(remainder)
+
+        low, high = 0, request_budget * max(client.batch_size for client in clients)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if cost(middle) <= request_budget:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def _eligible(self, now: datetime):
+        return select(Product.id).where(or_(
+            Product.last_price_check.is_(None),
+            Product.last_price_check < now - self.min_interval
+        ))
+
+    def _ranked(self, now: datetime, eligible):
+        window_start = (now - timedelta(days=self.window_days)).date()
+        observations = func.nullif(func.sum(PriceDailyRollup.observation_count), 0)
+        price_stats = (
+            select(
+                PriceDailyRollup.product_id,
+                (
+                    (func.max(PriceDailyRollup.max_price) - func.min(PriceDailyRollup.min_price))
+                    / func.nullif(func.sum(PriceDailyRollup.price_total) / observations, 0)
+                ).label("volatility"),
+                (cast(func.sum(PriceDailyRollup.sale_count), Float) / observations).label("sale_rate")
+            )
+            .where(PriceDailyRollup.day >= window_start)
+            .group_by(PriceDailyRollup.product_id)
+            .subquery()
+        )
+        list_refs = (
+            select(ShoppingListItem.product_id, func.count().label("reference_count"))
+            .group_by(ShoppingListItem.product_id)
+            .subquery()
+        )
+        alert_refs = (
+            select(PriceAlert.product_id, func.count().label("reference_count"))
+            .where(PriceAlert.is_active == True)
+            .group_by(PriceAlert.product_id)
+            .subquery()
+        )
+
+        staleness = func.coalesce(
+            func.least(
+                extract("epoch", now - Product.last_price_check) / 3600.0,
+                self.max_staleness_hours
+            ),
+            self.max_staleness_hours
+        )
+        demand = func.coalesce(list_refs.c.reference_count, 0) + func.coalesce(alert_refs.c.reference_count, 0)
+        priority = (staleness * (
+            1
+            + self.volatility_weight * func.coalesce(price_stats.c.volatility, 0)
+            + self.sale_weight * func.coalesce(price_stats.c.sale_rate, 0)
+            + self.demand_weight * func.ln(1 + demand)
+        )).label("priority")
+
+        return (
+            self.db.query(Product.id, Product.name, Product.store_product_id, priority)
+            .outerjoin(price_stats, price_stats.c.product_id == Product.id)
+            .outerjoin(list_refs, list_refs.c.product_id == Product.id)
+            .outerjoin(alert_refs, alert_refs.c.product_id == Product.id)
+            .filter(Product.id.in_(eligible))
+            .order_by(priority.desc(), Product.id)
+        )
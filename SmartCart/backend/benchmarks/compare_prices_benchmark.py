@@ -0,0 +1,162 @@
+"""Benchmark PriceComparisonService.compare_prices against basket size.
+
+Seeds a synthetic catalog into the database pointed to by DATABASE_URL,
+then reports SQL round trips and p50/p95 latency for the per-product
+lookup path (one Product query plus one full-history query per item)
+and the batched path served from latest_prices.
+
+    python benchmarks/compare_prices_benchmark.py --history 200 --runs 30
+"""
+import os
+import sys
+import time
+import argparse
+import random
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import event
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.database import SessionLocal, engine
+from api.models import Product, Price, Store, LatestPrice
+from api.services.price_comparison import PriceComparisonService
+from api.services.price_projections import PriceProjectionService
+
+BENCH_PREFIX = "bench-compare"
+
+class QueryCounter:
+    """Counts statements sent to the database."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+def seed(db, n_products: int, n_stores: int, history: int) -> List[int]:
+    """Create products with `history` observations per store."""
+    stores = []
+    for i in range(n_stores):
+        store = Store(name=f"{BENCH_PREFIX}-store-{i}", api_config={}, is_active=True)
+        db.add(store)
+        stores.append(store)
+    products = [
+        Product(name=f"{BENCH_PREFIX}-product-{i}", barcode=f"{BENCH_PREFIX}-{i}")
+        for i in range(n_products)
+    ]
+    db.add_all(products)
+    db.flush()
+
+    now = datetime.utcnow()
+    observations = []
+    for product in products:
+        for store in stores:
+            base = random.uniform(1, 20)
+            for h in range(history):
+                observations.append({
+                    "product_id": product.id,
+                    "store_id": store.id,
+                    "price": round(base * random.uniform(0.8, 1.2), 2),
+                    "currency": "USD",
+                    "is_sale": random.random() < 0.1,
+                    "sale_end_date": None,
+                    "timestamp": now - timedelta(hours=h)
+                })
+    db.bulk_insert_mappings(Price, observations)
+    PriceProjectionService(db).record(observations)
+    db.commit()
+    return [p.id for p in products]
+
+def cleanup(db) -> None:
+    """Remove everything created by seed()."""
+    product_ids = [p.id for p in db.query(Product.id).filter(Product.name.like(f"{BENCH_PREFIX}-%"))]
+    store_ids = [s.id for s in db.query(Store.id).filter(Store.name.like(f"{BENCH_PREFIX}-%"))]
+    db.query(LatestPrice).filter(LatestPrice.product_id.in_(product_ids)).delete(synchronize_session=False)
+    db.query(Price).filter(Price.product_id.in_(product_ids)).delete(synchronize_session=False)
+    db.query(Product).filter(Product.id.in_(product_ids)).delete(synchronize_session=False)
+    db.query(Store).filter(Store.id.in_(store_ids)).delete(synchronize_session=False)
+    db.commit()
+
+def per_product_compare(db, product_ids: List[int]) -> List[Dict]:
+    """The previous compare_prices: a product lookup and full history scan per id."""
+    results = []
+    for product_id in product_ids:
+        product = db.query(Product).filter(Product.id == product_id).first()
+        if not product:
+            continue
+        rows = (
+            db.query(Price, Store)
+            .join(Store, Price.store_id == Store.id)
+            .filter(Price.product_id == product_id)
+            .order_by(Price.timestamp.desc())
+            .all()
+        )
+        latest = {}
+        for price, store in rows:
+            latest.setdefault(store.id, {"store_name": store.name, "price": price.price})
+        if not latest:
+            continue
+        lowest = min(latest.values(), key=lambda x: x["price"])
+        results.append({
+            "product_id": product.id,
+            "lowest_price": lowest,
+            "price_difference": {s["store_name"]: s["price"] - lowest["price"] for s in latest.values()}
+        })
+    return results
+
+def measure(db, fn: Callable, basket: List[int], runs: int) -> Dict:
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        timings = []
+        for _ in range(runs):
+            db.expire_all()
+            start = time.perf_counter()
+            fn(basket)
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+    return {
+        "round_trips": counter.count // runs,
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95))
+    }
+
+def main() -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1,5,10,30,60,120", help="comma separated basket sizes")
+    parser.add_argument("--stores", type=int, default=5)
+    parser.add_argument("--history", type=int, default=200, help="observations per product and store")
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    db = SessionLocal()
+    try:
+        cleanup(db)
+        product_ids = seed(db, max(sizes), args.stores, args.history)
+        service = PriceComparisonService(db)
+
+        print(f"{'basket':>6} | {'path':<11} | {'queries':>7} | {'p50 ms':>8} | {'p95 ms':>8}")
+        print("-" * 52)
+        for size in sizes:
+            basket = product_ids[:size]
+            for name, fn in (
+                ("per-product", lambda b: per_product_compare(db, b)),
+                ("batched", service.compare_prices)
+            ):
+                stats = measure(db, fn, basket, args.runs)
+                print(f"{size:>6} | {name:<11} | {stats['round_trips']:>7} | "
+                      f"{stats['p50_ms']:>8.2f} | {stats['p95_ms']:>8.2f}")
+    finally:
+        cleanup(db)
+        db.close()
+
+if __name__ == "__main__":
+    main()
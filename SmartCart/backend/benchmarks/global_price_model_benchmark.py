@@ -0,0 +1,189 @@
+"""Compare the global price model with one model per product.
+
+Seeds synthetic price histories (per-category sale cycles, store price
+levels and slow drift) up to today into the database pointed to by
+DATABASE_URL, trains a PricePredictor per product and one
+GlobalPriceModel, then predicts the next `--horizon` days and reports
+MAE/MAPE against the known synthetic future, training time, artifact
+size and inference time. A "no change" forecast is included as a floor.
+
+    python benchmarks/global_price_model_benchmark.py --products 200 --days 120 --horizon 14
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from datetime import date, datetime, time as day_time, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.database import SessionLocal
+from api.models import Product, Price, Store, LatestPrice, PriceDailyRollup
+from api.price_ml import PricePredictor
+from api.ml.global_price_model import GlobalPriceModel
+from api.services.price_ingestion import PriceIngestionService
+
+BENCH_PREFIX = "bench-global-model"
+CATEGORIES = {"Dairy": 14, "Snacks": 21, "Pantry": 28, "Beverages": 10, "Frozen": 35}
+
+class SyntheticCatalog:
+    """Deterministic prices, so the "future" after today is known exactly."""
+
+    def __init__(self, n_products: int, n_stores: int, seed: int = 7):
+        rng = np.random.default_rng(seed)
+        names = list(CATEGORIES)
+        self.categories = [names[i % len(names)] for i in range(n_products)]
+        self.base = rng.uniform(1, 20, n_products)
+        self.drift = rng.normal(0, 0.05, n_products)
+        self.sale_offset = rng.integers(0, 35, n_products)
+        self.sale_depth = rng.uniform(0.15, 0.3, n_products)
+        self.store_level = rng.uniform(0.9, 1.1, n_stores)
+        self.epoch = date.today() - timedelta(days=365)
+
+    def price(self, product: int, store: int, day: date) -> Tuple[float, bool]:
+        age = (day - self.epoch).days
+        period = CATEGORIES[self.categories[product]]
+        on_sale = (age + self.sale_offset[product] + 2 * store) % period < 3
+        price = self.base[product] * self.store_level[store] * (1 + self.drift[product] * age / 365)
+        if on_sale:
+            price *= 1 - self.sale_depth[product]
+        return round(float(price), 2), bool(on_sale)
+
+def seed(db, catalog: SyntheticCatalog, days: int) -> Tuple[List[int], List[int]]:
+    """Ingest one observation per product, store and day up to today."""
+    stores = [Store(name=f"{BENCH_PREFIX}-store-{i}", api_config={}, is_active=True) for i in range(len(catalog.store_level))]
+    products = [
+        Product(name=f"{BENCH_PREFIX}-product-{i}", category=category, barcode=f"{BENCH_PREFIX}-{i}")
+        for i, category in enumerate(catalog.categories)
+    ]
+    db.add_all(stores + products)
+    db.flush()
+
+    today = date.today()
+    observations = []
+    for offset in range(days, -1, -1):
+        day = today - timedelta(days=offset)
+        for p, product in enumerate(products):
+            for s, store in enumerate(stores):
+                price, on_sale = catalog.price(p, s, day)
+                observations.append({
+                    "product_id": product.id,
+                    "store_id": store.id,
+                    "price": price,
+                    "is_sale": on_sale,
+                    "timestamp": datetime.combine(day, day_time(0))
+                })
+    PriceIngestionService(db).ingest(observations)
+    db.commit()
+    return [product.id for product in products], [store.id for store in stores]
+
+def cleanup(db) -> None:
+    """Remove everything created by seed()."""
+    product_ids = [p.id for p in db.query(Product.id).filter(Product.name.like(f"{BENCH_PREFIX}-%"))]
+    store_ids = [s.id for s in db.query(Store.id).filter(Store.name.like(f"{BENCH_PREFIX}-%"))]
+    for model in (LatestPrice, PriceDailyRollup, Price):
+        db.query(model).filter(model.product_id.in_(product_ids)).delete(synchronize_session=False)
+    db.query(Product).filter(Product.id.in_(product_ids)).delete(synchronize_session=False)
+    db.query(Store).filter(Store.id.in_(store_ids)).delete(synchronize_session=False)
+    db.commit()
+
+def score(predictions: Dict[Tuple[int, int, str], float], actual: Dict[Tuple[int, int, str], float]) -> Dict:
+    keys = [key for key in actual if key in predictions]
+    errors = np.array([abs(predictions[key] - actual[key]) for key in keys])
+    relative = errors / np.array([actual[key] for key in keys])
+    return {"mae": float(errors.mean()), "mape": float(relative.mean() * 100), "coverage": len(keys) / len(actual)}
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def main() -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--stores", type=int, default=3)
+    parser.add_argument("--days", type=int, default=120, help="days of history to seed")
+    parser.add_argument("--horizon", type=int, default=14, help="days ahead to predict and score")
+    args = parser.parse_args()
+
+    catalog = SyntheticCatalog(args.products, args.stores)
+    db = SessionLocal()
+    artifacts = tempfile.mkdtemp(prefix=BENCH_PREFIX)
+    try:
+        cleanup(db)
+        product_ids, store_ids = seed(db, catalog, args.days)
+
+        today = date.today()
+        actual, last_price = {}, {}
+        for p, product_id in enumerate(product_ids):
+            for s, store_id in enumerate(store_ids):
+                last_price[(product_id, store_id)] = catalog.price(p, s, today)[0]
+                for h in range(1, args.horizon + 1):
+                    day = today + timedelta(days=h)
+                    actual[(product_id, store_id, day.isoformat())] = catalog.price(p, s, day)[0]
+
+        results = {}
+
+        # One forest per product
+        start = time.perf_counter()
+        predictors = {}
+        for product in db.query(Product).filter(Product.id.in_(product_ids)):
+            predictor = PricePredictor(db)
+            predictor.train(product)
+            predictor.save_model(os.path.join(artifacts, "per_product", f"{product.id}.joblib"))
+            predictors[product] = predictor
+        train_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        predictions = {}
+        for product, predictor in predictors.items():
+            for row in predictor.predict(product, args.horizon):
+                for store_id in store_ids:
+                    predictions[(product.id, store_id, row["date"])] = row["predicted_price"]
+        results["per-product"] = {
+            **score(predictions, actual),
+            "train_s": train_seconds,
+            "predict_s": time.perf_counter() - start,
+            "size_mb": directory_size(os.path.join(artifacts, "per_product")) / 1e6
+        }
+
+        # One pooled model
+        model = GlobalPriceModel(history_days=args.days + 1)
+        stats = model.fit(db)
+        model.save(os.path.join(artifacts, "global.joblib"))
+        start = time.perf_counter()
+        predictions = {
+            (product_id, row["store_id"], row["date"]): row["predicted_price"]
+            for product_id, rows in model.predict_many(db, product_ids, args.horizon).items()
+            for row in rows
+        }
+        results["global"] = {
+            **score(predictions, actual),
+            "train_s": stats["train_seconds"],
+            "predict_s": time.perf_counter() - start,
+            "size_mb": os.path.getsize(os.path.join(artifacts, "global.joblib")) / 1e6
+        }
+
+        # Tomorrow looks like today
+        predictions = {
+            (product_id, store_id, day): last_price[(product_id, store_id)]
+            for product_id, store_id, day in actual
+        }
+        results["no change"] = {**score(predictions, actual), "train_s": 0.0, "predict_s": 0.0, "size_mb": 0.0}
+
+        print(f"{args.products} products x {args.stores} stores, {args.days} days of history, {args.horizon} day horizon")
+        print(f"{'model':<12} | {'MAE':>7} | {'MAPE %':>7} | {'train s':>8} | {'predict s':>9} | {'disk MB':>8}")
+        print("-" * 66)
+        for name, r in results.items():
+            print(f"{name:<12} | {r['mae']:>7.3f} | {r['mape']:>7.2f} | {r['train_s']:>8.2f} | "
+                  f"{r['predict_s']:>9.3f} | {r['size_mb']:>8.2f}")
+    finally:
+        cleanup(db)
+        db.close()
+
+if __name__ == "__main__":
+    main()
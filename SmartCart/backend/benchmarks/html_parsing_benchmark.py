@@ -0,0 +1,119 @@
+"""Benchmark the scraper's HTML parser backends on saved search result pages.
+
+Parses every *.html page in --fixtures with each installed backend
+(selectolax, lxml, bs4), inline and through HTMLParserPool, and reports
+pages/sec. Pages are matched to retailer selectors by file name prefix
+(amazon_*, instacart_*, peapod_*). When the directory holds no pages,
+synthetic ones shaped like each retailer's results are written first;
+drop real saved pages in to benchmark against those instead.
+
+    python benchmarks/html_parsing_benchmark.py --fixtures benchmarks/fixtures --rounds 5
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+from typing import Dict, List, Tuple
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.services.html_parsing import BACKENDS, HTMLParserPool, extract_prices
+
+# Retailer name prefix -> (item selector, price selector, item template)
+RETAILERS: Dict[str, Tuple[str, str, str]] = {
+    "amazon": (
+        ".s-result-item", ".a-price .a-offscreen",
+        '<div class="s-result-item" data-index="{i}"><h2><a href="/dp/{i}">Product {i}</a></h2>'
+        '<div class="a-row"><span class="a-price"><span class="a-offscreen">${price}</span>'
+        '<span aria-hidden="true">${price}</span></span></div><p>{filler}</p></div>'
+    ),
+    "instacart": (
+        ".product-card", ".price",
+        '<li class="product-card"><a href="/products/{i}"><img src="/img/{i}.jpg" alt="Product {i}">'
+        '<span class="name">Product {i}</span><span class="price">${price}</span></a><p>{filler}</p></li>'
+    ),
+    "peapod": (
+        ".product-item", ".price",
+        '<article class="product-item"><h3>Product {i}</h3><div class="details"><p>{filler}</p>'
+        '<div class="price">${price}</div></div></article>'
+    ),
+}
+
+def write_synthetic_fixtures(directory: str, pages: int, items: int) -> None:
+    """Write `pages` search result pages per retailer with `items` results each."""
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(42)
+    filler = "lorem ipsum dolor sit amet " * 20
+    for retailer, (_, _, template) in RETAILERS.items():
+        for page in range(pages):
+            body = "".join(
+                template.format(i=i, price=f"{rng.uniform(0.5, 1500):,.2f}", filler=filler)
+                for i in range(items)
+            )
+            html = (
+                "<!DOCTYPE html><html><head><title>Search</title>"
+                + "<script>var x = 1;</script>" * 20
+                + f"</head><body><nav>{'<a href=#>link</a>' * 200}</nav><main>{body}</main></body></html>"
+            )
+            with open(os.path.join(directory, f"{retailer}_{page}.html"), "w") as f:
+                f.write(html)
+
+def load_fixtures(directory: str) -> List[Tuple[str, str, str]]:
+    """(html, item selector, price selector) for each recognized page."""
+    fixtures = []
+    for name in sorted(os.listdir(directory)):
+        retailer = name.split("_")[0]
+        if not name.endswith(".html") or retailer not in RETAILERS:
+            continue
+        with open(os.path.join(directory, name)) as f:
+            item_selector, price_selector, _ = RETAILERS[retailer]
+            fixtures.append((f.read(), item_selector, price_selector))
+    return fixtures
+
+def bench_inline(backend: str, fixtures: List[Tuple[str, str, str]], rounds: int) -> Tuple[float, int]:
+    start = time.perf_counter()
+    found = 0
+    for _ in range(rounds):
+        for html, item_selector, price_selector in fixtures:
+            found += len(extract_prices(html, item_selector, price_selector, backend))
+    return rounds * len(fixtures) / (time.perf_counter() - start), found // rounds
+
+async def bench_pool(backend: str, fixtures: List[Tuple[str, str, str]], rounds: int, workers: int) -> float:
+    pool = HTMLParserPool(workers=workers, backend=backend)
+    try:
+        # Start the worker processes before timing
+        await asyncio.gather(*(pool.extract_prices(*fixtures[0]) for _ in range(workers)))
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await asyncio.gather(*(pool.extract_prices(*fixture) for fixture in fixtures))
+        return rounds * len(fixtures) / (time.perf_counter() - start)
+    finally:
+        pool.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures"))
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--pages", type=int, default=10, help="synthetic pages per retailer")
+    parser.add_argument("--items", type=int, default=60, help="results per synthetic page")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.fixtures) or not load_fixtures(args.fixtures):
+        write_synthetic_fixtures(args.fixtures, args.pages, args.items)
+    fixtures = load_fixtures(args.fixtures)
+    size = sum(len(html) for html, _, _ in fixtures) / len(fixtures) / 1024
+    print(f"{len(fixtures)} pages, {size:.0f} KiB on average, {args.workers} pool workers")
+
+    print(f"{'backend':<11} | {'prices/page':>11} | {'inline pages/s':>14} | {'pool pages/s':>12}")
+    print("-" * 58)
+    for backend in BACKENDS:
+        inline, found = bench_inline(backend, fixtures, args.rounds)
+        pooled = asyncio.run(bench_pool(backend, fixtures, args.rounds, args.workers))
+        print(f"{backend:<11} | {found / len(fixtures):>11.1f} | {inline:>14.1f} | {pooled:>12.1f}")
+
+if __name__ == "__main__":
+    main()
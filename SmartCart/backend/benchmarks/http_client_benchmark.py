@@ -0,0 +1,98 @@
+"""Benchmark store API price lookups with and without the pooled HTTP client.
+
+Starts a local aiohttp stub that mimics the Walmart price endpoint and
+drives StoreAPIClient.get_product_price against it, first opening a new
+ClientSession per request (the previous behaviour) and then through the
+shared pooled session. Reports requests/sec for each.
+
+    python benchmarks/http_client_benchmark.py --requests 5000 --concurrency 50
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+from typing import Awaitable, Callable
+
+import aiohttp
+from aiohttp import web
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.http_client import http_client
+from api.models import Store
+from api.store_apis import StoreAPIClient, StoreAPIError
+
+async def _price_handler(request: web.Request) -> web.Response:
+    return web.json_response({
+        "price": {"amount": 3.49, "currency": "USD", "isSale": False, "saleEndDate": None}
+    })
+
+async def start_stub_server(port: int) -> web.AppRunner:
+    app = web.Application()
+    app.router.add_get("/items/{item_id}/price", _price_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+async def per_request_session(client: StoreAPIClient, product_id: str) -> None:
+    """The previous pattern: a brand-new ClientSession for every call."""
+    async with aiohttp.ClientSession() as session:
+        url = f"{client.base_url}/items/{product_id}/price"
+        async with session.get(url, headers=client.headers) as response:
+            if response.status != 200:
+                raise StoreAPIError(f"Walmart API error: {response.status}")
+            client.adapter.parse_price(await response.json())
+
+async def pooled_session(client: StoreAPIClient, product_id: str) -> None:
+    await client.get_product_price(product_id)
+
+async def run(fn: Callable[[StoreAPIClient, str], Awaitable[None]], client: StoreAPIClient,
+              requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            await fn(client, str(i))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+async def main_async(args: argparse.Namespace) -> None:
+    runner = await start_stub_server(args.port)
+    store = Store(name="Walmart", api_config={
+        "base_url": f"http://127.0.0.1:{args.port}",
+        "api_key": "benchmark",
+        # Both paths should measure the HTTP client, not the retailer's rate limit
+        "rate_limit": {"requests_per_second": 1e9, "burst": 1_000_000}
+    })
+    client = StoreAPIClient(store)
+    try:
+        # Warm up both paths
+        await run(per_request_session, client, 50, 10)
+        await run(pooled_session, client, 50, 10)
+
+        before = await run(per_request_session, client, args.requests, args.concurrency)
+        after = await run(pooled_session, client, args.requests, args.concurrency)
+        print(f"{'path':<22} | {'req/s':>9}")
+        print("-" * 34)
+        print(f"{'session per request':<22} | {before:>9.0f}")
+        print(f"{'pooled session':<22} | {after:>9.0f}")
+        print(f"speedup: {after / before:.2f}x")
+    finally:
+        await http_client.close()
+        await runner.cleanup()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Benchmark the PricePredictor feature pipeline on a large price history.
+
+Seeds one product with `--rows` hourly prices up to the end of 2024,
+spread over `--stores` stores, into the database pointed to by
+DATABASE_URL with a single INSERT ... SELECT, then times loading the history and building the
+training features, both with the current vectorized pipeline and with
+the ORM/row-wise pipeline it replaced, and checks that the features
+both produce match.
+
+    python benchmarks/price_features_benchmark.py --rows 1000000 --stores 20 --runs 3
+"""
+import os
+import sys
+import time
+import argparse
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.database import SessionLocal
+from api.models import Product, Price, Store
+from api.price_ml import PricePredictor
+
+BENCH_PREFIX = "bench-price-features"
+# The hard-coded holiday list the legacy pipeline used
+LEGACY_HOLIDAYS = pd.to_datetime([
+    '2024-01-01', '2024-01-15', '2024-02-19', '2024-05-27', '2024-07-04',
+    '2024-09-02', '2024-10-14', '2024-11-11', '2024-11-28', '2024-12-25'
+])
+
+def seed(db, n_rows: int, n_stores: int) -> Product:
+    """Insert one product with `n_rows` hourly prices round-robin over the stores."""
+    stores = [Store(name=f"{BENCH_PREFIX}-store-{i}", api_config={}, is_active=True) for i in range(n_stores)]
+    product = Product(name=f"{BENCH_PREFIX}-product", category="Dairy", barcode=BENCH_PREFIX)
+    db.add_all(stores + [product])
+    db.flush()
+    db.execute(text("""
+        INSERT INTO prices (product_id, store_id, price, currency, is_sale, timestamp)
+        SELECT
+            :product_id,
+            (:store_ids)[1 + i % :n_stores],
+            round((3 + sin(i / 500.0) + (i % :n_stores) * 0.1)::numeric, 2),
+            'USD',
+            i % 17 = 0,
+            timestamp '2025-01-01' - make_interval(hours => :n_rows / :n_stores - i / :n_stores)
+        FROM generate_series(0, :n_rows - 1) AS i
+    """), {
+        "product_id": product.id,
+        "store_ids": [store.id for store in stores],
+        "n_stores": n_stores,
+        "n_rows": n_rows
+    })
+    db.commit()
+    db.execute(text("ANALYZE prices"))
+    return product
+
+def cleanup(db) -> None:
+    """Remove everything created by seed()."""
+    product_ids = [p.id for p in db.query(Product.id).filter(Product.name.like(f"{BENCH_PREFIX}-%"))]
+    db.query(Price).filter(Price.product_id.in_(product_ids)).delete(synchronize_session=False)
+    db.query(Product).filter(Product.id.in_(product_ids)).delete(synchronize_session=False)
+    db.query(Store).filter(Store.name.like(f"{BENCH_PREFIX}-%")).delete(synchronize_session=False)
+    db.commit()
+
+def legacy_load(db, product: Product) -> pd.DataFrame:
+    """The history loader as it was: one hydrated Price object per row."""
+    prices = db.query(Price).filter(Price.product_id == product.id).order_by(Price.timestamp).all()
+    df = pd.DataFrame([{
+        'timestamp': p.timestamp,
+        'valid_until': p.valid_until,
+        'price': p.price,
+        'store_id': p.store_id,
+        'is_sale': p.is_sale
+    } for p in prices])
+    span_days = (df['valid_until'] - df['timestamp']).dt.days.clip(lower=0)
+    df = df.loc[df.index.repeat(span_days + 1)]
+    df['timestamp'] += pd.to_timedelta(df.groupby(level=0).cumcount(), unit='D')
+    return df.drop(columns='valid_until').sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+def legacy_features(history: pd.DataFrame) -> pd.DataFrame:
+    """The feature builder as it was: row-wise apply for store diffs and holidays."""
+    df = history.copy()
+    holidays = LEGACY_HOLIDAYS
+
+    def days_to_next(date):
+        next_holiday = holidays[holidays > date].min()
+        if pd.isna(next_holiday):
+            return 365
+        return (next_holiday - date).days
+
+    df['day_of_week'] = df['timestamp'].dt.dayofweek
+    df['month'] = df['timestamp'].dt.month
+    df['is_holiday'] = df['timestamp'].dt.date.astype(str).isin(holidays.strftime('%Y-%m-%d'))
+    df['days_until_holiday'] = df['timestamp'].apply(days_to_next)
+    df['price_trend'] = df['price'].rolling(window=7).mean()
+    df['price_volatility'] = df['price'].rolling(window=7).std()
+    store_prices = df.groupby('store_id')['price'].mean()
+    df['store_price_diff'] = df.apply(lambda x: x['price'] - store_prices[x['store_id']], axis=1)
+    return df
+
+def measure(fn: Callable[[], object], runs: int) -> Dict[str, float]:
+    timings: List[float] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {"p50": float(np.percentile(timings, 50)), "min": min(timings)}
+
+def main() -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--stores", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--legacy-runs", type=int, default=1, help="runs of the (slow) legacy pipeline")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        cleanup(db)
+        product = seed(db, args.rows, args.stores)
+        predictor = PricePredictor(db)
+
+        history = predictor._load_price_history(product)
+        old_history = legacy_load(db, product)
+        db.expunge_all()
+        print(f"{len(history)} history rows over {args.stores} stores")
+
+        # Same rows and store features; the rolling windows are now per
+        # store over calendar days and holidays come from the calendar,
+        # so those are not compared
+        new = predictor._features(history)
+        old = legacy_features(old_history)
+        for column in ("day_of_week", "month", "store_price_diff"):
+            if not np.allclose(new[column].to_numpy(dtype=float), old[column].to_numpy(dtype=float)):
+                raise AssertionError(f"{column} differs from the legacy pipeline")
+
+        results = {
+            "load (ORM)": measure(lambda: (legacy_load(db, product), db.expunge_all()), args.legacy_runs),
+            "load (columns)": measure(lambda: predictor._load_price_history(product), args.runs),
+            "features (row-wise)": measure(lambda: legacy_features(old_history), args.legacy_runs),
+            "features (vectorized)": measure(lambda: predictor._features(history), args.runs),
+        }
+
+        print(f"{'stage':<22} | {'p50 s':>8} | {'min s':>8}")
+        print("-" * 44)
+        for name, r in results.items():
+            print(f"{name:<22} | {r['p50']:>8.3f} | {r['min']:>8.3f}")
+    finally:
+        cleanup(db)
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Benchmark ProductSearchService over a synthetic catalog.
+
+Seeds `--products` synthetic products (brand, adjective, noun and size
+drawn from word lists) into the database pointed to by DATABASE_URL with
+a single INSERT ... SELECT, then reports p50/p95 latency per query kind
+for the indexed search and for the unindexed ILIKE scan it replaces.
+Needs alembic revision 007 (search_vector and trigram indexes).
+
+    python benchmarks/product_search_benchmark.py --products 1000000 --runs 20
+"""
+import os
+import sys
+import time
+import argparse
+from typing import Callable, Dict, List
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.database import SessionLocal
+from api.models import Product
+from api.services.product_search import ProductSearchService
+
+BENCH_PREFIX = "bench-search"
+
+BRANDS = ["Acme", "Great Value", "Kroger", "Organic Valley", "Horizon", "Nature Valley", "Kellogg", "Heinz"]
+ADJECTIVES = ["Organic", "Whole", "Low Fat", "Unsweetened", "Crunchy", "Fresh", "Frozen", "Smoked", "Spicy", "Classic"]
+NOUNS = [
+    "Milk", "Yogurt", "Cheddar Cheese", "Granola", "Peanut Butter", "Chocolate Chip Cookies",
+    "Orange Juice", "Sourdough Bread", "Tomato Ketchup", "Almond Butter", "Chicken Breast", "Coffee Beans"
+]
+CATEGORIES = ["Dairy", "Bakery", "Pantry", "Snacks", "Beverages", "Meat", "Frozen"]
+SIZES = ["8 oz", "12 oz", "16 oz", "32 oz", "1 gal", "2 lb"]
+
+# (label, query) pairs covering the matching modes
+QUERIES = [
+    ("term", "yogurt"),
+    ("multi-term", "organic peanut butter"),
+    ("prefix", "choc chip"),
+    ("typo", "chedar chese"),
+    ("typo", "sourdugh"),
+]
+
+def _sql_array(words: List[str]) -> str:
+    return "ARRAY[" + ", ".join("'" + word.replace("'", "''") + "'" for word in words) + "]"
+
+def seed(db, n_products: int) -> None:
+    """Insert synthetic products in one statement, then refresh planner statistics."""
+    db.execute(text(f"""
+        INSERT INTO products (name, brand, category, description, barcode, created_at, updated_at)
+        SELECT
+            b[1 + i % {len(BRANDS)}] || ' ' || a[1 + (i / 7) % {len(ADJECTIVES)}] || ' '
+                || n[1 + (i / 71) % {len(NOUNS)}] || ' ' || s[1 + (i / 13) % {len(SIZES)}],
+            b[1 + i % {len(BRANDS)}],
+            c[1 + (i / 71) % {len(CATEGORIES)}],
+            'Synthetic product ' || i,
+            '{BENCH_PREFIX}-' || i,
+            now(), now()
+        FROM generate_series(1, :n) AS i,
+            (SELECT {_sql_array(BRANDS)} AS b, {_sql_array(ADJECTIVES)} AS a, {_sql_array(NOUNS)} AS n,
+                    {_sql_array(CATEGORIES)} AS c, {_sql_array(SIZES)} AS s) AS words
+    """), {"n": n_products})
+    db.commit()
+    db.execute(text("ANALYZE products"))
+    db.commit()
+
+def cleanup(db) -> None:
+    """Remove everything created by seed()."""
+    db.query(Product).filter(Product.barcode.like(f"{BENCH_PREFIX}-%")).delete(synchronize_session=False)
+    db.commit()
+
+def ilike_search(db, query: str, limit: int) -> List:
+    """What a search without the index amounts to: every term as a substring of the name."""
+    q = db.query(Product.id, Product.name)
+    for term in query.split():
+        q = q.filter(Product.name.ilike(f"%{term}%"))
+    return q.limit(limit).all()
+
+def measure(fn: Callable[[], List], runs: int) -> Dict:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        results = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "results": len(results),
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95))
+    }
+
+def main() -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="leave the synthetic catalog in place")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        cleanup(db)
+        start = time.perf_counter()
+        seed(db, args.products)
+        print(f"Seeded {args.products} products in {time.perf_counter() - start:.1f}s")
+        service = ProductSearchService(db)
+
+        print(f"{'kind':<10} | {'query':<22} | {'path':<7} | {'hits':>4} | {'p50 ms':>8} | {'p95 ms':>8}")
+        print("-" * 74)
+        for kind, query in QUERIES:
+            for name, fn in (
+                ("index", lambda: service.search(query, args.limit)),
+                ("ilike", lambda: ilike_search(db, query, args.limit))
+            ):
+                stats = measure(fn, args.runs)
+                db.rollback()
+                print(f"{kind:<10} | {query:<22} | {name:<7} | {stats['results']:>4} | "
+                      f"{stats['p50_ms']:>8.2f} | {stats['p95_ms']:>8.2f}")
+    finally:
+        if not args.keep:
+            cleanup(db)
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Load test AnalyticsService.get_user_savings against list and item counts.
+
+Seeds users with growing numbers of shopping lists and items into the
+database pointed to by DATABASE_URL and reports the number of SQL
+statements and latency per call, which should stay flat as the user's
+lists grow.
+
+    python benchmarks/user_savings_benchmark.py --shapes 1x5,5x20,20x50
+"""
+import os
+import sys
+import time
+import argparse
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import event
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.database import SessionLocal, engine
+from api.models import (
+    User, Store, Product, Price, LatestPrice, PriceDailyRollup,
+    ShoppingList, ShoppingListItem
+)
+from api.services.analytics import AnalyticsService
+from api.services.price_projections import PriceProjectionService
+
+BENCH_PREFIX = "bench-savings"
+
+class QueryCounter:
+    """Counts statements sent to the database."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+def seed_catalog(db, n_products: int, n_stores: int, days: int) -> List[int]:
+    """Create products with a few observations per store and day."""
+    stores = [Store(name=f"{BENCH_PREFIX}-store-{i}", api_config={}, is_active=True) for i in range(n_stores)]
+    categories = ["Produce", "Dairy", "Meat", "Bakery", "Pantry"]
+    products = [
+        Product(
+            name=f"{BENCH_PREFIX}-product-{i}",
+            barcode=f"{BENCH_PREFIX}-{i}",
+            category=random.choice(categories)
+        )
+        for i in range(n_products)
+    ]
+    db.add_all(stores + products)
+    db.flush()
+
+    now = datetime.utcnow()
+    observations = []
+    for product in products:
+        base = random.uniform(1, 20)
+        for store in stores:
+            for h in range(0, days * 24, 8):
+                observations.append({
+                    "product_id": product.id,
+                    "store_id": store.id,
+                    "price": round(base * random.uniform(0.8, 1.2), 2),
+                    "currency": "USD",
+                    "is_sale": random.random() < 0.1,
+                    "sale_end_date": None,
+                    "timestamp": now - timedelta(hours=h)
+                })
+    db.bulk_insert_mappings(Price, observations)
+    PriceProjectionService(db).record(observations)
+    db.commit()
+    return [p.id for p in products]
+
+def seed_user(db, shape: Tuple[int, int], product_ids: List[int]) -> int:
+    """Create a user with `lists` shopping lists of `items` items each."""
+    lists, items = shape
+    user = User(
+        email=f"{BENCH_PREFIX}-{lists}x{items}@example.com",
+        hashed_password="x",
+        full_name="Benchmark User"
+    )
+    db.add(user)
+    db.flush()
+    for i in range(lists):
+        shopping_list = ShoppingList(user_id=user.id, name=f"list {i}")
+        db.add(shopping_list)
+        db.flush()
+        db.add_all([
+            ShoppingListItem(
+                shopping_list_id=shopping_list.id,
+                product_id=random.choice(product_ids),
+                quantity=random.randint(1, 4)
+            )
+            for _ in range(items)
+        ])
+    db.commit()
+    return user.id
+
+def cleanup(db) -> None:
+    """Remove everything created by the seed functions."""
+    user_ids = [u.id for u in db.query(User.id).filter(User.email.like(f"{BENCH_PREFIX}-%"))]
+    list_ids = [l.id for l in db.query(ShoppingList.id).filter(ShoppingList.user_id.in_(user_ids))]
+    product_ids = [p.id for p in db.query(Product.id).filter(Product.name.like(f"{BENCH_PREFIX}-%"))]
+    store_ids = [s.id for s in db.query(Store.id).filter(Store.name.like(f"{BENCH_PREFIX}-%"))]
+    db.query(ShoppingListItem).filter(ShoppingListItem.shopping_list_id.in_(list_ids)).delete(synchronize_session=False)
+    db.query(ShoppingList).filter(ShoppingList.id.in_(list_ids)).delete(synchronize_session=False)
+    db.query(User).filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+    for model in (PriceDailyRollup, LatestPrice, Price):
+        db.query(model).filter(model.product_id.in_(product_ids)).delete(synchronize_session=False)
+    db.query(Product).filter(Product.id.in_(product_ids)).delete(synchronize_session=False)
+    db.query(Store).filter(Store.id.in_(store_ids)).delete(synchronize_session=False)
+    db.commit()
+
+def measure(db, user_id: int, days: int, runs: int) -> Dict:
+    service = AnalyticsService(db)
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            service.get_user_savings(user_id, days)
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+    return {
+        "queries": counter.count // runs,
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95))
+    }
+
+def main() -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shapes", default="1x5,5x20,20x50,50x100", help="comma separated LISTSxITEMS")
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--stores", type=int, default=4)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    shapes = [tuple(int(n) for n in shape.split("x")) for shape in args.shapes.split(",")]
+    db = SessionLocal()
+    try:
+        cleanup(db)
+        product_ids = seed_catalog(db, args.products, args.stores, args.days)
+
+        print(f"{'lists':>5} | {'items':>6} | {'queries':>7} | {'p50 ms':>8} | {'p95 ms':>8}")
+        print("-" * 46)
+        for shape in shapes:
+            user_id = seed_user(db, shape, product_ids)
+            stats = measure(db, user_id, args.days, args.runs)
+            print(f"{shape[0]:>5} | {shape[0] * shape[1]:>6} | {stats['queries']:>7} | "
+                  f"{stats['p50_ms']:>8.2f} | {stats['p95_ms']:>8.2f}")
+    finally:
+        cleanup(db)
+        db.close()
+
+if __name__ == "__main__":
+    main()
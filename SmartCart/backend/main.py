@@ -1,5 +1,6 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import make_asgi_app
 from strawberry.fastapi import GraphQLRouter
 from typing import List, Optional
 import uvicorn
@@ -8,6 +9,8 @@ from datetime import datetime
 from api.routers import auth, products, stores, shopping_lists, price_alerts, analytics
 from api.database import engine, Base
 from api.tasks.price_updater import start_price_updater, stop_price_updater
+from api.http_client import start_http_client, stop_http_client
+from api.retailers import load_retailers
 import asyncio
 
 # Configure logging
@@ -39,6 +42,9 @@ async def health_check():
         "version": "1.0.0"
     }
 
+# Prometheus metrics endpoint
+app.mount("/metrics", make_asgi_app())
+
 # GraphQL schema and resolvers will be imported here
 # from api.graphql.schema import schema
 # graphql_app = GraphQLRouter(schema)
@@ -66,12 +72,15 @@ async def root():
 @app.on_event("startup")
 async def startup_event():
     """Start background tasks on application startup."""
+    load_retailers()
+    await start_http_client()
     asyncio.create_task(start_price_updater())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Stop background tasks on application shutdown."""
     await stop_price_updater()
+    await stop_http_client()
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
@@ -0,0 +1,31 @@
+import os
+import sys
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.database import SessionLocal
+from api.services.price_ingestion import PriceIngestionService
+
+def compact_history() -> None:
+    # Load environment variables
+    load_dotenv()
+
+    db = SessionLocal()
+    try:
+        rows = PriceIngestionService(db).compact_history()
+        print(f"Removed {rows} duplicate price rows")
+    finally:
+        db.close()
+
+def main() -> None:
+    try:
+        compact_history()
+        print("Price history compacted successfully!")
+    except Exception as e:
+        print(f"Error compacting price history: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Monthly range partitioning maintenance for the prices table.
+
+    python scripts/manage_price_partitions.py enable [--months-ahead 3]
+    python scripts/manage_price_partitions.py create [--months-ahead 3]
+    python scripts/manage_price_partitions.py detach --before 2025-01 [--drop]
+    python scripts/manage_price_partitions.py status
+
+`enable` is a one-off conversion of an unpartitioned ``prices`` table and
+takes an exclusive lock while it copies the data, so run it during a
+maintenance window. `create` should run periodically (e.g. from cron) so
+upcoming months always have a partition; rows outside every monthly range
+land in ``prices_default``.
+"""
+import os
+import sys
+import argparse
+from datetime import date, datetime
+from typing import List, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.database import SessionLocal
+
+PARENT_TABLE = "prices"
+DEFAULT_PARTITION = "prices_default"
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.year * 12 + (day.month - 1) + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+def _partition_name(month_start: date) -> str:
+    return f"prices_y{month_start.year}m{month_start.month:02d}"
+
+def is_partitioned(db: Session) -> bool:
+    return bool(db.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = :table
+        )
+    """), {"table": PARENT_TABLE}).scalar())
+
+def list_partitions(db: Session) -> List[Tuple[str, str]]:
+    """Return (partition name, bound expression) for every attached partition."""
+    rows = db.execute(text("""
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table
+        ORDER BY child.relname
+    """), {"table": PARENT_TABLE})
+    return [(name, bound) for name, bound in rows]
+
+def create_partitions(db: Session, start: date, months_ahead: int) -> List[str]:
+    """Create any missing monthly partitions from `start` through now + months_ahead.
+
+    Rows for a month that already landed in the default partition (e.g.
+    when maintenance ran late) would block creating its partition, so the
+    default partition is detached, the new partition created, those rows
+    moved into it and the default partition reattached.
+    """
+    existing = {name for name, _ in list_partitions(db)}
+    month = date(start.year, start.month, 1)
+    last = _add_months(date.today().replace(day=1), months_ahead)
+    created = []
+    while month <= last:
+        name = _partition_name(month)
+        if name not in existing:
+            bounds = {"start": month, "end": _add_months(month, 1)}
+            stranded = DEFAULT_PARTITION in existing and db.execute(text(f"""
+                SELECT EXISTS (
+                    SELECT 1 FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end
+                )
+            """), bounds).scalar()
+            if stranded:
+                db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+            db.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+            ))
+            if stranded:
+                db.execute(text(f"""
+                    INSERT INTO {PARENT_TABLE}
+                    SELECT * FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end
+                """), bounds)
+                db.execute(
+                    text(f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end"),
+                    bounds
+                )
+                db.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+            created.append(name)
+        month = _add_months(month, 1)
+    return created
+
+def enable_partitioning(db: Session, months_ahead: int) -> List[str]:
+    """Convert the plain prices table into a monthly range-partitioned one."""
+    if is_partitioned(db):
+        raise RuntimeError("prices is already partitioned")
+
+    db.execute(text(f"LOCK TABLE {PARENT_TABLE} IN ACCESS EXCLUSIVE MODE"))
+    first = db.execute(text(f"SELECT MIN(timestamp) FROM {PARENT_TABLE}")).scalar() or datetime.utcnow()
+
+    # Keep the id sequence alive when the old table is dropped
+    db.execute(text("ALTER SEQUENCE prices_id_seq OWNED BY NONE"))
+    db.execute(text(f"""
+        CREATE TABLE prices_partitioned (
+            LIKE {PARENT_TABLE} INCLUDING DEFAULTS,
+            PRIMARY KEY (id, timestamp),
+            FOREIGN KEY (product_id) REFERENCES products (id),
+            FOREIGN KEY (store_id) REFERENCES stores (id)
+        ) PARTITION BY RANGE (timestamp)
+    """))
+    db.execute(text(f"ALTER TABLE {PARENT_TABLE} RENAME TO prices_unpartitioned"))
+    db.execute(text(f"ALTER TABLE prices_partitioned RENAME TO {PARENT_TABLE}"))
+    db.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+    created = create_partitions(db, first.date(), months_ahead)
+
+    # The partition key is part of the primary key, so it cannot be NULL
+    db.execute(
+        text("UPDATE prices_unpartitioned SET timestamp = :first WHERE timestamp IS NULL"),
+        {"first": first}
+    )
+    db.execute(text(f"INSERT INTO {PARENT_TABLE} SELECT * FROM prices_unpartitioned"))
+    db.execute(text("DROP TABLE prices_unpartitioned"))
+    db.execute(text(f"ALTER SEQUENCE prices_id_seq OWNED BY {PARENT_TABLE}.id"))
+
+    # Partitioned indexes cascade to every current and future partition
+    db.execute(text(f"CREATE INDEX ix_prices_id ON {PARENT_TABLE} (id)"))
+    db.execute(text(f"CREATE INDEX ix_prices_product_id_timestamp ON {PARENT_TABLE} (product_id, timestamp DESC)"))
+    db.execute(text(
+        f"CREATE INDEX ix_prices_store_id_product_id_timestamp ON {PARENT_TABLE} (store_id, product_id, timestamp DESC)"
+    ))
+    db.execute(text(f"CREATE INDEX ix_prices_timestamp_brin ON {PARENT_TABLE} USING brin (timestamp)"))
+    db.commit()
+    return created
+
+def detach_partitions(db: Session, before: date, drop: bool = False) -> List[str]:
+    """Detach (and optionally drop) monthly partitions that end on or before `before`.
+
+    The latest row of every product/store in a partition that has no
+    newer row is its current price, whenever it was last seen, so it is
+    carried forward to start at the boundary (keeping a later last_seen).
+    """
+    detached = []
+    for name, _ in list_partitions(db):
+        if name == DEFAULT_PARTITION:
+            continue
+        month = datetime.strptime(name, "prices_y%Ym%m").date()
+        end = _add_months(month, 1)
+        if end > before:
+            continue
+        db.execute(
+            text(f"""
+                INSERT INTO {PARENT_TABLE} (
+                    product_id, store_id, price, currency, is_sale, sale_end_date, timestamp, last_seen
+                )
+                SELECT DISTINCT ON (p.product_id, p.store_id)
+                    p.product_id, p.store_id, p.price, p.currency, p.is_sale, p.sale_end_date,
+                    :boundary, CASE WHEN p.last_seen > :boundary THEN p.last_seen END
+                FROM {name} p
+                WHERE p.product_id IS NOT NULL AND p.store_id IS NOT NULL
+                  AND NOT EXISTS (
+                      SELECT 1 FROM {PARENT_TABLE} n
+                      WHERE n.product_id = p.product_id AND n.store_id = p.store_id
+                        AND n.timestamp >= :boundary
+                  )
+                ORDER BY p.product_id, p.store_id, p.timestamp DESC, p.id DESC
+            """),
+            {"boundary": datetime.combine(end, datetime.min.time())}
+        )
+        db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        if drop:
+            db.execute(text(f"DROP TABLE {name}"))
+        detached.append(name)
+    db.commit()
+    return detached
+
+def main() -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Manage monthly partitions of the prices table")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for command in ("enable", "create"):
+        sub = subparsers.add_parser(command)
+        sub.add_argument("--months-ahead", type=int, default=3)
+    detach = subparsers.add_parser("detach")
+    detach.add_argument("--before", required=True, help="YYYY-MM; partitions ending on or before this month start")
+    detach.add_argument("--drop", action="store_true", help="drop detached partitions instead of keeping them")
+    subparsers.add_parser("status")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "enable":
+            created = enable_partitioning(db, args.months_ahead)
+            print(f"Partitioned prices into {len(created)} monthly partitions")
+        elif args.command == "create":
+            if not is_partitioned(db):
+                raise RuntimeError("prices is not partitioned; run 'enable' first")
+            created = create_partitions(db, date.today(), args.months_ahead)
+            db.commit()
+            print(f"Created partitions: {', '.join(created) or 'none'}")
+        elif args.command == "detach":
+            before = datetime.strptime(args.before, "%Y-%m").date()
+            detached = detach_partitions(db, before, args.drop)
+            print(f"{'Dropped' if args.drop else 'Detached'} partitions: {', '.join(detached) or 'none'}")
+        else:
+            print("partitioned" if is_partitioned(db) else "not partitioned")
+            for name, bound in list_partitions(db):
+                print(f"  {name}: {bound}")
+    except Exception as e:
+        db.rollback()
+        print(f"Error managing price partitions: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import os
+import sys
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.database import SessionLocal
+from api.services.price_projections import PriceProjectionService
+
+def rebuild_projections() -> None:
+    # Load environment variables
+    load_dotenv()
+
+    db = SessionLocal()
+    try:
+        service = PriceProjectionService(db)
+        rows = service.rebuild_latest_prices()
+        print(f"Rebuilt latest_prices: {rows} rows")
+        rows = service.rebuild_daily_rollups()
+        print(f"Rebuilt price_daily_rollups: {rows} rows")
+    finally:
+        db.close()
+
+def main() -> None:
+    try:
+        rebuild_projections()
+        print("Price projections rebuilt successfully!")
+    except Exception as e:
+        print(f"Error rebuilding price projections: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import argparse
+import logging
+from datetime import timedelta
+from dotenv import load_dotenv
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.database import SessionLocal
+from api.ml.trainer import PriceModelTrainer
+from api.ml.global_price_model import GlobalPriceModel
+
+def train_models(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        if args.global_model:
+            model = GlobalPriceModel(history_days=args.history_days)
+            stats = model.fit(db)
+            if model.model is None:
+                print("No price history to train the global model on")
+                return
+            path = model.save()
+            print(
+                f"Trained the global price model on {stats['rows']} rows from "
+                f"{stats['products']} products in {stats['train_seconds']:.1f}s ({path})"
+            )
+            return
+
+        trainer = PriceModelTrainer(
+            db,
+            workers=args.workers,
+            retrain_after=timedelta(hours=args.retrain_after_hours),
+            keep_versions=args.keep_versions
+        )
+        stats = trainer.run(args.limit)
+        print(
+            f"Trained {stats['trained']} price models "
+            f"({stats['skipped']} skipped, {stats['failed']} failed) in {stats['elapsed_seconds']:.1f}s"
+        )
+    finally:
+        db.close()
+
+def main() -> None:
+    # Load environment variables
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Train the price models that are due.")
+    parser.add_argument("--workers", type=int, default=None, help="training processes (default: all cores)")
+    parser.add_argument("--limit", type=int, default=None, help="train at most this many products per run")
+    parser.add_argument("--retrain-after-hours", type=float, default=24, help="minimum model age before retraining")
+    parser.add_argument("--keep-versions", type=int, default=3)
+    parser.add_argument("--global-model", action="store_true", help="train the pooled model for all products instead")
+    parser.add_argument("--history-days", type=int, default=180, help="days of history for the global model")
+    parser.add_argument("--interval", type=int, default=0, help="seconds between runs; 0 runs once")
+    args = parser.parse_args()
+
+    while True:
+        try:
+            train_models(args)
+        except Exception as e:
+            print(f"Error training price models: {str(e)}")
+            if not args.interval:
+                sys.exit(1)
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
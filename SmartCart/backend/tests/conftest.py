@@ -0,0 +1,34 @@
+import os
+import sys
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.models import Base
+
+# A scratch Postgres database; its tables are dropped and recreated
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+@pytest.fixture(scope="session")
+def engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.rollback()
+    tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+    session.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+    session.commit()
+    session.close()
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+from api.cache import cache
+from api.models import Product, Store
+from api.services.price_comparison import PriceComparisonService
+from api.services.price_ingestion import PriceIngestionService
+from api.services.price_projections import deals_cache_key
+
+def test_unchanged_confirmation_keeps_product_in_best_deals(db, tmp_path, monkeypatch):
+    # PricePredictor keeps its models under the working directory
+    monkeypatch.chdir(tmp_path)
+    stores = [Store(name=f"Store {i}", api_config={}, is_active=True) for i in range(2)]
+    product = Product(name="Coffee", category="Pantry")
+    db.add_all(stores + [product])
+    db.commit()
+
+    now = datetime.utcnow()
+    service = PriceIngestionService(db)
+    service.ingest([
+        {"product_id": product.id, "store_id": store.id, "price": price, "timestamp": now - timedelta(days=10)}
+        for store, price in zip(stores, (5.0, 4.0))
+    ])
+    # The retailers answered 304 today
+    result = service.ingest([
+        {"product_id": product.id, "store_id": store.id, "unchanged": True, "timestamp": now}
+        for store in stores
+    ])
+    db.commit()
+    assert result == {"inserted": 0, "skipped": 2}
+
+    cache.delete(deals_cache_key(None))
+    deals = PriceComparisonService(db).find_best_deals()
+    cache.delete(deals_cache_key(None))
+
+    assert [(deal["product_id"], deal["store_name"], deal["current_price"]) for deal in deals[:1]] == [
+        (product.id, "Store 1", 4.0)
+    ]
+    assert deals[0]["average_price"] == 4.5
@@ -0,0 +1,53 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import text
+
+from api.models import Product, Store, Price
+from scripts.manage_price_partitions import enable_partitioning, detach_partitions
+
+@pytest.fixture
+def partitioned_db(db, engine):
+    yield db
+    # Put back the plain table the other tests expect
+    db.rollback()
+    db.execute(text("DROP TABLE prices CASCADE"))
+    db.commit()
+    Price.__table__.create(engine)
+
+def test_detach_carries_forward_every_current_price(partitioned_db):
+    db = partitioned_db
+    stores = [Store(name=f"Store {i}", api_config={}, is_active=True) for i in range(4)]
+    product = Product(name="Bread")
+    db.add_all(stores + [product])
+    db.commit()
+
+    db.add_all([
+        # Seen once: last_seen is NULL
+        Price(product_id=product.id, store_id=stores[0].id, price=2.0, timestamp=datetime(2024, 1, 5)),
+        # Last seen before the boundary
+        Price(product_id=product.id, store_id=stores[1].id, price=2.1, timestamp=datetime(2024, 1, 5),
+              last_seen=datetime(2024, 1, 20)),
+        # Still seen after the boundary
+        Price(product_id=product.id, store_id=stores[2].id, price=2.2, timestamp=datetime(2024, 1, 5),
+              last_seen=datetime(2024, 2, 10)),
+        # Replaced by a newer row in the next month
+        Price(product_id=product.id, store_id=stores[3].id, price=2.3, timestamp=datetime(2024, 1, 5)),
+        Price(product_id=product.id, store_id=stores[3].id, price=2.4, timestamp=datetime(2024, 2, 3)),
+    ])
+    db.commit()
+    enable_partitioning(db, months_ahead=0)
+
+    assert detach_partitions(db, date(2024, 2, 1), drop=True) == ["prices_y2024m01"]
+
+    rows = {
+        row.store_id: (row.price, row.timestamp, row.last_seen)
+        for row in db.query(Price).order_by(Price.timestamp)
+    }
+    boundary = datetime(2024, 2, 1)
+    assert rows == {
+        stores[0].id: (2.0, boundary, None),
+        stores[1].id: (2.1, boundary, None),
+        stores[2].id: (2.2, boundary, datetime(2024, 2, 10)),
+        stores[3].id: (2.4, datetime(2024, 2, 3), None),
+    }
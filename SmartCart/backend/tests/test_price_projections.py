@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.models import Product, Store, LatestPrice, PriceDailyRollup
+from api.services.price_ingestion import PriceIngestionService
+from api.services.price_projections import PriceProjectionService
+
+def _snapshot(db):
+    latest = {
+        (row.product_id, row.store_id): (
+            row.price, row.is_sale, row.timestamp, row.min_price, row.max_price,
+            pytest.approx(row.price_total), row.observation_count
+        )
+        for row in db.query(LatestPrice)
+    }
+    rollups = {
+        (row.product_id, row.store_id, row.day): (
+            row.min_price, row.max_price, pytest.approx(row.price_total), row.observation_count,
+            row.sale_count, row.last_price, row.last_timestamp
+        )
+        for row in db.query(PriceDailyRollup)
+    }
+    return latest, rollups
+
+def test_rebuild_matches_incremental_projections(db):
+    stores = [Store(name=f"Store {i}", api_config={}, is_active=True) for i in range(2)]
+    product = Product(name="Milk")
+    db.add_all(stores + [product])
+    db.commit()
+
+    start = datetime(2024, 3, 1, 9, 30)
+    prices = [3.0, 3.0, 3.0, 2.5, 2.5, 3.0, 3.0, 3.0, 3.0, 3.2]
+    service = PriceIngestionService(db)
+    for day, price in enumerate(prices):
+        # Repeats within a day, a sale, and a gap of unobserved days
+        if day in (6, 7):
+            continue
+        for store in stores:
+            for hour in (0, 5):
+                service.ingest([{
+                    "product_id": product.id,
+                    "store_id": store.id,
+                    "price": price + (0.1 if store is stores[1] else 0),
+                    "is_sale": price < 3.0,
+                    "timestamp": start + timedelta(days=day, hours=hour)
+                }])
+    db.commit()
+
+    incremental = _snapshot(db)
+    projections = PriceProjectionService(db)
+    projections.rebuild_latest_prices()
+    projections.rebuild_daily_rollups()
+    db.expire_all()
+
+    assert _snapshot(db) == incremental
+    # Days where a price merely stayed valid still have a rollup
+    assert len(incremental[1]) == 2 * len(prices)
@@ -0,0 +1,55 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from api.cache import Cache
+from api.response_cache import ResponseCache
+
+class FakeResponse:
+    def __init__(self, status, body=b"", headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.charset = "utf-8"
+
+    async def read(self):
+        return self.body
+
+class FakeLimiter:
+    """Stands in for a RateLimiter, answering with canned responses."""
+    name = "Test"
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent = []
+
+    @asynccontextmanager
+    async def request(self, method, url, headers=None, params=None):
+        self.sent.append(headers)
+        yield self.responses.pop(0)
+
+def test_validators_are_stored_only_once_the_prices_commit(db):
+    responses = ResponseCache(store=Cache(url=""))
+    limiter = FakeLimiter(*(FakeResponse(200, b'{"price": 1}', {"ETag": '"v1"'}) for _ in range(4)))
+
+    def poll():
+        return asyncio.run(responses.fetch(limiter, "http://retailer.test/price/1"))
+
+    first = poll()
+    assert not first.unchanged
+
+    # The write fails and is rolled back: the next poll must not look unchanged
+    responses.remember(db, [first.validators])
+    db.rollback()
+    second = poll()
+    assert "If-None-Match" not in limiter.sent[-1]
+    assert not second.unchanged
+
+    # A released savepoint is not a commit either
+    with db.begin_nested():
+        responses.remember(db, [second.validators])
+    assert not poll().unchanged
+
+    db.commit()
+    fourth = poll()
+    assert limiter.sent[-1] == {"If-None-Match": '"v1"'}
+    assert fourth.unchanged